@@ -1,10 +1,13 @@
 """Registry central para comunicação Agent-to-Agent (A2A)."""
 
+import asyncio
 import logging
 from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Set, Tuple
 
+from core.state_store import BoundedStateStore
+
 from .messages import AgentMessage, AgentResponse, MessageStatus, A2ASession
 
 
@@ -134,8 +137,8 @@ class AgentRegistry:
         # Agentes registrados
         self.agents: Dict[str, 'BaseSubagent'] = {}
         
-        # Sessões ativas
-        self.active_sessions: Dict[str, A2ASession] = {}
+        # Sessões ativas (limitadas por LRU + TTL)
+        self.active_sessions: BoundedStateStore = BoundedStateStore("a2a_sessions")
         
         # Circuit breaker para prevenir loops
         self.circuit_breaker = CircuitBreaker()
@@ -213,6 +216,63 @@ class AgentRegistry:
         """Roteia uma mensagem entre agentes com circuit breaker."""
         
         start_time = datetime.now()
+        target_agent, blocked_response = self._prepare_route(message, session)
+        if blocked_response:
+            return blocked_response
+        
+        # 4. Processar mensagem no agente de destino
+        try:
+            if message.message_type.value == "delegate":
+                # Processar delegação
+                result = target_agent.processar_pergunta(
+                    message.content,
+                    message.context.get('user_profile', {})
+                )
+                response = self._delegation_success(message, session, target_agent, result, start_time)
+            else:
+                response = self._unsupported_message(message)
+            
+        except Exception as e:
+            response = self._delegation_failure(message, session, e, start_time)
+        
+        return self._record_response(response, session)
+    
+    async def route_message_async(self, message: AgentMessage, session: Optional[A2ASession] = None) -> AgentResponse:
+        """Versão assíncrona de route_message: o agente de destino roda no event loop atual."""
+        
+        start_time = datetime.now()
+        target_agent, blocked_response = self._prepare_route(message, session)
+        if blocked_response:
+            return blocked_response
+        
+        try:
+            if message.message_type.value == "delegate":
+                user_profile = message.context.get('user_profile', {})
+                if hasattr(target_agent, 'processar_pergunta_async'):
+                    result = await target_agent.processar_pergunta_async(message.content, user_profile)
+                elif hasattr(target_agent, 'processar_async'):
+                    result = await target_agent.processar_async(message.content, user_profile)
+                else:
+                    result = await asyncio.to_thread(target_agent.processar_pergunta, message.content, user_profile)
+                response = self._delegation_success(message, session, target_agent, result, start_time)
+            else:
+                response = self._unsupported_message(message)
+            
+        except Exception as e:
+            response = self._delegation_failure(message, session, e, start_time)
+        
+        return self._record_response(response, session)
+    
+    def _prepare_route(
+        self,
+        message: AgentMessage,
+        session: Optional[A2ASession]
+    ) -> Tuple[Optional[object], Optional[AgentResponse]]:
+        """Circuit breaker, resolução do destino e registro da mensagem.
+        
+        Returns:
+            Tuple (target_agent, error_response) - error_response preenchido se a rota foi recusada
+        """
         self.stats["total_messages"] += 1
         
         # 1. Verificar circuit breaker
@@ -235,7 +295,7 @@ class AgentRegistry:
                 "reason": block_reason
             })
             
-            return error_response
+            return None, error_response
         
         # 2. Verificar se agente de destino existe
         target_agent = self.agents.get(message.recipient)
@@ -253,7 +313,7 @@ class AgentRegistry:
             )
             self.stats["failed_delegations"] += 1
             
-            return error_response
+            return None, error_response
         
         # 3. Registrar mensagem
         self.circuit_breaker.record_message(message.sender, message.recipient)
@@ -270,74 +330,87 @@ class AgentRegistry:
             "session_id": session.session_id if session else None
         })
         
-        # 4. Processar mensagem no agente de destino
-        try:
-            if message.message_type.value == "delegate":
-                # Processar delegação
-                result = target_agent.processar_pergunta(
-                    message.content,
-                    message.context.get('user_profile', {})
-                )
-                
-                # Criar resposta de sucesso
-                response = AgentResponse(
-                    message_id=message.id,
-                    task_id=message.task_id,
-                    responder=message.recipient,
-                    status=MessageStatus.SUCCESS,
-                    content=result,
-                    processing_time_ms=int((datetime.now() - start_time).total_seconds() * 1000),
-                    contribution_summary=f"Forneceu informações sobre {target_agent.config.specialty}"
-                )
-                
-                # Adicionar metadados se disponíveis
-                if hasattr(target_agent, 'last_sources_used'):
-                    response.sources_used = getattr(target_agent, 'last_sources_used', [])
-                
-                if hasattr(target_agent, 'last_tools_used'):
-                    response.tools_used = getattr(target_agent, 'last_tools_used', [])
-                
-                # Registrar sucesso
-                self.circuit_breaker.record_success(message.sender, message.recipient)
-                self.stats["successful_delegations"] += 1
-                
-                logger.info(f"A2A Registry: Message processed successfully", extra={
-                    "response": response.to_dict(),
-                    "session_id": session.session_id if session else None
-                })
-                
-            else:
-                # Outros tipos de mensagem (futuro)
-                response = AgentResponse(
-                    message_id=message.id,
-                    task_id=message.task_id,
-                    responder=message.recipient,
-                    status=MessageStatus.ERROR,
-                    content=f"Tipo de mensagem '{message.message_type.value}' não suportado"
-                )
-            
-        except Exception as e:
-            # Registrar falha
-            self.circuit_breaker.record_failure(
-                message.sender, message.recipient, str(e)
-            )
-            self.stats["failed_delegations"] += 1
-            
-            response = AgentResponse(
-                message_id=message.id,
-                task_id=message.task_id,
-                responder=message.recipient,
-                status=MessageStatus.ERROR,
-                content=f"Erro no processamento: {str(e)}",
-                processing_time_ms=int((datetime.now() - start_time).total_seconds() * 1000)
-            )
-            
-            logger.error(f"A2A Registry: Error processing message", extra={
-                "message": message.to_dict(),
-                "error": str(e),
-                "session_id": session.session_id if session else None
-            })
+        return target_agent, None
+    
+    def _delegation_success(
+        self,
+        message: AgentMessage,
+        session: Optional[A2ASession],
+        target_agent,
+        result: str,
+        start_time: datetime
+    ) -> AgentResponse:
+        """Monta a resposta de uma delegação bem-sucedida."""
+        # Criar resposta de sucesso
+        response = AgentResponse(
+            message_id=message.id,
+            task_id=message.task_id,
+            responder=message.recipient,
+            status=MessageStatus.SUCCESS,
+            content=result,
+            processing_time_ms=int((datetime.now() - start_time).total_seconds() * 1000),
+            contribution_summary=f"Forneceu informações sobre {target_agent.config.specialty}"
+        )
         
+        # Adicionar metadados se disponíveis
+        if hasattr(target_agent, 'last_sources_used'):
+            response.sources_used = getattr(target_agent, 'last_sources_used', [])
+        
+        if hasattr(target_agent, 'last_tools_used'):
+            response.tools_used = getattr(target_agent, 'last_tools_used', [])
+        
+        # Registrar sucesso
+        self.circuit_breaker.record_success(message.sender, message.recipient)
+        self.stats["successful_delegations"] += 1
+        
+        logger.info(f"A2A Registry: Message processed successfully", extra={
+            "response": response.to_dict(),
+            "session_id": session.session_id if session else None
+        })
+        return response
+    
+    @staticmethod
+    def _unsupported_message(message: AgentMessage) -> AgentResponse:
+        """Outros tipos de mensagem (futuro)."""
+        return AgentResponse(
+            message_id=message.id,
+            task_id=message.task_id,
+            responder=message.recipient,
+            status=MessageStatus.ERROR,
+            content=f"Tipo de mensagem '{message.message_type.value}' não suportado"
+        )
+    
+    def _delegation_failure(
+        self,
+        message: AgentMessage,
+        session: Optional[A2ASession],
+        error: Exception,
+        start_time: datetime
+    ) -> AgentResponse:
+        """Registra a falha no circuit breaker e monta a resposta de erro."""
+        self.circuit_breaker.record_failure(
+            message.sender, message.recipient, str(error)
+        )
+        self.stats["failed_delegations"] += 1
+        
+        response = AgentResponse(
+            message_id=message.id,
+            task_id=message.task_id,
+            responder=message.recipient,
+            status=MessageStatus.ERROR,
+            content=f"Erro no processamento: {str(error)}",
+            processing_time_ms=int((datetime.now() - start_time).total_seconds() * 1000)
+        )
+        
+        logger.error(f"A2A Registry: Error processing message", extra={
+            "message": message.to_dict(),
+            "error": str(error),
+            "session_id": session.session_id if session else None
+        })
+        return response
+    
+    def _record_response(self, response: AgentResponse, session: Optional[A2ASession]) -> AgentResponse:
+        """Registra a resposta no histórico e sessão e atualiza as estatísticas."""
         # 5. Registrar resposta no histórico e sessão
         self.response_history.append(response)
         if len(self.response_history) > 100:
@@ -363,6 +436,7 @@ class AgentRegistry:
             **self.stats,
             "registered_agents": len(self.agents),
             "active_sessions": len(self.active_sessions),
+            "sessions_store": self.active_sessions.get_stats(),
             "circuit_breaker": self.circuit_breaker.get_status()
         }
     
@@ -376,7 +450,7 @@ class AgentRegistry:
         ]
         
         for sid in old_sessions:
-            del self.active_sessions[sid]
+            self.active_sessions.pop(sid, None)
         
         if old_sessions:
             logger.info(f"A2A Registry: Cleaned up {len(old_sessions)} old sessions")
\ No newline at end of file
@@ -9,8 +9,12 @@ import asyncio
 
 from subagents.base_subagent import SubagentConfig
 from dal.postgres_dal_async import PostgresDALAsync
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
 from core.config import config
+from core.embedding_cache import get_embedding_service
+from core.llm_clients import openai_http_clients
+from core.state_store import BoundedStateStore
+from core.streaming import gerar_resposta_llm
 
 PROMPT_TEMPLATE = dedent(
     """
@@ -70,7 +74,7 @@ class AgenteRHAsync:
         self.dal_async = PostgresDALAsync()
         self.llm = None
         self.embeddings = None
-        self.memoria_conversas = {}
+        self.memoria_conversas = BoundedStateStore("memoria_conversas:rh")
         
         # Inicializar LLM e embeddings
         self._inicializar_llm()
@@ -83,13 +87,11 @@ class AgenteRHAsync:
             api_key=api_key,
             model=config.openai.chat_model,
             temperature=0.3,
-            max_tokens=800
+            max_tokens=800,
+            **openai_http_clients()
         )
         
-        self.embeddings = OpenAIEmbeddings(
-            api_key=api_key,
-            model=config.openai.embedding_model
-        )
+        self.embeddings = get_embedding_service(config.openai.embedding_model)
     
     async def processar_async(self, pergunta: str, user_profile: dict) -> str:
         """Processa pergunta de forma ASSÍNCRONA"""
@@ -97,14 +99,8 @@ class AgenteRHAsync:
             if self.config.debug:
                 print(f"🔄 [{self.config.name}] Processando pergunta (ASYNC): '{pergunta[:50]}...'")
             
-            # Conectar ao banco de forma assíncrona
-            await self.dal_async.connect()
-            
             # Gerar embedding da pergunta
-            query_embedding = await asyncio.to_thread(
-                self.embeddings.embed_query, 
-                pergunta
-            )
+            query_embedding = await self.embeddings.aembed_query(pergunta)
             
             # Buscar contexto relevante de forma assíncrona
             search_result = await self.dal_async.search_vectors_async(
@@ -135,12 +131,7 @@ class AgenteRHAsync:
             if self.config.debug:
                 print(f"🤖 [{self.config.name}] Gerando resposta com LLM (ASYNC)...")
             
-            resposta = await asyncio.to_thread(
-                self.llm.invoke,
-                prompt_final
-            )
-            
-            resposta_texto = resposta.content if hasattr(resposta, 'content') else str(resposta)
+            resposta_texto = await gerar_resposta_llm(self.llm, prompt_final, self.config.name)
             
             # Armazenar na memória
             self._adicionar_memoria(usuario_id, pergunta, resposta_texto)
@@ -154,9 +145,6 @@ class AgenteRHAsync:
             error_msg = f"❌ Erro ao processar pergunta (Agente {self.config.name}): {str(e)}"
             print(error_msg)
             return f"Desculpe, encontrei um erro ao processar sua pergunta sobre RH. Por favor, tente novamente."
-        
-        finally:
-            await self.dal_async.disconnect()
     
     def _preparar_contexto(self, documents: list) -> str:
         """Prepara o contexto a partir dos documentos recuperados"""
@@ -178,10 +166,7 @@ class AgenteRHAsync:
     
     def _preparar_historico(self, usuario_id: str) -> str:
         """Prepara o histórico de conversas do usuário"""
-        if usuario_id not in self.memoria_conversas:
-            return ""
-        
-        historico = self.memoria_conversas[usuario_id]
+        historico = self.memoria_conversas.get(usuario_id)
         if not historico:
             return ""
         
@@ -199,14 +184,10 @@ class AgenteRHAsync:
     
     def _adicionar_memoria(self, usuario_id: str, pergunta: str, resposta: str):
         """Adiciona interação à memória"""
-        if usuario_id not in self.memoria_conversas:
-            self.memoria_conversas[usuario_id] = []
-        
-        self.memoria_conversas[usuario_id].append((pergunta, resposta))
+        historico = self.memoria_conversas.get(usuario_id, []) + [(pergunta, resposta)]
         
-        # Manter apenas as últimas 10 interações
-        if len(self.memoria_conversas[usuario_id]) > 10:
-            self.memoria_conversas[usuario_id] = self.memoria_conversas[usuario_id][-10:]
+        # Manter apenas as últimas 10 interações (reatribuir renova o TTL no store)
+        self.memoria_conversas[usuario_id] = historico[-10:]
     
     def obter_info_agente(self) -> dict:
         """Retorna informações do agente"""
@@ -11,6 +11,7 @@ from agentes.subagentes.agente_dev_async import criar_agente_dev_async
 from agentes.subagentes.agente_enduser_async import criar_agente_enduser_async
 from agentes.subagentes.agente_governance_async import criar_agente_governance_async
 # from agente_ti import criar_agente_ti  # OBSOLETO: Movido para obsoleto/
+from core.streaming import reset_stream_answer
 from subagents.hierarchical import TIHierarchicalAgent
 
 # Configurar logging
@@ -66,7 +67,10 @@ class TICoordinatorAsync:
                 else:
                     logger.warning(f"⚠️ Falha ao criar sub-agente {name}")
             
-            # 4. Verificar estatísticas
+            # 4. Centróides do roteador vetorial (uma vez, no startup)
+            await self.hierarchical_agent.prepare_router_async()
+            
+            # 5. Verificar estatísticas
             stats = self.hierarchical_agent.get_hierarchy_stats()
             logger.info(f"📊 Hierarquia TI configurada (ASYNC): {stats}")
             
@@ -116,9 +120,8 @@ class TICoordinatorAsync:
             else:
                 pergunta_com_dica = pergunta
             
-            # Processar de forma assíncrona
-            resultado = await asyncio.to_thread(
-                self.hierarchical_agent.process_with_hierarchy,
+            # Caminho assíncrono nativo (sem thread/event loop extra por pergunta)
+            resultado = await self.hierarchical_agent.process_with_hierarchy_async(
                 pergunta_com_dica,
                 user_profile
             )
@@ -132,13 +135,10 @@ class TICoordinatorAsync:
             
         except Exception as e:
             logger.error(f"❌ Erro no processamento hierárquico (ASYNC): {e}")
-            # Fallback para agente TI base
+            # Fallback para agente TI base (descartando o que já foi transmitido)
+            reset_stream_answer("Erro no processamento hierárquico")
             if self.base_ti_agent:
-                return await asyncio.to_thread(
-                    self.base_ti_agent.processar_pergunta,
-                    pergunta,
-                    user_profile
-                )
+                return await self.hierarchical_agent.call_agent_async(self.base_ti_agent, pergunta, user_profile)
             else:
                 return "❌ Erro no sistema de TI. Tente novamente ou contate o suporte."
     
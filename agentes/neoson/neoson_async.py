@@ -19,17 +19,19 @@ from agentes.coordenadores.ti_coordinator_async import criar_ti_coordinator_asyn
 
 # Core configuration
 from core.config import config, validate_config
+from core.streaming import emit_stream_event
+from core.embedding_cache import get_embedding_service
+from core.state_store import BoundedStateStore
 
 # Novos sistemas
-from core.agent_classifier import AgentClassifier
+from core.agent_classifier import AgentClassifier, reset_routing_plan, set_routing_plan
 from core.glossario_corporativo import (
     detectar_termos_corporativos,
     enriquecer_prompt_com_glossario,
-    get_contexto_glossario
+    get_contexto_glossario,
+    get_glossary_matcher
 )
 
-# LangChain para coordenação
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 import numpy as np
 
 
@@ -47,15 +49,15 @@ class NeosonAsync:
         self.nome = "Neoson Async"
         self.versao = "3.0.0"
         self.agentes = {}
-        self.llm_coordenador = None
         self.embeddings = None
-        self.memoria_global = {}
+        self.memoria_global = BoundedStateStore("memoria_global:neoson")
         
         # 🆕 NOVO: Classificador inteligente baseado em LLM
         self.classifier = AgentClassifier()
         
         # 🆕 NOVO: Sistema de glossário corporativo
         self.glossario_ativo = True
+        get_glossary_matcher()  # compila o matcher compartilhado uma única vez
         
         # 🆕 NOVO: Regras de segurança
         self.proibir_links = True  # Nunca enviar links nas respostas
@@ -75,21 +77,8 @@ class NeosonAsync:
 
         print("✅ Configurações validadas com sucesso")
 
-        # Usar configuração centralizada
-        api_key = config.openai.api_key
-
-        # Inicializar LLM coordenador e embeddings
-        self.llm_coordenador = ChatOpenAI(
-            api_key=api_key,
-            model=config.openai.chat_model,
-            temperature=0.1,
-            max_tokens=50
-        )
-
-        self.embeddings = OpenAIEmbeddings(
-            api_key=api_key,
-            model=config.openai.embedding_model
-        )
+        # Embeddings (a classificação/roteamento fica com o planner do AgentClassifier)
+        self.embeddings = get_embedding_service(config.openai.embedding_model)
 
         print("--- 🤖 Inicializando agentes especializados (ASSÍNCRONO)... ---")
 
@@ -164,20 +153,20 @@ class NeosonAsync:
         """
         🆕 NOVO: Classificação 100% LLM - Sem keywords
         
-        Usa o AgentClassifier para analisar a pergunta e escolher
-        os 3 melhores sub-agentes para responder
+        Usa o planner do AgentClassifier para, em uma única chamada, escolher
+        os 3 melhores sub-agentes, as tools MCP e a decisão de delegação
         
         Args:
             pergunta: Pergunta do usuário
             
         Returns:
-            dict com área principal e agentes selecionados
+            dict com área principal, agentes selecionados, ferramentas e delegação
         """
         try:
             print("🤖 Iniciando classificação inteligente (LLM)...")
             
-            # Usar o classificador inteligente
-            classificacao = await self.classifier.classify_question(pergunta)
+            # Plano de roteamento completo (uma chamada de LLM)
+            classificacao = await self.classifier.plan_question(pergunta)
             
             print(f"� Análise: {classificacao['analise']}")
             print(f"🎯 Área: {classificacao['area_principal'].upper()}")
@@ -189,16 +178,8 @@ class NeosonAsync:
             
         except Exception as e:
             print(f"❌ Erro na classificação LLM: {e}")
-            # Fallback simples
-            return {
-                "analise": "Erro na classificação, usando fallback",
-                "area_principal": "ti",
-                "agentes_selecionados": [
-                    {"agente": "enduser", "relevancia": "alta", "justificativa": "Fallback"},
-                    {"agente": "governance", "relevancia": "media", "justificativa": "Fallback"},
-                    {"agente": "infra", "relevancia": "baixa", "justificativa": "Fallback"}
-                ]
-            }
+            # Fallback por keywords (sem tools/delegação: os agentes decidem sozinhos)
+            return self.classifier._fallback_classification(pergunta)
 
     def enriquecer_pergunta_com_glossario(self, pergunta: str) -> tuple:
         """
@@ -269,6 +250,7 @@ class NeosonAsync:
         - Enriquecimento com glossário corporativo
         - Validação de segurança (remoção de links)
         """
+        token_plano = None
         try:
             print(f"\n{'='*80}")
             print(f"🔍 PROCESSANDO PERGUNTA (v3.0)")
@@ -277,14 +259,25 @@ class NeosonAsync:
             # FASE 1: Enriquecer com glossário corporativo
             pergunta_enriquecida, termos_detectados = self.enriquecer_pergunta_com_glossario(pergunta)
             
-            # FASE 2: Classificar com LLM (100%)
+            # FASE 2: Classificar com LLM (100%) - o plano fica ativo para os subagentes
             classificacao = await self.classificar_pergunta_async(pergunta)
+            token_plano = set_routing_plan(classificacao)
             area_principal = classificacao['area_principal']
             agentes_selecionados = classificacao['agentes_selecionados']
             
             print(f"\n🎯 Área classificada: {area_principal.upper()}")
             print(f"🤖 Agentes escolhidos: {[a['agente'] for a in agentes_selecionados]}")
             
+            # Streaming: informar o roteamento assim que conhecido
+            emit_stream_event('routing', {
+                'classificacao': area_principal,
+                'agente': self.agentes.get(area_principal, {}).get('nome'),
+                'especialidade': self.agentes.get(area_principal, {}).get('especialidade'),
+                'agentes_sugeridos': [a['agente'] for a in agentes_selecionados],
+                'analise': classificacao['analise'],
+                'termos_corporativos': termos_detectados
+            })
+            
             # FASE 3: Direcionar para o agente apropriado
             if area_principal in self.agentes and self.agentes[area_principal]['status'] == 'ativo':
                 agente = self.agentes[area_principal]
@@ -359,6 +352,9 @@ class NeosonAsync:
                 'classificacao': 'erro',
                 'metadata': {'erro': str(e)}
             }
+        finally:
+            if token_plano is not None:
+                reset_routing_plan(token_plano)
 
     def _resposta_generica(self, pergunta: str, perfil_usuario: dict) -> str:
         """Gera uma resposta genérica quando não consegue classificar a pergunta"""
@@ -407,12 +403,10 @@ Como posso ajudar melhor? 😊"""
             # Limpar memória em cada agente
             for agente_id, agente in self.agentes.items():
                 if hasattr(agente['instancia'], 'memoria_conversas'):
-                    if usuario_id in agente['instancia'].memoria_conversas:
-                        del agente['instancia'].memoria_conversas[usuario_id]
+                    agente['instancia'].memoria_conversas.pop(usuario_id, None)
             
             # Limpar memória global
-            if usuario_id in self.memoria_global:
-                del self.memoria_global[usuario_id]
+            self.memoria_global.pop(usuario_id, None)
             
             return True
         except Exception as e:
@@ -8,8 +8,12 @@ import asyncio
 
 from subagents.base_subagent import SubagentConfig
 from dal.postgres_dal_async import PostgresDALAsync
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
 from core.config import config
+from core.embedding_cache import get_embedding_service
+from core.llm_clients import openai_http_clients
+from core.state_store import BoundedStateStore
+from core.streaming import gerar_resposta_llm
 
 PROMPT_TEMPLATE = dedent(
     """
@@ -62,7 +66,7 @@ class AgentebbAsync:
         self.dal_async = PostgresDALAsync()
         self.llm = None
         self.embeddings = None
-        self.memoria_conversas = {}
+        self.memoria_conversas = BoundedStateStore("memoria_conversas:bb")
         
         # Configuração de ferramentas MCP
         self.enable_mcp_tools = False
@@ -80,13 +84,11 @@ class AgentebbAsync:
             api_key=api_key,
             model="gpt-4o-mini",
             temperature=0.3,
-            max_tokens=10000
+            max_tokens=10000,
+            **openai_http_clients()
         )
         
-        self.embeddings = OpenAIEmbeddings(
-            api_key=api_key,
-            model=config.openai.embedding_model
-        )
+        self.embeddings = get_embedding_service(config.openai.embedding_model)
     
     async def processar_async(self, pergunta: str, user_profile: dict) -> str:
         """Processa pergunta de forma ASSÍNCRONA"""
@@ -94,14 +96,8 @@ class AgentebbAsync:
             if self.config.debug:
                 print(f"🔄 [{self.config.name}] Processando pergunta (ASYNC): '{pergunta[:50]}...'")
             
-            # Conectar ao banco de forma assíncrona
-            await self.dal_async.connect()
-            
             # Gerar embedding da pergunta
-            query_embedding = await asyncio.to_thread(
-                self.embeddings.embed_query,
-                pergunta
-            )
+            query_embedding = await self.embeddings.aembed_query(pergunta)
             
             # Buscar contexto relevante de forma assíncrona
             search_result = await self.dal_async.search_vectors_async(
@@ -132,12 +128,7 @@ class AgentebbAsync:
             if self.config.debug:
                 print(f"🤖 [{self.config.name}] Gerando resposta com LLM (ASYNC)...")
             
-            resposta = await asyncio.to_thread(
-                self.llm.invoke,
-                prompt_final
-            )
-            
-            resposta_texto = resposta.content if hasattr(resposta, 'content') else str(resposta)
+            resposta_texto = await gerar_resposta_llm(self.llm, prompt_final, self.config.name)
             
             # Armazenar na memória
             self._adicionar_memoria(usuario_id, pergunta, resposta_texto)
@@ -151,9 +142,6 @@ class AgentebbAsync:
             error_msg = f"❌ Erro ao processar pergunta (Agente {self.config.name}): {str(e)}"
             print(error_msg)
             return "Desculpe, encontrei um erro ao processar sua pergunta sobre bbb. Por favor, tente novamente."
-        
-        finally:
-            await self.dal_async.disconnect()
     
     def processar_pergunta(self, pergunta: str, user_profile: dict) -> str:
         """Wrapper síncrono para compatibilidade com sistema hierárquico"""
@@ -179,10 +167,7 @@ class AgentebbAsync:
     
     def _preparar_historico(self, usuario_id: str) -> str:
         """Prepara o histórico de conversas do usuário"""
-        if usuario_id not in self.memoria_conversas:
-            return ""
-        
-        historico = self.memoria_conversas[usuario_id]
+        historico = self.memoria_conversas.get(usuario_id)
         if not historico:
             return ""
         
@@ -201,14 +186,10 @@ class AgentebbAsync:
     
     def _adicionar_memoria(self, usuario_id: str, pergunta: str, resposta: str):
         """Adiciona interação à memória de conversas"""
-        if usuario_id not in self.memoria_conversas:
-            self.memoria_conversas[usuario_id] = []
-        
-        self.memoria_conversas[usuario_id].append((pergunta, resposta))
+        historico = self.memoria_conversas.get(usuario_id, []) + [(pergunta, resposta)]
         
-        # Manter apenas últimas 10 interações por usuário
-        if len(self.memoria_conversas[usuario_id]) > 10:
-            self.memoria_conversas[usuario_id] = self.memoria_conversas[usuario_id][-10:]
+        # Manter apenas últimas 10 interações por usuário (reatribuir renova o TTL no store)
+        self.memoria_conversas[usuario_id] = historico[-10:]
 
 
 def criar_agente_bb_async(*, debug: bool = False) -> AgentebbAsync:
@@ -8,8 +8,12 @@ import asyncio
 
 from subagents.base_subagent import SubagentConfig
 from dal.postgres_dal_async import PostgresDALAsync
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
 from core.config import config
+from core.embedding_cache import get_embedding_service
+from core.llm_clients import openai_http_clients
+from core.state_store import BoundedStateStore
+from core.streaming import gerar_resposta_llm
 
 PROMPT_TEMPLATE = dedent(
     """
@@ -94,7 +98,7 @@ class AgenteGovernanceAsync:
         self.dal_async = PostgresDALAsync()
         self.llm = None
         self.embeddings = None
-        self.memoria_conversas = {}
+        self.memoria_conversas = BoundedStateStore("memoria_conversas:governance")
         
         # Inicializar LLM e embeddings
         self._inicializar_llm()
@@ -107,13 +111,11 @@ class AgenteGovernanceAsync:
             api_key=api_key,
             model=config.openai.chat_model,
             temperature=0.3,
-            max_tokens=10000
+            max_tokens=10000,
+            **openai_http_clients()
         )
         
-        self.embeddings = OpenAIEmbeddings(
-            api_key=api_key,
-            model=config.openai.embedding_model
-        )
+        self.embeddings = get_embedding_service(config.openai.embedding_model)
     
     async def processar_async(self, pergunta: str, user_profile: dict) -> str:
         """Processa pergunta de forma ASSÍNCRONA"""
@@ -121,14 +123,8 @@ class AgenteGovernanceAsync:
             if self.config.debug:
                 print(f"🔄 [{self.config.name}] Processando pergunta (ASYNC): '{pergunta[:50]}...'")
             
-            # Conectar ao banco de forma assíncrona
-            await self.dal_async.connect()
-            
             # Gerar embedding da pergunta
-            query_embedding = await asyncio.to_thread(
-                self.embeddings.embed_query,
-                pergunta
-            )
+            query_embedding = await self.embeddings.aembed_query(pergunta)
             
             # Buscar contexto relevante de forma assíncrona
             search_result = await self.dal_async.search_vectors_async(
@@ -159,12 +155,7 @@ class AgenteGovernanceAsync:
             if self.config.debug:
                 print(f"🤖 [{self.config.name}] Gerando resposta com LLM (ASYNC)...")
             
-            resposta = await asyncio.to_thread(
-                self.llm.invoke,
-                prompt_final
-            )
-            
-            resposta_texto = resposta.content if hasattr(resposta, 'content') else str(resposta)
+            resposta_texto = await gerar_resposta_llm(self.llm, prompt_final, self.config.name)
             
             # Armazenar na memória
             self._adicionar_memoria(usuario_id, pergunta, resposta_texto)
@@ -194,9 +185,6 @@ class AgenteGovernanceAsync:
                 )
             
             return "Desculpe, encontrei um erro ao processar sua pergunta sobre governança. Por favor, tente novamente."
-        
-        finally:
-            await self.dal_async.disconnect()
     
     def _preparar_contexto(self, documents: list) -> str:
         """Prepara o contexto a partir dos documentos recuperados"""
@@ -253,10 +241,7 @@ class AgenteGovernanceAsync:
     
     def _preparar_historico(self, usuario_id: str) -> str:
         """Prepara o histórico de conversas do usuário"""
-        if usuario_id not in self.memoria_conversas:
-            return ""
-        
-        historico = self.memoria_conversas[usuario_id]
+        historico = self.memoria_conversas.get(usuario_id)
         if not historico:
             return ""
         
@@ -275,36 +260,25 @@ class AgenteGovernanceAsync:
     
     def _adicionar_memoria(self, usuario_id: str, pergunta: str, resposta: str):
         """Adiciona interação à memória de conversas"""
-        if usuario_id not in self.memoria_conversas:
-            self.memoria_conversas[usuario_id] = []
+        historico = self.memoria_conversas.get(usuario_id, []) + [(pergunta, resposta)]
         
-        self.memoria_conversas[usuario_id].append((pergunta, resposta))
-        
-        # Manter apenas últimas 10 interações por usuário
-        if len(self.memoria_conversas[usuario_id]) > 10:
-            self.memoria_conversas[usuario_id] = self.memoria_conversas[usuario_id][-10:]
+        # Manter apenas últimas 10 interações por usuário (reatribuir renova o TTL no store)
+        self.memoria_conversas[usuario_id] = historico[-10:]
 
     def processar_pergunta(self, pergunta: str, user_profile: dict) -> str:
-        """Método síncrono de compatibilidade para o sistema hierárquico"""
-        import asyncio
+        """Wrapper síncrono para compatibilidade (dentro de um event loop, use `processar_async`)"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # Erro do chamador, não da pergunta: não mascarar como resposta genérica
+            raise RuntimeError(
+                f"{type(self).__name__}.processar_pergunta chamado dentro de um event loop em execução; "
+                "use `await processar_async(...)`"
+            )
         try:
-            # Criar e executar loop de eventos se necessário
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    # Já existe um loop rodando, criar uma nova tarefa
-                    import concurrent.futures
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(
-                            asyncio.run,
-                            self.processar_async(pergunta, user_profile)
-                        )
-                        return future.result()
-                else:
-                    return loop.run_until_complete(self.processar_async(pergunta, user_profile))
-            except RuntimeError:
-                # Não há loop de eventos, criar um novo
-                return asyncio.run(self.processar_async(pergunta, user_profile))
+            return asyncio.run(self.processar_async(pergunta, user_profile))
         except Exception as e:
             print(f"❌ Erro no método de compatibilidade: {e}")
             return "Desculpe, encontrei um erro ao processar sua pergunta sobre governança. Por favor, tente novamente."
@@ -1,32 +1,46 @@
 """
 API Endpoint para Ingestão de Conhecimento
 Baseado em ingest_data/ingest_data.py
+
+O upload é gravado em disco e processado em segundo plano pela fila de jobs
+(core.ingestion_jobs): o endpoint responde imediatamente com o id do job e o
+progresso é consultado em GET /api/knowledge/ingest/{job_id}.
+
+Cada chunk é gravado com documento_id, versão e hash do conteúdo. Sem o
+metadado `documento_id` o upload é um documento novo (id = id do job, devolvido
+no resultado); reenviado com esse id, os chunks inalterados mantêm o vetor, só
+os novos/alterados são embedados e os que saíram do documento são removidos na
+mesma transação. Linhas anteriores ao versionamento só são substituídas quando
+o `documento_id` informado é o nome do arquivo original (fonte_documento).
 """
 
+import asyncio
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
-from typing import List
+from typing import Callable, List, Optional
 import os
 import json
-import traceback
-import tempfile
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
 from dotenv import load_dotenv
 
+from core.config import config
+from core.embedding_scheduler import EmbeddingBatchScheduler
+from core.ingestion_jobs import IngestionJob, IngestionJobError, IngestionJobQueue, JobContext
+from dal.base_dal import quote_identifier
+from dal.bulk_loader import StreamingCopyLoader
+from dal.postgres_dal_async import PostgresDALAsync, close_shared_pools
+
 # Imports de processamento
 import pypdf
 import docx
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from openai import OpenAI
-import psycopg2
-import psycopg2.extras
 
-# OCR opcional
-try:
-    import pytesseract
-    import pdf2image
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+# OCR paralelo por página (opcional: pytesseract + pdf2image)
+from core.pdf_ocr import OCR_AVAILABLE, contar_paginas, extrair_paginas_pdf, ocr_paginas
 
 router = APIRouter()
 
@@ -42,7 +56,6 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 150
 EMBEDDING_MODEL = "text-embedding-3-small"
-EMBEDDING_BATCH_SIZE = 100
 
 # Cliente OpenAI
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
@@ -63,96 +76,17 @@ def extrair_texto_pdf(caminho_arquivo: str) -> str:
 
 
 def extrair_texto_pdf_com_ocr(caminho_arquivo: str) -> str:
-    """Extrai texto usando OCR quando PDF é baseado em imagens"""
-    import os
-    import sys
-    from pathlib import Path
-    
+    """Extrai texto usando OCR quando PDF é baseado em imagens (todas as páginas)"""
     if not OCR_AVAILABLE:
         erro_msg = "❌ OCR não disponível - pytesseract ou pdf2image não importado"
         print(erro_msg)
         return f"Erro: {erro_msg}"
     
     try:
-        # Debug: verificar configuração do Tesseract
-        print(f"\n🔍 === DIAGNÓSTICO OCR ===")
-        
-        # Detectar se está rodando como executável PyInstaller
-        if getattr(sys, 'frozen', False):
-            base_path = Path(sys._MEIPASS)
-            tesseract_exe = base_path / "tesseract" / "tesseract.exe"
-            tessdata_dir = base_path / "tesseract" / "tessdata"
-            
-            print(f"📁 Base path: {base_path}")
-            print(f"📄 Tesseract.exe: {tesseract_exe}")
-            print(f"   Existe: {tesseract_exe.exists()}")
-            print(f"📁 Tessdata: {tessdata_dir}")
-            print(f"   Existe: {tessdata_dir.exists()}")
-            
-            if tessdata_dir.exists():
-                tessdata_files = list(tessdata_dir.glob("*.traineddata"))
-                print(f"   Idiomas: {[f.stem for f in tessdata_files]}")
-            
-            if tesseract_exe.exists():
-                pytesseract.pytesseract.tesseract_cmd = str(tesseract_exe)
-                # Configurar TESSDATA_PREFIX para apontar PARA A PASTA TESSDATA
-                # Tesseract procura os arquivos .traineddata diretamente em $TESSDATA_PREFIX/
-                os.environ['TESSDATA_PREFIX'] = str(tessdata_dir)
-                print(f"✅ Tesseract configurado!")
-                print(f"   TESSDATA_PREFIX: {os.environ.get('TESSDATA_PREFIX')}")
-            else:
-                erro_msg = f"❌ Tesseract não encontrado em: {tesseract_exe}"
-                print(erro_msg)
-                return f"Erro: {erro_msg}"
-        else:
-            print(f"ℹ️ Rodando em modo desenvolvimento")
-            print(f"📄 Tesseract cmd: {pytesseract.pytesseract.tesseract_cmd}")
-        
-        # Converter PDF para imagens (requer Poppler)
-        print(f"\n📄 Convertendo PDF para imagens (usando Poppler)...")
-        
-        # Configurar Poppler se rodando como executável
-        poppler_path = None
-        if getattr(sys, 'frozen', False):
-            base_path = Path(sys._MEIPASS)
-            poppler_bin = base_path / "poppler" / "Library" / "bin"
-            if poppler_bin.exists():
-                poppler_path = str(poppler_bin)
-                print(f"✅ Poppler encontrado: {poppler_path}")
-            else:
-                print(f"⚠️ Poppler não encontrado em: {poppler_bin}")
-        
-        try:
-            images = pdf2image.convert_from_path(
-                caminho_arquivo, 
-                dpi=300,
-                poppler_path=poppler_path
-            )
-            print(f"✅ {len(images)} páginas convertidas")
-        except Exception as poppler_error:
-            erro_msg = f"Erro ao converter PDF - Poppler não disponível ou não configurado: {poppler_error}"
-            print(f"❌ {erro_msg}")
-            print(f"💡 Solução: Baixe o Poppler de https://github.com/oschwartz10612/poppler-windows/releases/")
-            print(f"   e coloque em hooks/poppler/ antes de buildar")
-            return f"Erro: {erro_msg}"
-        
-        texto_total = []
-        
-        for i, image in enumerate(images):
-            print(f"   🔍 Processando página {i+1}/{len(images)}...")
-            texto_pagina = pytesseract.image_to_string(image, lang='por+eng')
-            if texto_pagina.strip():
-                texto_total.append(texto_pagina.strip())
-                print(f"      ✅ {len(texto_pagina)} caracteres extraídos")
-        
-        resultado = "\n\n".join(texto_total)
-        print(f"✅ OCR concluído: {len(resultado)} caracteres totais")
-        return resultado
-        
+        paginas = ocr_paginas(caminho_arquivo, list(range(contar_paginas(caminho_arquivo))))
+        return "\n\n".join(paginas[i].strip() for i in sorted(paginas) if paginas[i].strip())
     except Exception as e:
         print(f"❌ ERRO NO OCR: {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
         return f"Erro no OCR: {e}"
 
 
@@ -191,199 +125,430 @@ def dividir_em_chunks(texto: str) -> List[str]:
     return text_splitter.split_text(texto)
 
 
-def gerar_embeddings_em_lote(chunks: List[str]) -> List[list]:
-    """Gera embeddings para uma lista de chunks"""
-    vetores = []
+def _criar_embeddings(textos: List[str]) -> List[list]:
+    """Uma requisição de embeddings (as retentativas ficam com o agendador)."""
+    response = openai_client.with_options(max_retries=0).embeddings.create(
+        input=textos,
+        model=EMBEDDING_MODEL
+    )
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+# Agendador compartilhado pelos jobs do processo (orçamentos TPM/RPM e lotes em voo)
+embedding_scheduler = EmbeddingBatchScheduler(_criar_embeddings)
+
+
+def gerar_embeddings_em_lote(
+    chunks: List[str],
+    progresso: Optional[Callable[[int, int], None]] = None,
+    ao_concluir_lote: Optional[Callable[[List[int], List[list]], None]] = None
+) -> List[list]:
+    """Gera embeddings para uma lista de chunks
     
-    for i in range(0, len(chunks), EMBEDDING_BATCH_SIZE):
-        lote = chunks[i:i + EMBEDDING_BATCH_SIZE]
-        
-        try:
-            # Garantir que não há textos vazios
-            lote_processado = [text if text.strip() else " " for text in lote]
-            
-            response = openai_client.embeddings.create(
-                input=lote_processado,
-                model=EMBEDDING_MODEL
-            )
-            
-            vetores.extend([item.embedding for item in response.data])
-        except Exception as e:
-            print(f"Erro no lote {i//EMBEDDING_BATCH_SIZE + 1}: {e}")
-            # Adicionar None para chunks com erro
-            vetores.extend([None] * len(lote))
+    Os lotes são enviados em paralelo pelo agendador, dentro das cotas de
+    tokens/requisições por minuto e com retentativa por chunk; só ficam
+    `None` os chunks que esgotaram as tentativas.
+    
+    Args:
+        chunks: Textos a embedar
+        progresso: Callback (chunks processados, total) chamado a cada lote
+        ao_concluir_lote: Callback (índices, vetores) com cada lote pronto
+    """
+    return embedding_scheduler.embed(chunks, progresso=progresso, ao_concluir_lote=ao_concluir_lote)
+
+
+COLUNAS_GOVERNANCA = (
+    'fonte_documento', 'dado_sensivel', 'apenas_para_si',
+    'areas_liberadas', 'nivel_hierarquico_minimo', 'geografias_liberadas',
+    'projetos_liberados', 'idioma', 'data_validade', 'responsavel', 'aprovador'
+)
+
+# Versionamento por documento: chunks inalterados mantêm o vetor na reingestão
+COLUNAS_VERSIONAMENTO = {
+    'documento_id': 'TEXT',
+    'documento_versao': 'INTEGER',
+    'hash_conteudo': 'TEXT'
+}
+
+COLUNAS_CONHECIMENTO = (
+    'conteudo_original', *COLUNAS_GOVERNANCA, 'vetor', *COLUNAS_VERSIONAMENTO
+)
+
+# Hash de linhas gravadas antes do versionamento (mesmo algoritmo de hash_chunk)
+SQL_HASH_LEGADO = "encode(sha256(convert_to(conteudo_original, 'UTF8')), 'hex')"
+
+
+def hash_chunk(chunk: str) -> str:
+    """Hash do conteúdo do chunk (SHA-256 do texto gravado)."""
+    return hashlib.sha256(chunk.encode('utf-8')).hexdigest()
+
+
+def metadados_governanca(metadados: dict) -> tuple:
+    """Colunas de governança (iguais para todos os chunks) já nos tipos do COPY binário."""
+    data_validade = metadados.get('data_validade')
+    if isinstance(data_validade, str):
+        data_validade = date.fromisoformat(data_validade[:10]) if data_validade else None
+    
+    return (
+        metadados['fonte_documento'],
+        bool(metadados['dado_sensivel']),
+        bool(metadados['apenas_para_si']),
+        list(metadados['areas_liberadas'] or []),
+        int(metadados['nivel_hierarquico_minimo']),
+        list(metadados['geografias_liberadas'] or []),
+        list(metadados['projetos_liberados'] or []),
+        metadados['idioma'],
+        data_validade,
+        metadados['responsavel'],
+        metadados['aprovador']
+    )
+
+
+@dataclass
+class PlanoReingestao:
+    """Diferença entre os chunks do upload e os já gravados para o documento."""
+    versao: int
+    novos: List[int]        # índices dos chunks a embedar e inserir
+    mantidos: int           # linhas existentes reaproveitadas (sem novo embedding)
+    removidos: int          # linhas de chunks que saíram do documento
+
+
+async def garantir_colunas_versionamento(tabela: str) -> None:
+    """
+    Adiciona as colunas de versionamento em tabelas criadas antes delas.
+    
+    Roda em transação própria e curta, antes do COPY: o ALTER TABLE pega um
+    lock exclusivo que, dentro da transação da carga, bloquearia as buscas
+    vetoriais na tabela durante toda a etapa de embeddings.
+    """
+    async with PostgresDALAsync(DATABASE_URL).acquire() as conn:
+        await _garantir_colunas_versionamento(conn, tabela)
+
+
+async def _garantir_colunas_versionamento(conn, tabela: str) -> None:
+    linhas = await conn.fetch(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = $1",
+        tabela
+    )
+    existentes = {linha['column_name'] for linha in linhas}
+    if not existentes:
+        raise IngestionJobError(f"Tabela '{tabela}' não encontrada")
+    
+    faltando = [coluna for coluna in COLUNAS_VERSIONAMENTO if coluna not in existentes]
+    if not faltando:
+        return
     
-    return vetores
+    tabela_sql = quote_identifier(tabela)
+    print(f"   → Adicionando colunas de versionamento em {tabela}: {faltando}")
+    async with conn.transaction():
+        # Não enfileirar atrás de consultas longas segurando as buscas
+        await conn.execute("SET LOCAL lock_timeout = '5s'")
+        await conn.execute(
+            f"ALTER TABLE {tabela_sql} " + ", ".join(
+                f"ADD COLUMN IF NOT EXISTS {coluna} {COLUNAS_VERSIONAMENTO[coluna]}" for coluna in faltando
+            )
+        )
+    # Índice fora da transação do ALTER (CREATE INDEX não bloqueia leituras)
+    await conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {quote_identifier(f'idx_{tabela}_documento')} "
+        f"ON {tabela_sql} (documento_id, hash_conteudo)"
+    )
 
 
-def inserir_chunks_no_db(
+async def planejar_reingestao(
+    conn,
     tabela: str,
-    chunks: List[str],
-    vetores: List[list],
-    metadados: dict
-) -> int:
-    """Insere chunks no banco de dados"""
-    conn = psycopg2.connect(DATABASE_URL)
-    
-    sql = f"""
-        INSERT INTO "{tabela}" (
-            conteudo_original, fonte_documento, dado_sensivel, apenas_para_si,
-            areas_liberadas, nivel_hierarquico_minimo, geografias_liberadas,
-            projetos_liberados, idioma, data_validade, responsavel, aprovador, vetor
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+    documento_id: str,
+    hashes: List[str],
+    governanca: tuple
+) -> PlanoReingestao:
+    """
+    Compara os chunks do upload com as linhas do documento (na transação do COPY).
+    
+    Linhas com o mesmo hash são mantidas (com metadados e versão atualizados),
+    linhas de chunks que não existem mais são removidas e só os chunks novos
+    ou alterados ficam para embedar.
     """
+    tabela_sql = quote_identifier(tabela)
     
-    dados_para_inserir = []
-    
-    for chunk, vetor in zip(chunks, vetores):
-        if vetor is not None:
-            dados_para_inserir.append((
-                chunk,
-                metadados['fonte_documento'],
-                metadados['dado_sensivel'],
-                metadados['apenas_para_si'],
-                metadados['areas_liberadas'],
-                metadados['nivel_hierarquico_minimo'],
-                metadados['geografias_liberadas'],
-                metadados['projetos_liberados'],
-                metadados['idioma'],
-                metadados['data_validade'],
-                metadados['responsavel'],
-                metadados['aprovador'],
-                vetor
-            ))
-    
-    if not dados_para_inserir:
-        conn.close()
-        return 0
+    # Serializar reingestões simultâneas do mesmo documento
+    await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", f"{tabela}:{documento_id}")
     
+    # Linhas anteriores ao versionamento só entram quando o id informado é o
+    # nome do arquivo original (nunca pelo nome do arquivo do upload atual)
+    existentes = await conn.fetch(
+        f"""
+        SELECT id, COALESCE(hash_conteudo, {SQL_HASH_LEGADO}) AS hash, documento_versao
+        FROM {tabela_sql}
+        WHERE documento_id = $1 OR (documento_id IS NULL AND fonte_documento = $1)
+        """,
+        documento_id
+    )
+    
+    disponiveis = defaultdict(list)
+    for linha in existentes:
+        disponiveis[linha['hash']].append(linha['id'])
+    
+    mantidos, novos = [], []
+    for i, hash_atual in enumerate(hashes):
+        if disponiveis[hash_atual]:
+            mantidos.append(disponiveis[hash_atual].pop())
+        else:
+            novos.append(i)
+    removidos = [id_linha for ids in disponiveis.values() for id_linha in ids]
+    
+    versao = max((linha['documento_versao'] or 0 for linha in existentes), default=0) + 1
+    
+    if removidos:
+        await conn.execute(f"DELETE FROM {tabela_sql} WHERE id = ANY($1)", removidos)
+    
+    if mantidos:
+        atribuicoes = ", ".join(f"{coluna} = ${i + 2}" for i, coluna in enumerate(COLUNAS_GOVERNANCA))
+        n = len(COLUNAS_GOVERNANCA) + 2
+        await conn.execute(
+            f"""
+            UPDATE {tabela_sql}
+            SET {atribuicoes},
+                documento_id = ${n},
+                documento_versao = ${n + 1},
+                hash_conteudo = COALESCE(hash_conteudo, {SQL_HASH_LEGADO})
+            WHERE id = ANY($1)
+            """,
+            mantidos, *governanca, documento_id, versao
+        )
+    
+    return PlanoReingestao(versao=versao, novos=novos, mantidos=len(mantidos), removidos=len(removidos))
+
+
+def executar_no_loop(corrotina, loop=None):
+    """Executa uma corrotina de banco a partir da thread do job e aguarda o resultado."""
+    if loop is not None:
+        return asyncio.run_coroutine_threadsafe(corrotina, loop).result()
+    
+    async def _loop_proprio():
+        try:
+            return await corrotina
+        finally:
+            # Pool criado neste loop temporário não sobrevive a ele
+            await close_shared_pools()
+    
+    return asyncio.run(_loop_proprio())
+
+
+def criar_loader_chunks(tabela: str, loop=None, prepare=None) -> StreamingCopyLoader:
+    """COPY binário em streaming para a tabela de conhecimento (uma transação)."""
+    return StreamingCopyLoader(
+        PostgresDALAsync(DATABASE_URL), tabela, COLUNAS_CONHECIMENTO, loop=loop, prepare=prepare
+    )
+
+
+# =============================================================================
+# PIPELINE DE INGESTÃO (executado pela fila de jobs, fora do event loop)
+# =============================================================================
+
+FORMATOS_SUPORTADOS = ('.pdf', '.docx')
+
+
+def extrair_texto_pdf_por_pagina(caminho_arquivo: str, ctx: JobContext) -> str:
+    """Camada de texto do pypdf e OCR paralelo só nas páginas sem texto."""
     try:
-        with conn.cursor() as cur:
-            psycopg2.extras.execute_batch(cur, sql, dados_para_inserir)
-        conn.commit()
-        count = len(dados_para_inserir)
+        paginas = ctx.run_in_process(extrair_paginas_pdf, caminho_arquivo)
     except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+        print(f"   ⚠️ pypdf não conseguiu ler o PDF ({e}), usando OCR em todas as páginas...")
+        if not OCR_AVAILABLE:
+            raise IngestionJobError(f"Erro ao ler PDF: {e}")
+        try:
+            paginas = [""] * contar_paginas(caminho_arquivo)
+        except Exception as erro_poppler:
+            raise IngestionJobError(f"Erro ao ler PDF: {e} / {erro_poppler}")
+    
+    sem_texto = [
+        i for i, texto in enumerate(paginas)
+        if len(texto.strip()) < config.ingestion.ocr_min_page_chars
+    ]
     
-    return count
+    if sem_texto and OCR_AVAILABLE:
+        print(f"   → OCR em {len(sem_texto)}/{len(paginas)} página(s) sem camada de texto...")
+        reconhecidas = ocr_paginas(
+            caminho_arquivo,
+            sem_texto,
+            progresso=lambda feitas, total: ctx.progress(
+                "ocr", 0.05 + 0.25 * feitas / total, f"OCR {feitas}/{total} páginas"
+            )
+        )
+        for i, texto in reconhecidas.items():
+            if len(texto.strip()) > len(paginas[i].strip()):
+                paginas[i] = texto
+    elif sem_texto:
+        print(f"   ⚠️ {len(sem_texto)} página(s) sem texto e OCR não disponível")
+    
+    return "\n\n".join(texto.strip() for texto in paginas if texto.strip())
+
+
+def processar_job_ingestao(job: IngestionJob, ctx: JobContext) -> dict:
+    """Extração, chunking, embeddings e gravação de um arquivo enviado."""
+    print(f"\n📄 Processando arquivo: {job.filename}")
+    ctx.progress("extracting", 0.05, "Extraindo texto")
+    if job.filename.lower().endswith('.pdf'):
+        texto = extrair_texto_pdf_por_pagina(job.file_path, ctx)
+    else:
+        texto = ctx.run_in_process(extrair_texto_docx, job.file_path)
+    
+    # Verificar se há erros explícitos
+    if texto.startswith("Erro"):
+        print(f"   ❌ Erro na extração: {texto}")
+        raise IngestionJobError(f"Erro ao processar arquivo: {texto}")
+    
+    if not texto.strip():
+        print("   ❌ Nenhum texto extraído")
+        raise IngestionJobError("Não foi possível extrair texto do arquivo")
+    
+    print(f"   ✅ Texto extraído: {len(texto)} caracteres")
+    
+    # Limpar texto
+    texto_limpo = "\n\n".join([
+        linha.strip()
+        for linha in texto.replace('\xa0', ' ').splitlines()
+        if linha.strip()
+    ])
+    
+    # Dividir em chunks
+    ctx.progress("chunking", 0.35, f"{len(texto_limpo)} caracteres extraídos")
+    chunks = dividir_em_chunks(texto_limpo)
+    
+    if not chunks:
+        raise IngestionJobError("Nenhum chunk gerado")
+    
+    try:
+        governanca = metadados_governanca(job.metadata)
+    except (KeyError, TypeError, ValueError) as e:
+        raise IngestionJobError(f"Metadados inválidos: {e}")
+    
+    # Reingestão incremental: comparar com as linhas já gravadas do documento
+    # (na mesma transação do COPY, que também remove os chunks que saíram).
+    # Só com id explícito: arquivos diferentes podem ter o mesmo nome
+    documento_id = str(job.metadata.get('documento_id') or '').strip() or job.job_id
+    hashes = [hash_chunk(chunk) for chunk in chunks]
+    ctx.progress("diffing", 0.38, f"{len(chunks)} chunks")
+    executar_no_loop(garantir_colunas_versionamento(job.target_table), ctx.loop)
+    loader = criar_loader_chunks(
+        job.target_table,
+        loop=ctx.loop,
+        prepare=lambda conn: planejar_reingestao(conn, job.target_table, documento_id, hashes, governanca)
+    ).start()
+    plano: PlanoReingestao = loader.prepared
+    print(
+        f"   ♻️ Documento '{documento_id}' v{plano.versao}: {plano.mantidos} chunk(s) mantido(s), "
+        f"{len(plano.novos)} novo(s)/alterado(s), {plano.removidos} removido(s)"
+    )
+    
+    # Chunks repetidos no documento são embedados uma única vez
+    ocorrencias = defaultdict(list)
+    for i in plano.novos:
+        ocorrencias[hashes[i]].append(i)
+    unicos = [indices[0] for indices in ocorrencias.values()]
+    
+    def gravar_lote(posicoes: List[int], lote: List[list]) -> None:
+        for posicao, vetor in zip(posicoes, lote):
+            for i in ocorrencias[hashes[unicos[posicao]]]:
+                loader.put((chunks[i], *governanca, vetor, documento_id, plano.versao, hashes[i]))
+    
+    # Gerar embeddings (0.40 -> 0.95 do progresso) gravando cada lote assim que
+    # fica pronto, via COPY binário
+    embeddings_count = 0
+    try:
+        if unicos:
+            ctx.progress("embedding", 0.40, f"{len(unicos)} chunks novos ou alterados")
+            vetores = gerar_embeddings_em_lote(
+                [chunks[i] for i in unicos],
+                progresso=lambda feitos, total: ctx.progress(
+                    "embedding", 0.40 + 0.55 * feitos / total, f"{feitos}/{total} embeddings"
+                ),
+                ao_concluir_lote=gravar_lote
+            )
+            
+            embeddings_count = sum(1 for vetor in vetores if vetor is not None)
+            if embeddings_count < len(unicos):
+                # Chunks alterados já foram removidos nesta transação: confirmar sem
+                # os substitutos perderia conteúdo. Desfazer tudo e tentar de novo pela fila
+                raise RuntimeError(
+                    f"Embeddings gerados para {embeddings_count}/{len(unicos)} chunks"
+                )
+    except BaseException as e:
+        loader.abort(e)
+        raise
+    
+    ctx.progress("inserting", 0.97, f"Confirmando versão {plano.versao} em {job.target_table}")
+    inserted = loader.finish()
+    
+    return {
+        "success": True,
+        "filename": job.filename,
+        "document_id": documento_id,
+        "document_version": plano.versao,
+        "text_length": len(texto_limpo),
+        "chunks_count": len(chunks),
+        "unchanged_count": plano.mantidos,
+        "deleted_count": plano.removidos,
+        "embeddings_count": embeddings_count,
+        "inserted_count": inserted
+    }
+
+
+# Fila durável de jobs (iniciada no lifespan do app_fastapi)
+ingestion_queue = IngestionJobQueue(handler=processar_job_ingestao)
 
 
 # =============================================================================
-# ENDPOINT
+# ENDPOINTS
 # =============================================================================
 
-@router.post("/api/knowledge/ingest")
+@router.post("/api/knowledge/ingest", status_code=202)
 async def ingest_knowledge(
     file: UploadFile = File(...),
     target_table: str = Form(...),
     metadata: str = Form(...)
 ):
     """
-    Endpoint para ingestão de conhecimento
+    Enfileira a ingestão de conhecimento e retorna o id do job
     
     Args:
         file: Arquivo PDF ou DOCX
         target_table: Tabela de destino no banco
         metadata: JSON com metadados de governança
     """
+    if not file.filename or not file.filename.lower().endswith(FORMATOS_SUPORTADOS):
+        raise HTTPException(status_code=400, detail="Formato não suportado")
     
     try:
-        # Parse metadata
         meta = json.loads(metadata)
-        
-        # Salvar arquivo temporariamente
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as tmp:
-            content = await file.read()
-            tmp.write(content)
-            tmp_path = tmp.name
-        
-        try:
-            # Extrair texto
-            print(f"\n📄 Processando arquivo: {file.filename}")
-            
-            if file.filename.lower().endswith('.pdf'):
-                print("   → Tentando extração normal de PDF...")
-                texto = extrair_texto_pdf(tmp_path)
-                
-                # Tentar OCR se necessário
-                if not texto or len(texto.strip()) < 50:
-                    print("   ⚠️ Pouco texto extraído, tentando OCR...")
-                    texto_ocr = extrair_texto_pdf_com_ocr(tmp_path)
-                    
-                    if texto_ocr and not texto_ocr.startswith("Erro"):
-                        texto = texto_ocr
-                        print("   ✅ OCR bem-sucedido!")
-                    else:
-                        print(f"   ❌ OCR falhou: {texto_ocr}")
-                    
-            elif file.filename.lower().endswith('.docx'):
-                print("   → Extraindo texto de DOCX...")
-                texto = extrair_texto_docx(tmp_path)
-            else:
-                raise HTTPException(status_code=400, detail="Formato não suportado")
-            
-            # Verificar se há erros explícitos
-            if texto.startswith("Erro"):
-                print(f"   ❌ Erro na extração: {texto}")
-                raise HTTPException(status_code=400, detail=f"Erro ao processar arquivo: {texto}")
-            
-            if not texto.strip():
-                print("   ❌ Nenhum texto extraído")
-                raise HTTPException(status_code=400, detail="Não foi possível extrair texto do arquivo")
-            
-            print(f"   ✅ Texto extraído: {len(texto)} caracteres")
-            
-            # Limpar texto
-            texto_limpo = "\n\n".join([
-                linha.strip()
-                for linha in texto.replace('\xa0', ' ').splitlines()
-                if linha.strip()
-            ])
-            
-            # Dividir em chunks
-            chunks = dividir_em_chunks(texto_limpo)
-            
-            if not chunks:
-                raise HTTPException(status_code=400, detail="Nenhum chunk gerado")
-            
-            # Gerar embeddings
-            vetores = gerar_embeddings_em_lote(chunks)
-            
-            # Filtrar chunks válidos
-            chunks_validos = [chunk for chunk, vetor in zip(chunks, vetores) if vetor is not None]
-            vetores_validos = [vetor for vetor in vetores if vetor is not None]
-            
-            if not vetores_validos:
-                raise HTTPException(status_code=500, detail="Nenhum embedding gerado")
-            
-            # Inserir no banco
-            inserted = inserir_chunks_no_db(
-                target_table,
-                chunks_validos,
-                vetores_validos,
-                meta
-            )
-            
-            return JSONResponse({
-                "success": True,
-                "filename": file.filename,
-                "text_length": len(texto_limpo),
-                "chunks_count": len(chunks),
-                "embeddings_count": len(vetores_validos),
-                "inserted_count": inserted
-            })
-            
-        finally:
-            # Limpar arquivo temporário
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Metadados inválidos: {e}")
     
-    except HTTPException:
-        raise
+    try:
+        job = await ingestion_queue.submit(file.file, file.filename, target_table, meta)
     except Exception as e:
-        print(f"Erro na ingestão: {e}")
-        print(traceback.format_exc())
+        print(f"Erro ao enfileirar ingestão: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return JSONResponse(status_code=202, content={
+        **job.to_dict(),
+        "status_url": f"/api/knowledge/ingest/{job.job_id}"
+    })
+
+
+@router.get("/api/knowledge/ingest")
+async def list_ingestion_jobs(limit: int = 50):
+    """Lista os jobs de ingestão mais recentes"""
+    jobs = await asyncio.to_thread(ingestion_queue.list_jobs, limit)
+    return {"jobs": [job.to_dict() for job in jobs]}
+
+
+@router.get("/api/knowledge/ingest/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """Status e progresso de um job de ingestão"""
+    job = await asyncio.to_thread(ingestion_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de ingestão não encontrado")
+    return job.to_dict()
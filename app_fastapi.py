@@ -11,7 +11,7 @@ import threading
 import time
 
 from fastapi import FastAPI, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
@@ -34,11 +34,17 @@ from core.config import config
 from agentes.neoson.neoson_async import criar_neoson_async
 
 # Importa o sistema de feedback
-from core.feedback_system import get_feedback_system
+from core.feedback_system import get_feedback_system, FeedbackQueueFullError
 
 # Importa o sistema de enriquecimento de respostas
 from core.enrichment_system import ResponseEnricher, create_faqs_table, save_faq
 
+# Importa o streaming de respostas (SSE / NDJSON)
+from core.streaming import FORMATOS_STREAM, StreamEvent, StreamSink
+
+# Métricas dos stores de estado por usuário (LRU + TTL)
+from core.state_store import get_state_store_stats
+
 # Importa Agent Factory
 from factory.agent_factory import create_subagent_from_config, create_coordinator_from_config
 from factory.agent_registry import get_registry
@@ -357,8 +363,10 @@ async def lifespan(app: FastAPI):
         from core.config import config as app_config
         feedback_system = get_feedback_system(
             db_url=app_config.database.main_url,
-            use_redis=False  # Redis opcional, desabilitado por padrão
+            use_redis=bool(app_config.cache.redis_url),  # Redis opcional (REDIS_URL)
+            redis_url=app_config.cache.redis_url
         )
+        await feedback_system.start()
         logger.info("✅ Sistema de Feedback inicializado com sucesso!")
     except Exception as e:
         logger.warning(f"⚠️ Sistema de Feedback não disponível: {e}")
@@ -383,6 +391,13 @@ async def lifespan(app: FastAPI):
         logger.warning(f"⚠️ Sistema de Enriquecimento não disponível: {e}")
         response_enricher = None
     
+    # Iniciar workers da fila de ingestão de conhecimento (jobs retomados após restart)
+    try:
+        from api_knowledge import ingestion_queue
+        ingestion_queue.start()
+    except Exception as e:
+        logger.warning(f"⚠️ Fila de ingestão não disponível: {e}")
+    
     yield
     
     # Shutdown
@@ -390,6 +405,33 @@ async def lifespan(app: FastAPI):
     if neoson_sistema:
         # Cleanup se necessário
         pass
+    
+    # Parar workers de ingestão (jobs em andamento voltam à fila quando o lease expirar)
+    try:
+        from api_knowledge import ingestion_queue
+        await asyncio.to_thread(ingestion_queue.stop)
+        from core.pdf_ocr import close_ocr_pool
+        close_ocr_pool()
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao parar fila de ingestão: {e}")
+    
+    # Gravar feedbacks pendentes na fila antes de fechar os pools
+    if feedback_system:
+        await feedback_system.close()
+    
+    # Fechar pools asyncpg compartilhados
+    try:
+        from dal.postgres_dal_async import close_shared_pools
+        await close_shared_pools()
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao fechar pools de conexão: {e}")
+    
+    # Fechar clientes HTTP compartilhados de LLM/embeddings
+    try:
+        from core.llm_clients import close_llm_http_clients
+        await close_llm_http_clients()
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao fechar clientes HTTP de LLM: {e}")
     logger.info("👋 Sistema Neoson encerrado")
 
 
@@ -867,6 +909,143 @@ def _split_resposta(resposta_texto: str) -> Tuple[str, Optional[str]]:
     return resposta_texto, None
 
 
+def _selecionar_perfil_chat(request: ChatRequest) -> dict:
+    """Seleciona o perfil do usuário a partir da persona da requisição."""
+
+    if request.custom_persona:
+        perfil = request.custom_persona
+        nome = perfil.get('Nome', perfil.get('nome', 'Persona Customizada'))
+        cargo = perfil.get('Cargo', perfil.get('cargo', 'N/A'))
+        logger.info(f"🎭 Usando persona personalizada: {nome} - {cargo}")
+        return perfil
+    if request.persona_selecionada in PERFIS_TESTE:
+        return PERFIS_TESTE[request.persona_selecionada]
+    return list(PERFIS_TESTE.values())[0]
+
+
+async def _enriquecer_resposta(resultado: dict, resposta_principal: str, pergunta: str, perfil: dict) -> Optional[Dict]:
+    """Enriquece a resposta (documentos, FAQs, glossário...) e agenda o salvamento da FAQ."""
+
+    if not response_enricher:
+        return None
+
+    try:
+        logger.info("✨ Enriquecendo resposta com informações adicionais...")
+        
+        # Determinar base de conhecimento usada
+        base_conhecimento = None
+        if 'ti' in resultado.get('classificacao', '').lower():
+            if 'governance' in resultado.get('agente_usado', '').lower():
+                base_conhecimento = 'knowledge_IT_GOVERNANCE'
+            elif 'infra' in resultado.get('agente_usado', '').lower():
+                base_conhecimento = 'knowledge_IT_INFRA'
+        elif 'rh' in resultado.get('classificacao', '').lower():
+            base_conhecimento = 'knowledge_HR'
+        
+        # Enriquecer resposta
+        enriched_data = await response_enricher.enrich(
+            resposta_principal=resposta_principal,
+            pergunta=pergunta,
+            agente_usado=resultado['agente_usado'],
+            perfil_usuario=perfil,
+            base_conhecimento=base_conhecimento
+        )
+        
+        # Salvar FAQ para histórico (fire and forget)
+        try:
+            asyncio.create_task(
+                save_faq(
+                    db_pool=response_enricher.db_pool,
+                    embeddings=response_enricher.embeddings,
+                    pergunta=pergunta,
+                    resposta=resposta_principal,
+                    agente_usado=resultado['agente_usado']
+                )
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao salvar FAQ: {e}")
+        
+        logger.info(
+            f"✅ Resposta enriquecida com {len(enriched_data.get('documentos_relacionados', []))} docs, "
+            f"{len(enriched_data.get('faqs_similares', []))} FAQs, "
+            f"{len(enriched_data.get('proximas_sugestoes', []))} sugestões, "
+            f"{len(enriched_data.get('glossario', {}))} termos no glossário"
+        )
+        return enriched_data
+    
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao enriquecer resposta: {e}")
+        return None
+
+
+def _validar_formato_stream(formato: str) -> str:
+    """Valida o formato de streaming solicitado (sse ou ndjson)."""
+
+    formato = (formato or "sse").lower()
+    if formato not in FORMATOS_STREAM:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato de streaming inválido: {formato}. Use: {', '.join(FORMATOS_STREAM)}"
+        )
+    return formato
+
+
+def _streaming_response_neoson(mensagem: str, perfil: dict, formato: str) -> StreamingResponse:
+    """
+    Processa a pergunta no Neoson emitindo eventos incrementais.
+
+    Ordem dos eventos: routing → answer_start/token (geração do LLM) →
+    answer (resposta final validada) → enrichment → done.
+    Se a geração transmitida for descartada (candidato reprovado pela
+    hierarquia, bloqueio de controle de acesso), `answer_reset` indica ao
+    cliente que apague o texto parcial; outra geração pode começar em seguida.
+    `answer` traz o texto definitivo e substitui o acumulado dos tokens.
+    Em caso de falha é emitido `error` seguido de `done`.
+    """
+
+    async def gerar_eventos():
+        sink = StreamSink()
+        task = sink.run(neoson_sistema.processar_pergunta_async(mensagem, perfil))
+        try:
+            async for evento in sink.events(task):
+                yield evento.format(formato)
+
+            resultado = task.result()
+            if resultado['sucesso']:
+                resposta_principal, cadeia_raciocinio = _split_resposta(resultado['resposta'])
+                logger.info(f"✅ Resposta transmitida: {len(resposta_principal)} caracteres")
+                yield StreamEvent('answer', {
+                    'resposta': resposta_principal,
+                    'cadeia_raciocinio': cadeia_raciocinio,
+                    'agent_usado': resultado.get('agente_usado', 'Neoson'),
+                    'especialidade': resultado.get('especialidade', ''),
+                    'classificacao': resultado.get('classificacao', '')
+                }).format(formato)
+
+                enriched_data = await _enriquecer_resposta(resultado, resposta_principal, mensagem, perfil)
+                if enriched_data:
+                    yield StreamEvent('enrichment', enriched_data).format(formato)
+            else:
+                yield StreamEvent('error', {'detail': resultado['resposta']}).format(formato)
+
+            yield StreamEvent('done').format(formato)
+
+        except Exception as e:
+            logger.exception(f"❌ Erro no streaming do chat: {e}")
+            yield StreamEvent('error', {'detail': f"Erro ao processar mensagem: {str(e)}"}).format(formato)
+            yield StreamEvent('done').format(formato)
+        finally:
+            if not task.done():
+                # Cliente desconectou antes do fim do processamento
+                task.cancel()
+
+    return StreamingResponse(
+        gerar_eventos(),
+        media_type=FORMATOS_STREAM[formato],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 async def _process_direct_agent_request(agent_reference: str, request: ChatRequest, current_user: dict) -> ChatResponse:
     """Fluxo compartilhado para rotas diretas de agentes."""
 
@@ -1077,6 +1256,27 @@ async def api_chat(request: ChatRequest, current_user: dict = Depends(get_curren
         )
 
 
+@app.post("/api/chat/stream")
+async def api_chat_stream(
+    request: ChatRequest,
+    formato: str = "sse",
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Versão em streaming do /api/chat (Server-Sent Events ou NDJSON).
+
+    Emite o roteamento assim que conhecido, os tokens da resposta conforme
+    são gerados e o enriquecimento como evento final.
+    """
+    if neoson_sistema is None:
+        raise HTTPException(status_code=500, detail='Sistema Neoson não inicializado')
+
+    formato = _validar_formato_stream(formato)
+    perfil = _build_default_profile(current_user)
+    logger.info(f"💬 Chat (stream/{formato}) - Usuário: {current_user['username']}, Mensagem: '{request.mensagem[:50]}...'")
+    return _streaming_response_neoson(request.mensagem, perfil, formato)
+
+
 # ============================================================================
 # ROTAS PRINCIPAIS
 # ============================================================================
@@ -1144,15 +1344,7 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail='Sistema Neoson não inicializado')
 
     # Seleciona perfil baseado na persona
-    if request.custom_persona:
-        perfil = request.custom_persona
-        nome = perfil.get('Nome', perfil.get('nome', 'Persona Customizada'))
-        cargo = perfil.get('Cargo', perfil.get('cargo', 'N/A'))
-        logger.info(f"🎭 Usando persona personalizada: {nome} - {cargo}")
-    elif request.persona_selecionada in PERFIS_TESTE:
-        perfil = PERFIS_TESTE[request.persona_selecionada]
-    else:
-        perfil = list(PERFIS_TESTE.values())[0]
+    perfil = _selecionar_perfil_chat(request)
 
     # Processa a pergunta através do Neoson (ASSÍNCRONO)
     logger.info(f"🎯 App processando pergunta: '{request.mensagem[:50]}...'")
@@ -1179,54 +1371,7 @@ async def chat(request: ChatRequest):
             cadeia_raciocinio = None
         
         # NOVO: Enriquecer resposta com informações adicionais
-        enriched_data = None
-        if response_enricher:
-            try:
-                logger.info("✨ Enriquecendo resposta com informações adicionais...")
-                
-                # Determinar base de conhecimento usada
-                base_conhecimento = None
-                if 'ti' in resultado.get('classificacao', '').lower():
-                    if 'governance' in resultado.get('agente_usado', '').lower():
-                        base_conhecimento = 'knowledge_IT_GOVERNANCE'
-                    elif 'infra' in resultado.get('agente_usado', '').lower():
-                        base_conhecimento = 'knowledge_IT_INFRA'
-                elif 'rh' in resultado.get('classificacao', '').lower():
-                    base_conhecimento = 'knowledge_HR'
-                
-                # Enriquecer resposta
-                enriched_data = await response_enricher.enrich(
-                    resposta_principal=resposta_principal,
-                    pergunta=request.mensagem,
-                    agente_usado=resultado['agente_usado'],
-                    perfil_usuario=perfil,
-                    base_conhecimento=base_conhecimento
-                )
-                
-                # Salvar FAQ para histórico (fire and forget)
-                try:
-                    asyncio.create_task(
-                        save_faq(
-                            db_pool=response_enricher.db_pool,
-                            embeddings=response_enricher.embeddings,
-                            pergunta=request.mensagem,
-                            resposta=resposta_principal,
-                            agente_usado=resultado['agente_usado']
-                        )
-                    )
-                except Exception as e:
-                    logger.warning(f"⚠️ Erro ao salvar FAQ: {e}")
-                
-                logger.info(
-                    f"✅ Resposta enriquecida com {len(enriched_data.get('documentos_relacionados', []))} docs, "
-                    f"{len(enriched_data.get('faqs_similares', []))} FAQs, "
-                    f"{len(enriched_data.get('proximas_sugestoes', []))} sugestões, "
-                    f"{len(enriched_data.get('glossario', {}))} termos no glossário"
-                )
-            
-            except Exception as e:
-                logger.warning(f"⚠️ Erro ao enriquecer resposta: {e}")
-                enriched_data = None
+        enriched_data = await _enriquecer_resposta(resultado, resposta_principal, request.mensagem, perfil)
         
         # Montar resposta final
         response = ChatResponse(
@@ -1252,6 +1397,18 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=resultado['resposta'])
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, formato: str = "sse"):
+    """Versão em streaming do /chat (Server-Sent Events ou NDJSON)"""
+    if neoson_sistema is None:
+        raise HTTPException(status_code=500, detail='Sistema Neoson não inicializado')
+
+    formato = _validar_formato_stream(formato)
+    perfil = _selecionar_perfil_chat(request)
+    logger.info(f"🎯 App processando pergunta (stream/{formato}): '{request.mensagem[:50]}...'")
+    return _streaming_response_neoson(request.mensagem, perfil, formato)
+
+
 @app.post("/api/pergunta", response_model=PerguntaResponse)
 async def fazer_pergunta(request: PerguntaRequest):
     """Processa a pergunta do usuário através do sistema Neoson (API legada - ASSÍNCRONO)"""
@@ -1416,6 +1573,7 @@ async def metrics():
         return {
             "agentes_ativos": len([a for a in status['agentes'].values() if a['status'] == 'ativo']),
             "total_agentes": len(status['agentes']),
+            "state_stores": get_state_store_stats(),
             "sistema_status": "operational"
         }
     return {
@@ -1454,7 +1612,7 @@ async def submit_feedback(request: FeedbackSubmitRequest):
             f"para resposta {request.feedback_id[:8]}..."
         )
         
-        # Salvar no PostgreSQL (a função save_feedback gera o feedback_id internamente)
+        # Enfileirar para gravação em lote (a função save_feedback gera o feedback_id internamente)
         saved_feedback_id = await feedback_system.save_feedback(
             usuario_id=request.usuario_id,
             pergunta=request.pergunta,
@@ -1468,7 +1626,7 @@ async def submit_feedback(request: FeedbackSubmitRequest):
         if not saved_feedback_id:
             raise Exception("Falha ao salvar feedback no banco de dados")
         
-        logger.info(f"✅ Feedback {saved_feedback_id[:8]} salvo com sucesso!")
+        logger.info(f"✅ Feedback {saved_feedback_id[:8]} enfileirado para gravação!")
         
         return FeedbackSubmitResponse(
             status="success",
@@ -1476,6 +1634,9 @@ async def submit_feedback(request: FeedbackSubmitRequest):
             mensagem=f"Obrigado pelo seu feedback {'positivo' if request.rating == 5 else 'negativo'}!"
         )
     
+    except FeedbackQueueFullError as e:
+        logger.error(f"❌ Fila de feedback cheia: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Erro ao salvar feedback: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao salvar feedback: {str(e)}")
@@ -1681,10 +1842,10 @@ async def get_dashboard_analytics(
         
         query += " ORDER BY timestamp DESC"
         
-        # Executar query
-        import asyncpg
-        conn = await asyncpg.connect(config.database.main_url)
-        try:
+        # Executar query (conexão emprestada do pool compartilhado)
+        from dal.postgres_dal_async import get_shared_pool
+        pool = await get_shared_pool(config.database.main_url)
+        async with pool.acquire() as conn:
             feedbacks = await conn.fetch(query, *params)
             
             # Processar dados
@@ -1891,9 +2052,6 @@ async def get_dashboard_analytics(
                 "insights": insights
             }
             
-        finally:
-            await conn.close()
-            
     except Exception as e:
         logger.error(f"❌ Erro ao obter analytics: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao obter analytics: {str(e)}")
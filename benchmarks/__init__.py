@@ -0,0 +1,7 @@
+"""
+Benchmarks de carga ponta a ponta do Neoson.
+
+Backends de LLM/embeddings falsos e determinísticos (`fakes`), fixture de
+PostgreSQL+pgvector com tabelas sintéticas (`fixture`), driver de carga
+(`load`) e relatório de latência/throughput (`report`).
+"""
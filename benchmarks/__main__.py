@@ -0,0 +1,142 @@
+"""
+Benchmark de carga ponta a ponta do Neoson.
+
+Exemplos:
+    # In-process (ASGI), com PostgreSQL+pgvector descartável via docker
+    python -m benchmarks --docker --concurrency 16 --requests 200
+
+    # In-process contra um banco existente
+    python -m benchmarks --dsn postgresql://postgres:pw@localhost:5432/bench
+
+    # Contra um servidor já rodando (python -m benchmarks.server)
+    python -m benchmarks --url http://127.0.0.1:8001 --dsn postgresql://...
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from typing import List
+
+import httpx
+
+from benchmarks.fakes import COUNTERS, FakeBackendConfig
+from benchmarks.fixture import PgVectorFixture, start_docker_postgres, stop_docker_postgres
+from benchmarks.load import QUESTIONS, TARGETS, LoadDriver
+from benchmarks.report import TargetResult, format_table, write_json
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8, help="Requisições simultâneas")
+    parser.add_argument("--requests", type=int, default=100, help="Requisições por endpoint")
+    parser.add_argument("--targets", default="chat,api_chat,agent",
+                        help=f"Endpoints separados por vírgula ({', '.join(TARGETS)})")
+    parser.add_argument("--agent", default="governance", help="Agente usado em /api/agents/{agent_name}")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--token-latency-ms", type=float, default=5.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=40.0)
+    parser.add_argument("--dsn", default=os.getenv("BENCHMARK_DATABASE_URL"),
+                        help="PostgreSQL com pgvector (padrão: BENCHMARK_DATABASE_URL)")
+    parser.add_argument("--docker", action="store_true", help="Sobe pgvector/pgvector:pg16 via docker")
+    parser.add_argument("--seed-rows", type=int, default=200, help="Linhas sintéticas por tabela")
+    parser.add_argument("--skip-fixture", action="store_true", help="Não recria as tabelas de conhecimento")
+    parser.add_argument("--url", help="Servidor externo (modo HTTP); padrão: app in-process via ASGI")
+    parser.add_argument("--output", help="Arquivo JSON para gravar os resultados")
+    args = parser.parse_args(argv)
+
+    args.targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    invalidos = [t for t in args.targets if t not in TARGETS]
+    if invalidos:
+        parser.error(f"endpoints desconhecidos: {', '.join(invalidos)}")
+    if not args.dsn and not args.docker:
+        parser.error("informe --dsn (ou BENCHMARK_DATABASE_URL) ou use --docker")
+    return args
+
+
+async def _run_in_process(args: argparse.Namespace) -> List[TargetResult]:
+    """Executa o app no mesmo processo via ASGITransport (inclui o lifespan)."""
+    from benchmarks.server import build_app
+    from dal.postgres_dal_async import get_pool_stats
+
+    app = build_app(FakeBackendConfig(
+        chat_latency_ms=args.llm_latency_ms,
+        token_latency_ms=args.token_latency_ms,
+        embedding_latency_ms=args.embedding_latency_ms,
+    ))
+
+    async def counters():
+        return COUNTERS.snapshot()
+
+    async def reset():
+        COUNTERS.reset()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                     timeout=None) as client:
+            driver = LoadDriver(client, counters, reset, dsn=args.dsn, pool_stats=get_pool_stats)
+            return await driver.run(args.targets, args.requests, args.concurrency, args.agent)
+
+
+async def _run_external(args: argparse.Namespace) -> List[TargetResult]:
+    """Executa contra um servidor HTTP já em execução (benchmarks.server)."""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=None, limits=limits) as client:
+        async def counters():
+            response = await client.get("/_benchmark/counters")
+            response.raise_for_status()
+            dados = response.json()
+            dados.pop("pools", None)
+            return dados
+
+        async def reset():
+            (await client.post("/_benchmark/reset")).raise_for_status()
+
+        driver = LoadDriver(client, counters, reset, dsn=args.dsn)
+        return await driver.run(args.targets, args.requests, args.concurrency, args.agent)
+
+
+async def _main(args: argparse.Namespace) -> List[TargetResult]:
+    if not args.skip_fixture:
+        await PgVectorFixture(args.dsn).setup(QUESTIONS, seed_rows=args.seed_rows)
+    if args.url:
+        return await _run_external(args)
+    return await _run_in_process(args)
+
+
+def main(argv: List[str]) -> int:
+    args = _parse_args(argv)
+    usando_docker = args.docker and not args.dsn
+    if usando_docker:
+        args.dsn = start_docker_postgres()
+
+    # O app lê a configuração no import: precisa das variáveis antes de importá-lo
+    os.environ["DATABASE_URL"] = args.dsn
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-fake")
+
+    try:
+        resultados = asyncio.run(_main(args))
+    finally:
+        if usando_docker:
+            stop_docker_postgres()
+
+    print()
+    print(format_table(resultados))
+    if args.output:
+        write_json(resultados, args.output, metadata={
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "llm_latency_ms": args.llm_latency_ms,
+            "token_latency_ms": args.token_latency_ms,
+            "embedding_latency_ms": args.embedding_latency_ms,
+            "seed_rows": args.seed_rows,
+            "mode": "http" if args.url else "asgi",
+        })
+        print(f"\n💾 Resultados gravados em {args.output}")
+    return 0 if all(r.errors == 0 for r in resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,290 @@
+"""
+Backends falsos (determinísticos) de LLM e embeddings para benchmarks.
+
+Substituem `ChatOpenAI`, `OpenAIEmbeddings`, `AsyncOpenAI` e `OpenAI` com:
+- latência artificial configurável (média + jitter determinístico)
+- saídas determinísticas derivadas do hash da entrada
+- contadores de chamadas, para medir chamadas de LLM por requisição
+
+Use `install_fakes()` ANTES de importar `app_fastapi` (os módulos do Neoson
+fazem `from langchain_openai import ChatOpenAI` no import).
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+EMBEDDING_DIM = 1536
+
+# Agentes retornados pelo classificador falso (nomes técnicos do AgentClassifier)
+AGENTES_TI = ["governance", "infra", "dev", "enduser"]
+AGENTES_RH = ["benefits", "training", "relations"]
+
+
+@dataclass
+class FakeBackendConfig:
+    """Latências artificiais (em milissegundos) dos backends falsos."""
+    chat_latency_ms: float = 300.0
+    token_latency_ms: float = 5.0
+    embedding_latency_ms: float = 40.0
+    jitter_ratio: float = 0.2
+    answer_tokens: int = 80
+
+
+@dataclass
+class CallCounters:
+    """Contadores thread-safe de chamadas aos backends falsos."""
+    chat_calls: int = 0
+    completion_calls: int = 0
+    embedding_calls: int = 0
+    embedded_texts: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, campo: str, valor: int = 1) -> None:
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + valor)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.chat_calls = self.completion_calls = 0
+            self.embedding_calls = self.embedded_texts = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "chat_calls": self.chat_calls,
+                "completion_calls": self.completion_calls,
+                "embedding_calls": self.embedding_calls,
+                "embedded_texts": self.embedded_texts,
+                "llm_calls": self.chat_calls + self.completion_calls,
+            }
+
+
+BACKEND_CONFIG = FakeBackendConfig()
+COUNTERS = CallCounters()
+
+
+# ============================================================================
+# SAÍDAS DETERMINÍSTICAS
+# ============================================================================
+
+def _digest(texto: str) -> bytes:
+    return hashlib.sha256((texto or "").encode("utf-8")).digest()
+
+
+def _latencia(base_ms: float, chave: str) -> float:
+    """Latência em segundos com jitter determinístico (mesma entrada, mesma latência)."""
+    fator = (_digest(chave)[0] / 255.0) * 2 - 1  # [-1, 1]
+    return max(0.0, base_ms * (1 + BACKEND_CONFIG.jitter_ratio * fator)) / 1000.0
+
+
+def fake_embedding(texto: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Vetor unitário determinístico derivado do texto."""
+    semente = _digest(texto)
+    valores = []
+    bloco = semente
+    while len(valores) < dim:
+        bloco = hashlib.sha256(bloco).digest()
+        valores.extend((b - 127.5) / 127.5 for b in bloco)
+    valores = valores[:dim]
+    norma = math.sqrt(sum(v * v for v in valores)) or 1.0
+    return [v / norma for v in valores]
+
+
+def fake_answer(prompt: str) -> str:
+    """Resposta determinística com `answer_tokens` palavras."""
+    semente = _digest(prompt).hex()
+    palavras = [f"termo{semente[i % len(semente)]}{i}" for i in range(BACKEND_CONFIG.answer_tokens)]
+    return f"Resposta simulada [{semente[:8]}]: " + " ".join(palavras)
+
+
+def fake_classification(pergunta: str) -> str:
+    """JSON no formato do plano de roteamento do AgentClassifier."""
+    semente = _digest(pergunta)
+    area = "rh" if semente[0] % 3 == 0 else "ti"
+    candidatos = AGENTES_RH if area == "rh" else AGENTES_TI
+    inicio = semente[1] % len(candidatos)
+    escolhidos = [candidatos[(inicio + i) % len(candidatos)] for i in range(3)]
+    return json.dumps({
+        "analise": "Classificação simulada para benchmark",
+        "area_principal": area,
+        "agentes_selecionados": [
+            {"agente": agente, "relevancia": "alta", "justificativa": "benchmark"}
+            for agente in escolhidos
+        ],
+        "ferramentas": [],
+        "delegacao": {
+            "delegar": False, "agente_alvo": None, "sub_pergunta": None,
+            "confianca": 0.0, "motivo": "benchmark"
+        }
+    })
+
+
+def _prompt_texto(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    if isinstance(prompt, list):
+        return "\n".join(str(getattr(m, "content", m.get("content", "") if isinstance(m, dict) else m)) for m in prompt)
+    return str(getattr(prompt, "content", prompt))
+
+
+# ============================================================================
+# LANGCHAIN: ChatOpenAI / OpenAIEmbeddings
+# ============================================================================
+
+class FakeChatOpenAI:
+    """Substituto de `langchain_openai.ChatOpenAI` (invoke/ainvoke/stream/astream)."""
+
+    def __init__(self, *args, **kwargs):
+        self.model_name = kwargs.get("model", "fake-chat")
+        self.temperature = kwargs.get("temperature", 0.0)
+
+    def _resposta(self, prompt: Any) -> str:
+        COUNTERS.add("chat_calls")
+        return fake_answer(_prompt_texto(prompt))
+
+    def invoke(self, prompt: Any, *args, **kwargs) -> SimpleNamespace:
+        texto = self._resposta(prompt)
+        time.sleep(_latencia(BACKEND_CONFIG.chat_latency_ms, texto))
+        return SimpleNamespace(content=texto)
+
+    async def ainvoke(self, prompt: Any, *args, **kwargs) -> SimpleNamespace:
+        texto = self._resposta(prompt)
+        await asyncio.sleep(_latencia(BACKEND_CONFIG.chat_latency_ms, texto))
+        return SimpleNamespace(content=texto)
+
+    def stream(self, prompt: Any, *args, **kwargs) -> Iterator[SimpleNamespace]:
+        texto = self._resposta(prompt)
+        time.sleep(_latencia(BACKEND_CONFIG.chat_latency_ms, texto))
+        for i, palavra in enumerate(texto.split(" ")):
+            time.sleep(BACKEND_CONFIG.token_latency_ms / 1000.0)
+            yield SimpleNamespace(content=palavra if i == 0 else f" {palavra}")
+
+    async def astream(self, prompt: Any, *args, **kwargs) -> AsyncIterator[SimpleNamespace]:
+        texto = self._resposta(prompt)
+        await asyncio.sleep(_latencia(BACKEND_CONFIG.chat_latency_ms, texto))
+        for i, palavra in enumerate(texto.split(" ")):
+            await asyncio.sleep(BACKEND_CONFIG.token_latency_ms / 1000.0)
+            yield SimpleNamespace(content=palavra if i == 0 else f" {palavra}")
+
+
+class FakeOpenAIEmbeddings:
+    """Substituto de `langchain_openai.OpenAIEmbeddings`."""
+
+    def __init__(self, *args, **kwargs):
+        self.model = kwargs.get("model", "fake-embedding")
+
+    def _registrar(self, texts: List[str]) -> float:
+        COUNTERS.add("embedding_calls")
+        COUNTERS.add("embedded_texts", len(texts))
+        return _latencia(BACKEND_CONFIG.embedding_latency_ms, "".join(texts[:1]))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._registrar(texts))
+        return [fake_embedding(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self._registrar(texts))
+        return [fake_embedding(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+# ============================================================================
+# SDK OPENAI: AsyncOpenAI / OpenAI
+# ============================================================================
+
+def _completion(messages: List[Dict[str, Any]]) -> SimpleNamespace:
+    COUNTERS.add("completion_calls")
+    ultimo = messages[-1].get("content", "") if messages else ""
+    if "agentes_selecionados" in ultimo:
+        pergunta = ultimo.rsplit("**PERGUNTA DO USUÁRIO:**", 1)[-1].split("**ATENÇÃO:**", 1)[0]
+        conteudo = fake_classification(pergunta.strip())
+    else:
+        conteudo = fake_answer(ultimo)
+    mensagem = SimpleNamespace(content=conteudo, role="assistant")
+    return SimpleNamespace(choices=[SimpleNamespace(message=mensagem, finish_reason="stop")])
+
+
+def _embedding_response(entrada: Any) -> SimpleNamespace:
+    textos = [entrada] if isinstance(entrada, str) else list(entrada)
+    COUNTERS.add("embedding_calls")
+    COUNTERS.add("embedded_texts", len(textos))
+    return SimpleNamespace(data=[
+        SimpleNamespace(embedding=fake_embedding(t), index=i) for i, t in enumerate(textos)
+    ])
+
+
+class _AsyncCompletions:
+    async def create(self, *, messages: List[Dict[str, Any]], **kwargs) -> SimpleNamespace:
+        resposta = _completion(messages)
+        await asyncio.sleep(_latencia(BACKEND_CONFIG.chat_latency_ms, resposta.choices[0].message.content))
+        return resposta
+
+
+class _AsyncEmbeddings:
+    async def create(self, *, input: Any, **kwargs) -> SimpleNamespace:
+        await asyncio.sleep(_latencia(BACKEND_CONFIG.embedding_latency_ms, str(input)[:64]))
+        return _embedding_response(input)
+
+
+class FakeAsyncOpenAI:
+    """Substituto de `openai.AsyncOpenAI` (chat.completions e embeddings)."""
+
+    def __init__(self, *args, **kwargs):
+        self.chat = SimpleNamespace(completions=_AsyncCompletions())
+        self.embeddings = _AsyncEmbeddings()
+
+
+class _Completions:
+    def create(self, *, messages: List[Dict[str, Any]], **kwargs) -> SimpleNamespace:
+        resposta = _completion(messages)
+        time.sleep(_latencia(BACKEND_CONFIG.chat_latency_ms, resposta.choices[0].message.content))
+        return resposta
+
+
+class _Embeddings:
+    def create(self, *, input: Any, **kwargs) -> SimpleNamespace:
+        time.sleep(_latencia(BACKEND_CONFIG.embedding_latency_ms, str(input)[:64]))
+        return _embedding_response(input)
+
+
+class FakeOpenAI:
+    """Substituto de `openai.OpenAI` (usado na ingestão de conhecimento)."""
+
+    def __init__(self, *args, **kwargs):
+        self.chat = SimpleNamespace(completions=_Completions())
+        self.embeddings = _Embeddings()
+
+
+# ============================================================================
+# INSTALAÇÃO
+# ============================================================================
+
+def install_fakes(backend_config: Optional[FakeBackendConfig] = None) -> None:
+    """
+    Substitui os clientes reais pelos falsos nos módulos `langchain_openai` e `openai`.
+
+    Deve ser chamado antes de importar `app_fastapi`/agentes.
+    """
+    global BACKEND_CONFIG
+    if backend_config is not None:
+        BACKEND_CONFIG = backend_config
+
+    import langchain_openai
+    import openai
+
+    langchain_openai.ChatOpenAI = FakeChatOpenAI
+    langchain_openai.OpenAIEmbeddings = FakeOpenAIEmbeddings
+    openai.AsyncOpenAI = FakeAsyncOpenAI
+    openai.OpenAI = FakeOpenAI
@@ -0,0 +1,222 @@
+"""
+Driver de carga para os endpoints de chat do Neoson.
+
+Executa N requisições com concorrência C contra cada endpoint alvo:
+- /chat                      (sem autenticação)
+- /api/chat                  (Bearer token)
+- /api/agents/{agent_name}   (Bearer token, rota direta de agente)
+
+Durante a carga, amostra `pg_stat_activity` para medir conexões de banco em
+uso. As chamadas aos backends falsos são lidas de `/_benchmark/counters`
+(servidor externo) ou diretamente de `benchmarks.fakes.COUNTERS` (in-process).
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import asyncpg
+import httpx
+
+from benchmarks.report import TargetResult
+
+# Perguntas fixas (as mesmas são semeadas nas tabelas de conhecimento)
+QUESTIONS = [
+    "Como solicito acesso ao ambiente de produção?",
+    "Qual é o processo de change management para deploy?",
+    "Como configuro a VPN no notebook corporativo?",
+    "Quais são os benefícios de plano de saúde disponíveis?",
+    "Como funciona o programa de treinamento para novos colaboradores?",
+    "Qual a política de backup dos servidores na nuvem?",
+    "Como abrir um chamado para troca de equipamento?",
+    "Quais padrões de arquitetura devo seguir em uma nova API?",
+    "Como faço para registrar férias no sistema de RH?",
+    "Qual é o SLA de atendimento do service desk?",
+    "Como solicitar licença de software para minha equipe?",
+    "Quais são as regras de compliance para dados sensíveis?",
+]
+
+TARGETS = {
+    "chat": "/chat",
+    "api_chat": "/api/chat",
+    "agent": "/api/agents/{agent_name}",
+}
+
+AUTH_TARGETS = {"api_chat", "agent"}
+
+CountersFn = Callable[[], Awaitable[Dict[str, int]]]
+
+
+class DbConnectionSampler:
+    """Amostra periodicamente as conexões ativas no banco (pg_stat_activity)."""
+
+    def __init__(self, dsn: Optional[str], interval: float = 0.1):
+        self.dsn = dsn
+        self.interval = interval
+        self.samples: List[int] = []
+        self._task: Optional[asyncio.Task] = None
+        self._conn: Optional[asyncpg.Connection] = None
+
+    async def start(self) -> None:
+        if not self.dsn:
+            return
+        self.samples = []
+        self._conn = await asyncpg.connect(self.dsn)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            total = await self._conn.fetchval(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+            )
+            self.samples.append(int(total))
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    @property
+    def peak(self) -> int:
+        return max(self.samples, default=0)
+
+    @property
+    def mean(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+
+class LoadDriver:
+    """Dispara a carga contra um cliente httpx (ASGI in-process ou servidor externo)."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        counters: CountersFn,
+        reset_counters: Callable[[], Awaitable[None]],
+        dsn: Optional[str] = None,
+        pool_stats: Optional[Callable[[], Dict[str, Any]]] = None,
+        username: str = "admin",
+        password: str = "admin123",
+        perfil: str = "João Silva - Analista TI"
+    ):
+        self.client = client
+        self.counters = counters
+        self.reset_counters = reset_counters
+        self.dsn = dsn
+        self.pool_stats = pool_stats
+        self.username = username
+        self.password = password
+        self.perfil = perfil
+        self._token: Optional[str] = None
+
+    async def login(self) -> str:
+        """Obtém o Bearer token usado pelos endpoints autenticados."""
+        if self._token is None:
+            response = await self.client.post("/api/auth/login", json={
+                "username": self.username,
+                "password": self.password,
+                "user_type": "admin" if self.username == "admin" else "user",
+            })
+            response.raise_for_status()
+            self._token = response.json()["token"]
+        return self._token
+
+    async def run_target(
+        self,
+        target: str,
+        total_requests: int,
+        concurrency: int,
+        agent_name: str = "governance",
+        warmup: int = 2
+    ) -> TargetResult:
+        """Executa `total_requests` requisições com `concurrency` simultâneas em um endpoint."""
+        path = TARGETS[target].format(agent_name=agent_name)
+        headers = {}
+        if target in AUTH_TARGETS:
+            headers["Authorization"] = f"Bearer {await self.login()}"
+
+        # Aquecimento: inicializa agentes/pools fora da medição
+        for i in range(warmup):
+            await self._request(path, headers, i)
+
+        await self.reset_counters()
+        sampler = DbConnectionSampler(self.dsn)
+        await sampler.start()
+
+        fila: "asyncio.Queue[int]" = asyncio.Queue()
+        for i in range(total_requests):
+            fila.put_nowait(i)
+
+        latencias: List[float] = []
+        status_codes: Dict[int, int] = {}
+        erros = 0
+
+        async def worker() -> None:
+            nonlocal erros
+            while True:
+                try:
+                    indice = fila.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                inicio = time.perf_counter()
+                try:
+                    status = await self._request(path, headers, indice)
+                except httpx.HTTPError:
+                    status = 0
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                status_codes[status] = status_codes.get(status, 0) + 1
+                if status != 200:
+                    erros += 1
+
+        inicio_carga = time.perf_counter()
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            duracao = time.perf_counter() - inicio_carga
+            await sampler.stop()
+
+        return TargetResult(
+            target=target,
+            path=path,
+            concurrency=concurrency,
+            requests=total_requests,
+            errors=erros,
+            duration_s=duracao,
+            latencies_ms=latencias,
+            status_codes=status_codes,
+            db_connections_peak=sampler.peak,
+            db_connections_mean=sampler.mean,
+            pool_stats=self.pool_stats() if self.pool_stats else {},
+            backend_calls=await self.counters(),
+        )
+
+    async def run(
+        self,
+        targets: Sequence[str],
+        total_requests: int,
+        concurrency: int,
+        agent_name: str = "governance"
+    ) -> List[TargetResult]:
+        resultados = []
+        for target in targets:
+            print(f"🚀 Carga em {TARGETS[target].format(agent_name=agent_name)} "
+                  f"({total_requests} requisições, concorrência {concurrency})")
+            resultados.append(await self.run_target(target, total_requests, concurrency, agent_name))
+        return resultados
+
+    async def _request(self, path: str, headers: Dict[str, str], indice: int) -> int:
+        payload = {
+            "mensagem": QUESTIONS[indice % len(QUESTIONS)],
+            "persona_selecionada": self.perfil,
+        }
+        response = await self.client.post(path, json=payload, headers=headers)
+        return response.status_code
@@ -0,0 +1,96 @@
+"""
+Agregação e apresentação dos resultados do benchmark.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def percentile(valores: Sequence[float], p: float) -> float:
+    """Percentil com interpolação linear (p em 0-100)."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100.0
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+@dataclass
+class TargetResult:
+    """Resultado da carga em um endpoint."""
+    target: str
+    path: str
+    concurrency: int
+    requests: int
+    errors: int
+    duration_s: float
+    latencies_ms: List[float] = field(default_factory=list, repr=False)
+    status_codes: Dict[int, int] = field(default_factory=dict)
+    db_connections_peak: int = 0
+    db_connections_mean: float = 0.0
+    pool_stats: Dict[str, Any] = field(default_factory=dict)
+    backend_calls: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def throughput_rps(self) -> float:
+        return self.requests / self.duration_s if self.duration_s else 0.0
+
+    def per_request(self, chave: str) -> float:
+        return self.backend_calls.get(chave, 0) / self.requests if self.requests else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "target": self.target,
+            "path": self.path,
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "status_codes": self.status_codes,
+            "duration_s": round(self.duration_s, 3),
+            "throughput_rps": round(self.throughput_rps, 2),
+            "latency_ms": {
+                "p50": round(percentile(self.latencies_ms, 50), 1),
+                "p95": round(percentile(self.latencies_ms, 95), 1),
+                "p99": round(percentile(self.latencies_ms, 99), 1),
+                "max": round(max(self.latencies_ms, default=0.0), 1),
+            },
+            "db_connections": {
+                "peak": self.db_connections_peak,
+                "mean": round(self.db_connections_mean, 2),
+                "pools": self.pool_stats,
+            },
+            "llm_calls_per_request": round(self.per_request("llm_calls"), 2),
+            "embedding_calls_per_request": round(self.per_request("embedding_calls"), 2),
+            "backend_calls": self.backend_calls,
+        }
+
+
+def format_table(resultados: Sequence[TargetResult]) -> str:
+    """Tabela de texto com as principais métricas de cada endpoint."""
+    cabecalho = (
+        f"{'endpoint':<28} {'conc':>5} {'req':>6} {'err':>5} {'rps':>8} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'db pico':>8} {'llm/req':>8} {'emb/req':>8}"
+    )
+    linhas = [cabecalho, "-" * len(cabecalho)]
+    for r in resultados:
+        s = r.summary()
+        linhas.append(
+            f"{r.path:<28} {r.concurrency:>5} {r.requests:>6} {r.errors:>5} {s['throughput_rps']:>8.2f} "
+            f"{s['latency_ms']['p50']:>9.1f} {s['latency_ms']['p95']:>9.1f} {s['latency_ms']['p99']:>9.1f} "
+            f"{r.db_connections_peak:>8} {s['llm_calls_per_request']:>8.2f} {s['embedding_calls_per_request']:>8.2f}"
+        )
+    return "\n".join(linhas)
+
+
+def write_json(resultados: Sequence[TargetResult], caminho: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """Grava os resultados (e a configuração usada) em JSON."""
+    payload = {
+        "metadata": metadata or {},
+        "results": [r.summary() for r in resultados],
+    }
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(payload, arquivo, ensure_ascii=False, indent=2)
+
@@ -0,0 +1,62 @@
+"""
+Servidor FastAPI do Neoson com backends falsos (modo servidor externo).
+
+Sobe o `app_fastapi:app` com os fakes instalados e adiciona rotas de
+instrumentação usadas pelo driver de carga:
+- GET  /_benchmark/counters  -> chamadas acumuladas aos backends falsos
+- POST /_benchmark/reset     -> zera os contadores
+
+Uso:
+    DATABASE_URL=postgresql://... python -m benchmarks.server --port 8001
+"""
+
+import argparse
+import os
+
+from benchmarks.fakes import COUNTERS, FakeBackendConfig, install_fakes
+
+
+def build_app(backend_config: FakeBackendConfig):
+    """Instala os fakes, importa o app e registra as rotas de benchmark."""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-fake")
+    install_fakes(backend_config)
+
+    from app_fastapi import app
+    from dal.postgres_dal_async import get_pool_stats
+
+    @app.get("/_benchmark/counters", include_in_schema=False)
+    async def benchmark_counters():
+        return {**COUNTERS.snapshot(), "pools": get_pool_stats()}
+
+    @app.post("/_benchmark/reset", include_in_schema=False)
+    async def benchmark_reset():
+        COUNTERS.reset()
+        return {"status": "ok"}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Neoson com backends de LLM/embeddings falsos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--token-latency-ms", type=float, default=5.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        parser.error("defina DATABASE_URL apontando para o PostgreSQL de benchmark")
+
+    import uvicorn
+
+    app = build_app(FakeBackendConfig(
+        chat_latency_ms=args.llm_latency_ms,
+        token_latency_ms=args.token_latency_ms,
+        embedding_latency_ms=args.embedding_latency_ms,
+    ))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
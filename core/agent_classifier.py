@@ -1,13 +1,33 @@
 # 🤖 CLASSIFICADOR INTELIGENTE DE AGENTES
-# Sistema que usa LLM para escolher os melhores sub-agentes para cada pergunta
+# Sistema que usa LLM para escolher os melhores sub-agentes para cada pergunta.
+# Uma única chamada (saída estruturada via JSON schema) produz o plano de
+# roteamento completo: ranking de agentes, tools MCP com parâmetros e decisão
+# de delegação A2A. Os subagentes consultam o plano via get_routing_plan().
 
+import contextvars
+import copy
+import hashlib
 import json
-from typing import List, Dict
+import threading
+from collections import OrderedDict
+from typing import Any, List, Dict, Optional, Tuple
+
+import numpy as np
 from openai import AsyncOpenAI
 from core.config import ConfigManager
+from core.embedding_cache import get_embedding_service, normalizar_texto
+from core.llm_clients import get_async_http_client
 
 config = ConfigManager()
 
+# Plano de roteamento da pergunta em processamento (propaga para tasks/asyncio.run)
+_plano_atual: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar(
+    "neoson_routing_plan", default=None
+)
+
+# Confiança mínima para aceitar a delegação sugerida pelo planner
+CONFIANCA_MINIMA_DELEGACAO = 0.7
+
 
 # 📚 BASE DE CONHECIMENTO DOS AGENTES
 AGENTES_KNOWLEDGE_BASE = {
@@ -141,12 +161,19 @@ AGENTES_KNOWLEDGE_BASE = {
 # 🎯 PROMPT PARA CLASSIFICAÇÃO INTELIGENTE
 CLASSIFICACAO_PROMPT = """Você é um especialista em classificação de perguntas para um sistema multi-agente corporativo.
 
-**SUA MISSÃO:** Analisar a pergunta do usuário e escolher os 3 melhores sub-agentes para responder.
+**SUA MISSÃO:** Analisar a pergunta do usuário e montar o plano de atendimento em uma única etapa:
+1. Escolher os 3 melhores sub-agentes para responder
+2. Indicar as ferramentas (tools MCP) necessárias, com os parâmetros citados na pergunta
+3. Decidir se parte da pergunta deve ser delegada a outro especialista
 
 **BASE DE AGENTES DISPONÍVEIS:**
 
 {agents_knowledge}
 
+**FERRAMENTAS (TOOLS MCP) DISPONÍVEIS:**
+
+{tools_catalog}
+
 **INSTRUÇÕES:**
 1. Leia atentamente a pergunta do usuário
 2. Identifique os tópicos principais e secundários
@@ -160,6 +187,11 @@ CLASSIFICACAO_PROMPT = """Você é um especialista em classificação de pergunt
 - Experiência específica no assunto questionado
 - Possibilidade de resposta complementar entre os agentes
 
+**FERRAMENTAS E DELEGAÇÃO:**
+- Liste em "ferramentas" apenas tools que trazem dados do usuário necessários para a resposta (lista vazia se nenhuma)
+- Em "parametros", inclua somente valores citados explicitamente na pergunta (dados cadastrais vêm do perfil)
+- Em "delegacao", "delegar" só é true quando um segundo especialista (diferente do principal) precisa responder uma parte da pergunta; "sub_pergunta" é a parte focada nele
+
 **FORMATO DE RESPOSTA:**
 Retorne APENAS um JSON válido no formato:
 {{
@@ -171,7 +203,17 @@ Retorne APENAS um JSON válido no formato:
             "relevancia": "alta" ou "media" ou "baixa",
             "justificativa": "Por que esse agente foi escolhido"
         }}
-    ]
+    ],
+    "ferramentas": [
+        {{"nome": "nome_da_tool", "parametros": [{{"nome": "parametro", "valor": "valor"}}]}}
+    ],
+    "delegacao": {{
+        "delegar": true ou false,
+        "agente_alvo": "nome_do_agente" ou null,
+        "sub_pergunta": "pergunta focada" ou null,
+        "confianca": 0.0-1.0,
+        "motivo": "explicação breve"
+    }}
 }}
 
 **PERGUNTA DO USUÁRIO:**
@@ -184,14 +226,247 @@ Retorne APENAS um JSON válido no formato:
 """
 
 
+def _nomes_agentes() -> List[str]:
+    return [
+        agente
+        for area in AGENTES_KNOWLEDGE_BASE.values()
+        for agente in area["subagentes"]
+    ]
+
+
+def _catalogo_tools() -> List[Any]:
+    """Tools MCP registradas (vazio se o pacote de tools não estiver disponível)."""
+    try:
+        from tools.mcp.registry import default_registry
+        return default_registry.list_all_tools()
+    except Exception:
+        return []
+
+
+def build_plan_schema(tool_names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """JSON schema (modo strict) do plano de roteamento."""
+    nome_tool: Dict[str, Any] = {"type": "string"}
+    if tool_names:
+        nome_tool["enum"] = sorted(tool_names)
+    agentes = _nomes_agentes()
+    
+    def _objeto(propriedades: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": propriedades,
+            "required": list(propriedades),
+            "additionalProperties": False,
+        }
+    
+    return _objeto({
+        "analise": {"type": "string"},
+        "area_principal": {"type": "string", "enum": list(AGENTES_KNOWLEDGE_BASE)},
+        "agentes_selecionados": {
+            "type": "array",
+            "items": _objeto({
+                "agente": {"type": "string", "enum": agentes},
+                "relevancia": {"type": "string", "enum": ["alta", "media", "baixa"]},
+                "justificativa": {"type": "string"},
+            }),
+        },
+        "ferramentas": {
+            "type": "array",
+            "items": _objeto({
+                "nome": nome_tool,
+                "parametros": {
+                    "type": "array",
+                    "items": _objeto({"nome": {"type": "string"}, "valor": {"type": "string"}}),
+                },
+            }),
+        },
+        "delegacao": _objeto({
+            "delegar": {"type": "boolean"},
+            "agente_alvo": {"type": ["string", "null"]},
+            "sub_pergunta": {"type": ["string", "null"]},
+            "confianca": {"type": "number"},
+            "motivo": {"type": "string"},
+        }),
+    })
+
+
+def set_routing_plan(plano: Optional[Dict]) -> contextvars.Token:
+    """Ativa o plano de roteamento no contexto atual (retorna o token para reset)."""
+    return _plano_atual.set(plano)
+
+
+def reset_routing_plan(token: contextvars.Token) -> None:
+    """Restaura o plano anterior a set_routing_plan."""
+    _plano_atual.reset(token)
+
+
+def get_routing_plan() -> Optional[Dict]:
+    """Plano de roteamento da pergunta atual (None fora do fluxo do Neoson)."""
+    return _plano_atual.get()
+
+
+def plan_tools(plano: Optional[Dict], disponiveis: List[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    Tools do plano restritas às disponíveis para o agente.
+    
+    Returns:
+        {tool: parametros extraídos da pergunta}, ou None se não há plano
+    """
+    if not plano or "ferramentas" not in plano:
+        return None
+    tools: Dict[str, Dict[str, str]] = {}
+    for item in plano["ferramentas"] or []:
+        nome = (item.get("nome") or "").strip()
+        if nome in disponiveis:
+            tools[nome] = {
+                p["nome"]: p["valor"]
+                for p in item.get("parametros") or []
+                if p.get("nome") and p.get("valor") not in (None, "")
+            }
+    return tools
+
+
+def plan_delegation(plano: Optional[Dict]) -> Optional[Tuple[bool, Optional[str], Optional[str]]]:
+    """
+    Decisão de delegação do plano no formato de can_delegate_query.
+    
+    Returns:
+        (should_delegate, target_agent, sub_query), ou None se não há plano
+    """
+    if not plano or "delegacao" not in plano:
+        return None
+    delegacao = plano["delegacao"] or {}
+    alvo = delegacao.get("agente_alvo")
+    if delegacao.get("delegar") and alvo and float(delegacao.get("confianca") or 0.0) >= CONFIANCA_MINIMA_DELEGACAO:
+        return True, alvo, delegacao.get("sub_pergunta")
+    return False, None, None
+
+
+class ClassificationCache:
+    """
+    Cache de classificações em duas camadas:
+    
+    1. Exato: pergunta normalizada (caixa/espaços) -> classificação
+    2. Semântico: vizinho mais próximo sobre embeddings das perguntas, aceito
+       apenas acima do corte de similaridade configurado
+    
+    É invalidado automaticamente quando AGENTES_KNOWLEDGE_BASE ou o registry
+    de agentes da factory mudam (ver _fingerprint).
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None, similarity_cutoff: Optional[float] = None):
+        self.max_entries = max_entries or config.cache.classification_cache_size
+        self.similarity_cutoff = similarity_cutoff or config.cache.classification_similarity_cutoff
+        self._entries: "OrderedDict[str, Tuple[Optional[np.ndarray], Dict]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._fingerprint_atual: Optional[str] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits_exact": 0, "hits_semantic": 0, "misses": 0, "invalidations": 0}
+    
+    @staticmethod
+    def normalizar_pergunta(pergunta: str) -> str:
+        return normalizar_texto(pergunta).lower().rstrip(" ?!.")
+    
+    @staticmethod
+    def _fingerprint() -> str:
+        """Hash da base de conhecimento + versão do registry de agentes + catálogo de tools."""
+        registry_version = "0"
+        try:
+            # Não força a criação do registry (get_registry loga a cada chamada)
+            from factory import agent_registry
+            registry = agent_registry._registry_instance
+            if registry is not None:
+                registry_version = f"{registry.version}:{','.join(sorted(registry.agents))}"
+        except Exception:
+            pass
+        payload = json.dumps(AGENTES_KNOWLEDGE_BASE, sort_keys=True, ensure_ascii=False)
+        tools = ",".join(sorted(tool.name for tool in _catalogo_tools()))
+        return hashlib.sha256(f"{payload}|{registry_version}|{tools}".encode("utf-8")).hexdigest()
+    
+    def _validar(self) -> None:
+        fingerprint = self._fingerprint()
+        if fingerprint != self._fingerprint_atual:
+            if self._fingerprint_atual is not None and self._entries:
+                self.stats["invalidations"] += 1
+                print("🔄 Cache de classificação invalidado (base de agentes alterada)")
+            self.clear()
+            self._fingerprint_atual = fingerprint
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._matrix_keys = []
+    
+    def get_exact(self, pergunta: str) -> Optional[Dict]:
+        self._validar()
+        key = self.normalizar_pergunta(pergunta)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits_exact"] += 1
+            return copy.deepcopy(entry[1])
+    
+    def get_semantic(self, vetor: np.ndarray) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            if self._matrix is None:
+                keys = [k for k, (v, _) in self._entries.items() if v is not None]
+                if not keys:
+                    return None
+                self._matrix = np.stack([self._entries[k][0] for k in keys])
+                self._matrix_keys = keys
+            similaridades = self._matrix @ vetor
+            idx = int(np.argmax(similaridades))
+            score = float(similaridades[idx])
+            if score < self.similarity_cutoff:
+                return None
+            key = self._matrix_keys[idx]
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits_semantic"] += 1
+            return copy.deepcopy(entry[1]), score
+    
+    def put(self, pergunta: str, vetor: Optional[np.ndarray], resultado: Dict) -> None:
+        key = self.normalizar_pergunta(pergunta)
+        with self._lock:
+            self._entries[key] = (vetor, copy.deepcopy(resultado))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+    
+    @staticmethod
+    def normalizar_vetor(embedding: List[float]) -> np.ndarray:
+        vetor = np.asarray(embedding, dtype=np.float32)
+        norma = np.linalg.norm(vetor)
+        return vetor / norma if norma else vetor
+    
+    def get_stats(self) -> Dict:
+        total = self.stats["hits_exact"] + self.stats["hits_semantic"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "similarity_cutoff": self.similarity_cutoff,
+            "hit_rate": round((total - self.stats["misses"]) / total, 3) if total else 0.0
+        }
+
+
 class AgentClassifier:
     """
-    Classificador inteligente que usa LLM para escolher os melhores agentes
+    Classificador inteligente que usa LLM para escolher os melhores agentes.
+    
+    Também atua como planner de roteamento: a mesma chamada devolve as tools
+    MCP necessárias e a decisão de delegação (ver plan_question).
     """
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=config.openai.api_key)
+        self.client = AsyncOpenAI(api_key=config.openai.api_key, http_client=get_async_http_client())
         self.model = config.openai.chat_model
+        self.cache = ClassificationCache()
     
     def _format_agents_knowledge(self) -> str:
         """Formata a base de conhecimento dos agentes para o prompt"""
@@ -211,31 +486,87 @@ class AgentClassifier:
         
         return formatted
     
+    @staticmethod
+    def _format_tools_catalog(tools: List[Any]) -> str:
+        """Formata o catálogo de tools MCP para o prompt."""
+        if not tools:
+            return "Nenhuma ferramenta disponível (retorne \"ferramentas\": [])."
+        linhas = []
+        for tool in tools:
+            parametros = ", ".join(tool.parameters) or "sem parâmetros"
+            linhas.append(f"- **{tool.name}** ({tool.category or 'geral'}): {tool.description} [parâmetros: {parametros}]")
+        return "\n".join(linhas)
+    
     async def classify_question(self, user_question: str) -> Dict:
         """
         Classifica a pergunta e retorna os 3 melhores agentes
         
+        Equivalente a plan_question: o plano é um superconjunto da classificação.
+        """
+        return await self.plan_question(user_question)
+    
+    async def plan_question(self, user_question: str) -> Dict:
+        """
+        Monta o plano de roteamento da pergunta em uma única chamada de LLM
+        
         Args:
             user_question: Pergunta do usuário
             
         Returns:
-            Dict com análise e agentes selecionados
+            Dict com análise, agentes selecionados, ferramentas (tools MCP com
+            parâmetros extraídos) e decisão de delegação
         """
+        # 1. Cache exato (pergunta normalizada)
+        cached = self.cache.get_exact(user_question)
+        if cached is not None:
+            print("⚡ Classificação recuperada do cache (exato)")
+            return cached
+        
+        # 2. Cache semântico (vizinho mais próximo por embedding)
+        vetor_pergunta = None
+        try:
+            embedding = await get_embedding_service().aembed_query(user_question)
+            vetor_pergunta = self.cache.normalizar_vetor(embedding)
+            semantic_hit = self.cache.get_semantic(vetor_pergunta)
+            if semantic_hit is not None:
+                resultado, score = semantic_hit
+                print(f"⚡ Classificação recuperada do cache (semântico, similaridade={score:.3f})")
+                # Só o ranking de agentes vale para outra pergunta: tools (com parâmetros
+                # extraídos) e sub-pergunta de delegação são da pergunta original. Sem as
+                # chaves, os subagentes refazem essas análises; o acerto não é regravado.
+                resultado.pop("ferramentas", None)
+                resultado.pop("delegacao", None)
+                return resultado
+        except Exception as e:
+            print(f"⚠️ Cache semântico de classificação indisponível: {e}")
+        
+        self.cache.stats["misses"] += 1
+        
         try:
             # Formata o prompt
+            tools = _catalogo_tools()
             agents_knowledge = self._format_agents_knowledge()
             prompt = CLASSIFICACAO_PROMPT.format(
                 agents_knowledge=agents_knowledge,
+                tools_catalog=self._format_tools_catalog(tools),
                 user_question=user_question
             )
             
-            # Chama a LLM
+            # Chama a LLM (saída estruturada: o JSON segue o schema do plano)
             response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "Você é um classificador preciso e técnico."},
                     {"role": "user", "content": prompt}
                 ],
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": "plano_roteamento",
+                        "strict": True,
+                        "schema": build_plan_schema([tool.name for tool in tools]),
+                    },
+                },
                 temperature=0.3,  # Baixa temperatura para mais consistência
                 max_tokens=800
             )
@@ -258,6 +589,12 @@ class AgentClassifier:
             if len(result["agentes_selecionados"]) != 3:
                 raise ValueError(f"LLM retornou {len(result['agentes_selecionados'])} agentes, esperado 3")
             
+            result.setdefault("ferramentas", [])
+            result.setdefault("delegacao", self._sem_delegacao())
+            
+            # Apenas classificações válidas da LLM são cacheadas (fallbacks não)
+            self.cache.put(user_question, vetor_pergunta, result)
+            
             return result
             
         except json.JSONDecodeError as e:
@@ -269,10 +606,17 @@ class AgentClassifier:
             print(f"❌ Erro na classificação LLM: {e}")
             return self._fallback_classification(user_question)
     
+    @staticmethod
+    def _sem_delegacao(motivo: str = "") -> Dict:
+        return {"delegar": False, "agente_alvo": None, "sub_pergunta": None, "confianca": 0.0, "motivo": motivo}
+    
     def _fallback_classification(self, user_question: str) -> Dict:
         """
         Classificação de fallback baseada em keywords simples
         Usado apenas se a LLM falhar
+        
+        O plano de fallback não tem tools nem delegação: sem a chave "ferramentas"
+        e "delegacao", os subagentes voltam às próprias análises.
         """
         question_lower = user_question.lower()
         
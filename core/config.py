@@ -38,6 +38,17 @@ class DatabaseConfig:
     enduser_table: str
 
 
+@dataclass
+class DatabasePoolConfig:
+    """Connection pool settings shared by all async database clients."""
+    min_size: int
+    max_size: int
+    statement_cache_size: int
+    max_inactive_connection_lifetime: float
+    command_timeout: float
+    connect_timeout: float
+
+
 @dataclass
 class OpenAIConfig:
     """OpenAI API configuration settings."""
@@ -46,6 +57,66 @@ class OpenAIConfig:
     chat_model: str
     temperature: float
     max_tokens: int
+    http_max_connections: int
+    http_max_keepalive_connections: int
+    http_keepalive_expiry: float
+
+
+@dataclass
+class CacheConfig:
+    """Cache settings (in-process LRU + optional Redis)."""
+    redis_url: Optional[str]
+    embedding_cache_size: int
+    embedding_cache_ttl: int
+    classification_cache_size: int
+    classification_similarity_cutoff: float
+
+
+@dataclass
+class HierarchyConfig:
+    """TI hierarchy delegation settings."""
+    speculative_enabled: bool
+    speculative_top_n: int
+    speculative_max_concurrency: int
+    router_margin: float
+    router_min_similarity: float
+
+
+@dataclass
+class StateStoreConfig:
+    """Default limits for in-process per-user state stores."""
+    max_entries: int
+    ttl_seconds: float
+    max_bytes: int
+
+
+@dataclass
+class IngestionConfig:
+    """Background knowledge ingestion job queue settings."""
+    data_dir: str
+    workers: int
+    process_workers: int
+    lease_seconds: float
+    poll_interval: float
+    embedding_batch_size: int
+    embedding_max_in_flight: int
+    embedding_tpm: int
+    embedding_rpm: int
+    embedding_max_retries: int
+    ocr_workers: int
+    ocr_dpi: int
+    ocr_lang: str
+    ocr_min_page_chars: int
+    copy_timeout: float
+
+
+@dataclass
+class FeedbackConfig:
+    """Feedback write-behind queue settings."""
+    queue_size: int
+    batch_size: int
+    flush_interval: float
+    enqueue_timeout: float
 
 
 @dataclass 
@@ -103,13 +174,78 @@ class ConfigManager:
             enduser_table=self._get_env_var("KNOWLEDGE_ENDUSER_TABLE", "knowledge_END-USER")
         )
         
+        # Database Pool Configuration (asyncpg)
+        self.database_pool = DatabasePoolConfig(
+            min_size=int(self._get_env_var("DB_POOL_MIN_SIZE", "2")),
+            max_size=int(self._get_env_var("DB_POOL_MAX_SIZE", "10")),
+            statement_cache_size=int(self._get_env_var("DB_POOL_STATEMENT_CACHE_SIZE", "256")),
+            max_inactive_connection_lifetime=float(self._get_env_var("DB_POOL_MAX_INACTIVE_LIFETIME", "300")),
+            command_timeout=float(self._get_env_var("DB_POOL_COMMAND_TIMEOUT", "30")),
+            connect_timeout=float(self._get_env_var("DB_POOL_CONNECT_TIMEOUT", "10"))
+        )
+        
         # OpenAI Configuration
         self.openai = OpenAIConfig(
             api_key=self._get_env_var("OPENAI_API_KEY", required=True),
             embedding_model=self._get_env_var("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
             chat_model=self._get_env_var("OPENAI_CHAT_MODEL", "gpt-4o-mini"),
             temperature=float(self._get_env_var("OPENAI_TEMPERATURE", "0.3")),
-            max_tokens=int(self._get_env_var("OPENAI_MAX_TOKENS", "1500"))
+            max_tokens=int(self._get_env_var("OPENAI_MAX_TOKENS", "1500")),
+            http_max_connections=int(self._get_env_var("OPENAI_HTTP_MAX_CONNECTIONS", "100")),
+            http_max_keepalive_connections=int(self._get_env_var("OPENAI_HTTP_MAX_KEEPALIVE", "20")),
+            http_keepalive_expiry=float(self._get_env_var("OPENAI_HTTP_KEEPALIVE_EXPIRY", "30.0"))
+        )
+        
+        # Cache Configuration
+        self.cache = CacheConfig(
+            redis_url=self._get_env_var("REDIS_URL"),
+            embedding_cache_size=int(self._get_env_var("EMBEDDING_CACHE_SIZE", "4096")),
+            embedding_cache_ttl=int(self._get_env_var("EMBEDDING_CACHE_TTL", "86400")),
+            classification_cache_size=int(self._get_env_var("CLASSIFICATION_CACHE_SIZE", "1000")),
+            classification_similarity_cutoff=float(self._get_env_var("CLASSIFICATION_SIMILARITY_CUTOFF", "0.93"))
+        )
+        
+        # Hierarchy Configuration (execução especulativa é opt-in)
+        self.hierarchy = HierarchyConfig(
+            speculative_enabled=self._get_env_var("HIERARCHY_SPECULATIVE", "false").lower() == "true",
+            speculative_top_n=int(self._get_env_var("HIERARCHY_SPECULATIVE_TOP_N", "3")),
+            speculative_max_concurrency=int(self._get_env_var("HIERARCHY_SPECULATIVE_MAX_CONCURRENCY", "2")),
+            router_margin=float(self._get_env_var("HIERARCHY_ROUTER_MARGIN", "0.03")),
+            router_min_similarity=float(self._get_env_var("HIERARCHY_ROUTER_MIN_SIMILARITY", "0.15"))
+        )
+        
+        # State Store Configuration (memórias, perfis e sessões em processo)
+        self.state_store = StateStoreConfig(
+            max_entries=int(self._get_env_var("STATE_STORE_MAX_ENTRIES", "5000")),
+            ttl_seconds=float(self._get_env_var("STATE_STORE_TTL", "3600")),
+            max_bytes=int(self._get_env_var("STATE_STORE_MAX_BYTES", "0"))
+        )
+        
+        # Ingestion Configuration (fila de jobs fora do event loop)
+        self.ingestion = IngestionConfig(
+            data_dir=self._get_env_var("INGESTION_DATA_DIR", os.path.join("data", "ingestion")),
+            workers=int(self._get_env_var("INGESTION_WORKERS", "1")),
+            process_workers=int(self._get_env_var("INGESTION_PROCESS_WORKERS", "1")),
+            lease_seconds=float(self._get_env_var("INGESTION_JOB_LEASE_SECONDS", "300")),
+            poll_interval=float(self._get_env_var("INGESTION_POLL_INTERVAL", "1.0")),
+            embedding_batch_size=int(self._get_env_var("INGESTION_EMBEDDING_BATCH_SIZE", "100")),
+            embedding_max_in_flight=int(self._get_env_var("INGESTION_EMBEDDING_MAX_IN_FLIGHT", "4")),
+            embedding_tpm=int(self._get_env_var("INGESTION_EMBEDDING_TPM", "1000000")),
+            embedding_rpm=int(self._get_env_var("INGESTION_EMBEDDING_RPM", "3000")),
+            embedding_max_retries=int(self._get_env_var("INGESTION_EMBEDDING_MAX_RETRIES", "5")),
+            ocr_workers=int(self._get_env_var("INGESTION_OCR_WORKERS", "0")),  # 0 = número de CPUs
+            ocr_dpi=int(self._get_env_var("INGESTION_OCR_DPI", "300")),
+            ocr_lang=self._get_env_var("INGESTION_OCR_LANG", "por+eng"),
+            ocr_min_page_chars=int(self._get_env_var("INGESTION_OCR_MIN_PAGE_CHARS", "20")),
+            copy_timeout=float(self._get_env_var("INGESTION_COPY_TIMEOUT", "3600"))
+        )
+        
+        # Feedback Configuration (fila write-behind)
+        self.feedback = FeedbackConfig(
+            queue_size=int(self._get_env_var("FEEDBACK_QUEUE_SIZE", "1000")),
+            batch_size=int(self._get_env_var("FEEDBACK_BATCH_SIZE", "100")),
+            flush_interval=float(self._get_env_var("FEEDBACK_FLUSH_INTERVAL", "1.0")),
+            enqueue_timeout=float(self._get_env_var("FEEDBACK_ENQUEUE_TIMEOUT", "0.5"))
         )
         
         # Application Configuration
@@ -239,6 +375,13 @@ class ConfigManager:
                     "enduser": self.database.enduser_table
                 }
             },
+            "database_pool": {
+                "min_size": self.database_pool.min_size,
+                "max_size": self.database_pool.max_size,
+                "statement_cache_size": self.database_pool.statement_cache_size,
+                "max_inactive_connection_lifetime": self.database_pool.max_inactive_connection_lifetime,
+                "command_timeout": self.database_pool.command_timeout
+            },
             "openai": {
                 "api_key_configured": bool(self.openai.api_key),
                 "embedding_model": self.openai.embedding_model,
@@ -246,6 +389,13 @@ class ConfigManager:
                 "temperature": self.openai.temperature,
                 "max_tokens": self.openai.max_tokens
             },
+            "cache": {
+                "redis_configured": bool(self.cache.redis_url),
+                "embedding_cache_size": self.cache.embedding_cache_size,
+                "embedding_cache_ttl": self.cache.embedding_cache_ttl,
+                "classification_cache_size": self.cache.classification_cache_size,
+                "classification_similarity_cutoff": self.cache.classification_similarity_cutoff
+            },
             "app": {
                 "debug": self.app.debug,
                 "log_level": self.app.log_level,
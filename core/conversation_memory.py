@@ -5,18 +5,32 @@ Mantém histórico das últimas 3-5 perguntas/respostas por usuário
 para melhor tratamento de follow-up questions.
 
 Características:
-- Armazenamento em Redis com TTL de 1 hora
+- Armazenamento em lista nativa do Redis (LPUSH/LTRIM/EXPIRE) com TTL de 1 hora
+- Uma única ida ao Redis (pipeline MULTI/EXEC atômico) por mensagem salva
 - Máximo de 5 mensagens por usuário
 - Formato compacto para economizar memória
-- Async-first para performance
+- Async-first: cliente redis.asyncio
 """
 
 import json
 import logging
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Deque, Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 
+from core.state_store import BoundedStateStore
+
+# Redis é opcional (sem ele, usa a memória local)
+try:
+    import redis
+    import redis.asyncio as redis_async
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+    redis_async = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,34 +67,52 @@ class ConversationMemory:
     Gerencia memória de conversas usando Redis.
     
     Estrutura no Redis:
-    - Key: conv:{usuario_id}
-    - Value: Lista JSON de mensagens
-    - TTL: 3600 segundos (1 hora)
+    - Key: conv:v2:{usuario_id} (prefixo novo: as chaves antigas eram strings JSON)
+    - Value: Lista nativa (uma mensagem JSON por elemento, a mais recente no início)
+    - TTL: 3600 segundos (1 hora), renovado a cada mensagem
+    
+    Salvar uma mensagem é um pipeline transacional LPUSH + LTRIM + EXPIRE:
+    uma ida ao Redis, escrita de tamanho constante e sem corrida entre
+    requisições simultâneas do mesmo usuário.
     """
     
+    KEY_PREFIX = "conv:v2:"
+    
     def __init__(
         self,
         redis_client=None,
         max_messages: int = 5,
         ttl_seconds: int = 3600,
-        use_fallback: bool = True
+        use_fallback: bool = True,
+        redis_url: Optional[str] = None
     ):
         """
         Inicializa sistema de memória.
         
         Args:
-            redis_client: Cliente Redis (opcional, usa fallback se None)
+            redis_client: Cliente redis.asyncio (opcional, usa fallback se None)
             max_messages: Número máximo de mensagens por usuário
             ttl_seconds: Tempo de vida dos dados (padrão 1 hora)
             use_fallback: Usar memória local se Redis falhar
+            redis_url: URL do Redis para criar o cliente assíncrono (se redis_client for None)
         """
+        if REDIS_AVAILABLE and isinstance(redis_client, redis.Redis):
+            raise TypeError("ConversationMemory requer um cliente redis.asyncio (não o cliente síncrono)")
+        
+        self._owns_client = False
+        if redis_client is None and redis_url and REDIS_AVAILABLE:
+            redis_client = redis_async.Redis.from_url(redis_url)
+            self._owns_client = True
+        
         self.redis_client = redis_client
         self.max_messages = max_messages
         self.ttl_seconds = ttl_seconds
         self.use_fallback = use_fallback
         
-        # Fallback: memória local (apenas para desenvolvimento)
-        self._local_memory: Dict[str, List[Dict]] = {}
+        # Fallback: memória local com as mesmas garantias (deque limitado + TTL por usuário)
+        self._local_memory: BoundedStateStore = BoundedStateStore(
+            "conversation_memory", ttl_seconds=ttl_seconds
+        )
         
         # Estatísticas
         self.stats = {
@@ -90,6 +122,9 @@ class ConversationMemory:
             'fallback_uses': 0
         }
     
+    def _key(self, usuario_id: str) -> str:
+        return f"{self.KEY_PREFIX}{usuario_id}"
+    
     async def save_message(
         self,
         usuario_id: str,
@@ -127,19 +162,7 @@ class ConversationMemory:
             # Tentar salvar no Redis primeiro
             if self.redis_client:
                 try:
-                    key = f"conv:{usuario_id}"
-                    
-                    # Buscar histórico existente
-                    existing = await self._redis_get_list(key)
-                    
-                    # Adicionar nova mensagem no início
-                    existing.insert(0, message.to_dict())
-                    
-                    # Manter apenas as últimas N mensagens
-                    existing = existing[:self.max_messages]
-                    
-                    # Salvar de volta no Redis
-                    await self._redis_set_list(key, existing)
+                    await self._redis_push(self._key(usuario_id), message.to_dict())
                     
                     logger.debug(f"💾 Mensagem salva no Redis para usuário {usuario_id}")
                     self.stats['total_saves'] += 1
@@ -154,11 +177,10 @@ class ConversationMemory:
             
             # Fallback: memória local
             if self.use_fallback:
-                if usuario_id not in self._local_memory:
-                    self._local_memory[usuario_id] = []
-                
-                self._local_memory[usuario_id].insert(0, message.to_dict())
-                self._local_memory[usuario_id] = self._local_memory[usuario_id][:self.max_messages]
+                historico: Deque[Dict] = self._local_memory.get(usuario_id) or deque(maxlen=self.max_messages)
+                historico.appendleft(message.to_dict())
+                # Reatribuir renova o TTL do usuário no store
+                self._local_memory[usuario_id] = historico
                 
                 logger.debug(f"💾 Mensagem salva em memória local (fallback) para {usuario_id}")
                 self.stats['fallback_uses'] += 1
@@ -188,17 +210,18 @@ class ConversationMemory:
         """
         try:
             limit = max_messages if max_messages is not None else self.max_messages
+            if limit <= 0:
+                return []
             
             # Tentar buscar no Redis primeiro
             if self.redis_client:
                 try:
-                    key = f"conv:{usuario_id}"
-                    messages_data = await self._redis_get_list(key)
+                    messages_data = await self._redis_range(self._key(usuario_id), limit)
                     
                     if messages_data:
                         messages = [
                             ConversationMessage.from_dict(msg)
-                            for msg in messages_data[:limit]
+                            for msg in messages_data
                         ]
                         
                         logger.debug(f"📖 Recuperadas {len(messages)} mensagens do Redis para {usuario_id}")
@@ -213,11 +236,11 @@ class ConversationMemory:
                         return []
             
             # Fallback: memória local
-            if self.use_fallback and usuario_id in self._local_memory:
-                messages_data = self._local_memory[usuario_id][:limit]
+            historico = self._local_memory.get(usuario_id) if self.use_fallback else None
+            if historico:
                 messages = [
                     ConversationMessage.from_dict(msg)
-                    for msg in messages_data
+                    for msg in list(historico)[:limit]
                 ]
                 
                 logger.debug(f"📖 Recuperadas {len(messages)} mensagens da memória local (fallback)")
@@ -290,15 +313,13 @@ class ConversationMemory:
             # Limpar do Redis
             if self.redis_client:
                 try:
-                    key = f"conv:{usuario_id}"
-                    await self._redis_delete(key)
+                    await self.redis_client.delete(self._key(usuario_id))
                     logger.info(f"🗑️ Histórico limpo do Redis para {usuario_id}")
                 except Exception as e:
                     logger.warning(f"⚠️ Erro ao limpar Redis: {e}")
             
             # Limpar memória local
-            if usuario_id in self._local_memory:
-                del self._local_memory[usuario_id]
+            if self._local_memory.pop(usuario_id, None) is not None:
                 logger.info(f"🗑️ Histórico limpo da memória local para {usuario_id}")
             
             return True
@@ -313,64 +334,28 @@ class ConversationMemory:
         stats['redis_available'] = self.redis_client is not None
         stats['fallback_enabled'] = self.use_fallback
         stats['local_memory_users'] = len(self._local_memory)
+        stats['local_memory_store'] = self._local_memory.get_stats()
         
         return stats
     
-    # Métodos auxiliares para Redis
+    async def close(self) -> None:
+        """Fecha o cliente Redis criado a partir de redis_url."""
+        if self._owns_client and self.redis_client is not None:
+            await self.redis_client.aclose()
+            self.redis_client = None
     
-    async def _redis_get_list(self, key: str) -> List[Dict]:
-        """Busca lista do Redis."""
-        if not self.redis_client:
-            return []
-        
-        try:
-            # Para redis síncrono
-            if hasattr(self.redis_client, 'get'):
-                data = self.redis_client.get(key)
-            # Para redis assíncrono
-            else:
-                data = await self.redis_client.get(key)
-            
-            if data:
-                return json.loads(data)
-            return []
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao buscar do Redis: {e}")
-            return []
+    # Métodos auxiliares para Redis
     
-    async def _redis_set_list(self, key: str, data: List[Dict]) -> bool:
-        """Salva lista no Redis."""
-        if not self.redis_client:
-            return False
-        
+    async def _redis_push(self, key: str, message: Dict) -> None:
+        """Insere a mensagem no início da lista, corta no limite e renova o TTL (MULTI/EXEC)."""
         # Não capturar exceções aqui - deixar propagar para o chamador
-        json_data = json.dumps(data, ensure_ascii=False)
-        
-        # Para redis síncrono
-        if hasattr(self.redis_client, 'setex'):
-            self.redis_client.setex(key, self.ttl_seconds, json_data)
-        # Para redis assíncrono
-        else:
-            await self.redis_client.setex(key, self.ttl_seconds, json_data)
-        
-        return True
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.lpush(key, json.dumps(message, ensure_ascii=False))
+            pipe.ltrim(key, 0, self.max_messages - 1)
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
     
-    async def _redis_delete(self, key: str) -> bool:
-        """Remove chave do Redis."""
-        if not self.redis_client:
-            return False
-        
-        try:
-            # Para redis síncrono
-            if hasattr(self.redis_client, 'delete'):
-                self.redis_client.delete(key)
-            # Para redis assíncrono
-            else:
-                await self.redis_client.delete(key)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao deletar do Redis: {e}")
-            return False
+    async def _redis_range(self, key: str, limit: int) -> List[Dict]:
+        """Busca as `limit` mensagens mais recentes da lista."""
+        items = await self.redis_client.lrange(key, 0, limit - 1)
+        return [json.loads(item) for item in items]
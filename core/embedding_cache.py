@@ -0,0 +1,357 @@
+"""
+Serviço de Embeddings com Cache para Neoson.
+
+Centraliza todas as chamadas de embedding da aplicação atrás de um cache
+endereçado por conteúdo, chaveado por (modelo, texto normalizado):
+
+- Camada 1: LRU em memória do processo (sempre ativa)
+- Camada 2: Redis opcional (compartilhado entre workers, com TTL)
+
+`CachedEmbeddings` expõe a mesma interface do `OpenAIEmbeddings` do LangChain
+(embed_query, embed_documents, aembed_query, aembed_documents), então pode
+ser usado como substituto direto nos agentes.
+"""
+
+import asyncio
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from langchain_openai import OpenAIEmbeddings
+
+from core.config import config
+from core.llm_clients import openai_http_clients
+
+# Redis é opcional (camada L2)
+try:
+    import redis
+    import redis.asyncio as redis_async
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+    redis_async = None
+
+logger = config.get_logger("EmbeddingCache")
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Normaliza o texto para a chave do cache.
+
+    Aplica NFC e colapsa espaços em branco; caixa e acentuação são preservadas
+    porque alteram o embedding gerado.
+    """
+    return " ".join(unicodedata.normalize("NFC", texto or "").split())
+
+
+class CachedEmbeddings:
+    """
+    Wrapper de embeddings com cache LRU em memória e Redis opcional.
+
+    Attributes:
+        model: Nome do modelo de embedding
+        max_entries: Capacidade do LRU em memória
+        ttl_seconds: TTL das entradas no Redis
+    """
+
+    KEY_PREFIX = "emb:"
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        redis_url: Optional[str] = None
+    ):
+        self.model = model or config.openai.embedding_model
+        self.max_entries = max_entries or config.cache.embedding_cache_size
+        self.ttl_seconds = ttl_seconds or config.cache.embedding_cache_ttl
+
+        self._client = OpenAIEmbeddings(
+            api_key=api_key or config.openai.api_key,
+            model=self.model,
+            **openai_http_clients()
+        )
+
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Redis opcional
+        redis_url = redis_url if redis_url is not None else config.cache.redis_url
+        self._redis = None
+        self._redis_async = None
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                self._redis = redis.Redis.from_url(redis_url)
+                self._redis_async = redis_async.Redis.from_url(redis_url)
+                logger.info(f"✅ Cache de embeddings com Redis habilitado ({self.model})")
+            except Exception as e:
+                logger.warning(f"⚠️ Redis indisponível para cache de embeddings: {e}")
+                self._redis = None
+                self._redis_async = None
+
+        self.stats = {
+            "hits_memory": 0,
+            "hits_redis": 0,
+            "misses": 0,
+            "redis_errors": 0
+        }
+
+    # ========================================================================
+    # CHAVES E SERIALIZAÇÃO
+    # ========================================================================
+
+    def _key(self, texto: str) -> str:
+        digest = hashlib.sha256(f"{self.model}\x00{normalizar_texto(texto)}".encode("utf-8")).hexdigest()
+        return f"{self.KEY_PREFIX}{digest}"
+
+    @staticmethod
+    def _encode(vetor: List[float]) -> bytes:
+        return array("f", vetor).tobytes()
+
+    @staticmethod
+    def _decode(raw: bytes) -> List[float]:
+        valores = array("f")
+        valores.frombytes(raw)
+        return valores.tolist()
+
+    # ========================================================================
+    # CAMADA L1 (memória)
+    # ========================================================================
+
+    def _lru_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vetor = self._lru.get(key)
+            if vetor is not None:
+                self._lru.move_to_end(key)
+                self.stats["hits_memory"] += 1
+            return vetor
+
+    def _lru_set(self, key: str, vetor: List[float]) -> None:
+        with self._lock:
+            self._lru[key] = vetor
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    # ========================================================================
+    # CAMADA L2 (Redis)
+    # ========================================================================
+
+    def _redis_get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not self._redis or not keys:
+            return [None] * len(keys)
+        try:
+            return self._redis.mget(keys)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"⚠️ Erro ao ler embeddings do Redis: {e}")
+            return [None] * len(keys)
+
+    def _redis_set_many(self, items: Dict[str, List[float]]) -> None:
+        if not self._redis or not items:
+            return
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for key, vetor in items.items():
+                pipe.setex(key, self.ttl_seconds, self._encode(vetor))
+            pipe.execute()
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"⚠️ Erro ao gravar embeddings no Redis: {e}")
+
+    async def _aredis_get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not self._redis_async or not keys:
+            return [None] * len(keys)
+        try:
+            return await self._redis_async.mget(keys)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"⚠️ Erro ao ler embeddings do Redis (ASYNC): {e}")
+            return [None] * len(keys)
+
+    async def _aredis_set_many(self, items: Dict[str, List[float]]) -> None:
+        if not self._redis_async or not items:
+            return
+        try:
+            pipe = self._redis_async.pipeline(transaction=False)
+            for key, vetor in items.items():
+                pipe.setex(key, self.ttl_seconds, self._encode(vetor))
+            await pipe.execute()
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"⚠️ Erro ao gravar embeddings no Redis (ASYNC): {e}")
+
+    # ========================================================================
+    # INTERFACE SÍNCRONA
+    # ========================================================================
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Gera embeddings para vários textos, chamando a API só para os ausentes do cache."""
+        keys = [self._key(texto) for texto in texts]
+        resultados: List[Optional[List[float]]] = [self._lru_get(key) for key in keys]
+
+        pendentes = [i for i, vetor in enumerate(resultados) if vetor is None]
+        if pendentes:
+            brutos = self._redis_get_many([keys[i] for i in pendentes])
+            for i, raw in zip(pendentes, brutos):
+                if raw:
+                    vetor = self._decode(raw)
+                    resultados[i] = vetor
+                    self._lru_set(keys[i], vetor)
+                    self.stats["hits_redis"] += 1
+
+        # Deduplicar textos repetidos dentro do mesmo lote
+        faltantes: Dict[str, str] = {}
+        for i, vetor in enumerate(resultados):
+            if vetor is None:
+                faltantes.setdefault(keys[i], texts[i])
+
+        if faltantes:
+            self.stats["misses"] += len(faltantes)
+            vetores = self._client.embed_documents(list(faltantes.values()))
+            novos = dict(zip(faltantes.keys(), vetores))
+            for key, vetor in novos.items():
+                self._lru_set(key, vetor)
+            self._redis_set_many(novos)
+            resultados = [vetor if vetor is not None else novos[keys[i]] for i, vetor in enumerate(resultados)]
+
+        return resultados
+
+    def embed_query(self, text: str) -> List[float]:
+        """Gera o embedding de um texto usando o cache."""
+        return self.embed_documents([text])[0]
+
+    # ========================================================================
+    # INTERFACE ASSÍNCRONA
+    # ========================================================================
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Versão assíncrona de embed_documents (deduplica chamadas concorrentes em voo)."""
+        keys = [self._key(texto) for texto in texts]
+        resultados: List[Optional[List[float]]] = [self._lru_get(key) for key in keys]
+
+        pendentes = [i for i, vetor in enumerate(resultados) if vetor is None]
+        if pendentes:
+            brutos = await self._aredis_get_many([keys[i] for i in pendentes])
+            for i, raw in zip(pendentes, brutos):
+                if raw:
+                    vetor = self._decode(raw)
+                    resultados[i] = vetor
+                    self._lru_set(keys[i], vetor)
+                    self.stats["hits_redis"] += 1
+
+        loop = asyncio.get_running_loop()
+        faltantes: Dict[str, str] = {}
+        aguardando: Dict[str, asyncio.Future] = {}
+        for i, vetor in enumerate(resultados):
+            if vetor is not None:
+                continue
+            futuro = self._inflight.get(keys[i])
+            if futuro is not None and futuro.get_loop() is loop:
+                aguardando[keys[i]] = futuro
+            else:
+                faltantes.setdefault(keys[i], texts[i])
+
+        novos: Dict[str, List[float]] = {}
+        if faltantes:
+            meus_futuros = {key: loop.create_future() for key in faltantes}
+            self._inflight.update(meus_futuros)
+            self.stats["misses"] += len(faltantes)
+            try:
+                vetores = await self._client.aembed_documents(list(faltantes.values()))
+                novos = dict(zip(faltantes.keys(), vetores))
+                for key, vetor in novos.items():
+                    self._lru_set(key, vetor)
+                    meus_futuros[key].set_result(vetor)
+            except Exception as e:
+                for futuro in meus_futuros.values():
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                        futuro.exception()  # evita "exception was never retrieved"
+                raise
+            finally:
+                # Dono cancelado (ex.: cliente desconectou): liberar quem aguarda
+                for key, futuro in meus_futuros.items():
+                    if not futuro.done():
+                        futuro.cancel()
+                    self._inflight.pop(key, None)
+            await self._aredis_set_many(novos)
+
+        refazer: Dict[str, str] = {}
+        for key, futuro in aguardando.items():
+            try:
+                # shield: o cancelamento deste waiter não cancela o futuro compartilhado
+                novos[key] = await asyncio.shield(futuro)
+            except asyncio.CancelledError:
+                if not futuro.cancelled():
+                    raise
+                # A requisição dona foi cancelada: gerar o embedding aqui
+                refazer[key] = texts[keys.index(key)]
+        if refazer:
+            vetores = await self.aembed_documents(list(refazer.values()))
+            novos.update(zip(refazer.keys(), vetores))
+
+        return [vetor if vetor is not None else novos[keys[i]] for i, vetor in enumerate(resultados)]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Gera o embedding de um texto de forma assíncrona usando o cache."""
+        return (await self.aembed_documents([text]))[0]
+
+    # ========================================================================
+    # UTILITÁRIOS
+    # ========================================================================
+
+    def warmup(self, texts: List[str]) -> None:
+        """Pré-computa embeddings de textos constantes (uma única chamada em lote)."""
+        try:
+            self.embed_documents(texts)
+            logger.info(f"🔥 {len(texts)} embeddings pré-computados ({self.model})")
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao pré-computar embeddings: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do cache."""
+        total = self.stats["hits_memory"] + self.stats["hits_redis"] + self.stats["misses"]
+        hits = self.stats["hits_memory"] + self.stats["hits_redis"]
+        return {
+            **self.stats,
+            "model": self.model,
+            "entries_memory": len(self._lru),
+            "max_entries": self.max_entries,
+            "redis_enabled": self._redis is not None,
+            "hit_rate": round(hits / total, 3) if total else 0.0
+        }
+
+
+# ============================================================================
+# SINGLETON POR MODELO
+# ============================================================================
+
+_embedding_services: Dict[str, CachedEmbeddings] = {}
+_embedding_services_lock = threading.Lock()
+
+
+def get_embedding_service(model: Optional[str] = None) -> CachedEmbeddings:
+    """
+    Retorna o serviço de embeddings compartilhado para o modelo.
+
+    Args:
+        model: Modelo de embedding (default: config.openai.embedding_model)
+
+    Returns:
+        Instância única de CachedEmbeddings para o modelo
+    """
+    model = model or config.openai.embedding_model
+    with _embedding_services_lock:
+        service = _embedding_services.get(model)
+        if service is None:
+            service = CachedEmbeddings(model=model)
+            _embedding_services[model] = service
+        return service
@@ -0,0 +1,311 @@
+"""
+Agendador de embeddings em lote para a ingestão de conhecimento.
+
+Em vez de enviar os lotes um após o outro (N round-trips em série), o
+agendador mantém vários lotes em voo ao mesmo tempo, limitados por:
+
+- número máximo de requisições simultâneas;
+- orçamento de tokens por minuto (TPM) e requisições por minuto (RPM);
+- pausa global quando o provedor responde 429 (respeitando Retry-After).
+
+Falhas transitórias (429, 5xx, timeout, conexão) devolvem os chunks do lote
+para uma fila de retentativa com backoff exponencial; um erro definitivo
+(ex.: 400 por um chunk inválido) reenvia os chunks do lote um a um, isolando
+o culpado. Só recebe `None` o chunk que esgotou as tentativas.
+
+    agendador = EmbeddingBatchScheduler(lambda textos: [...vetores...])
+    vetores = agendador.embed(chunks, progresso=lambda feitos, total: ...)
+
+Os orçamentos valem por processo: com vários workers do gunicorn, configure
+INGESTION_EMBEDDING_TPM/RPM como a cota da chave dividida pelos workers.
+"""
+
+import heapq
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from core.config import config
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken ausente ou sem acesso ao arquivo de encoding
+    _ENCODING = None
+
+try:
+    from openai import APIConnectionError
+except ImportError:
+    APIConnectionError = ConnectionError
+
+logger = config.get_logger("EmbeddingScheduler")
+
+# Limites da API de embeddings por requisição
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300_000
+
+_JANELA = 60.0
+_BACKOFF_BASE = 1.0
+_BACKOFF_MAX = 60.0
+
+
+def contar_tokens(texto: str) -> int:
+    """Tokens do texto (tiktoken, ou estimativa de ~4 caracteres por token)."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(texto, disallowed_special=()))
+    return max(1, len(texto) // 4)
+
+
+class RateBudget:
+    """Janela deslizante de 60s para tokens e requisições por minuto (thread-safe)."""
+
+    def __init__(self, tokens_per_minute: int, requests_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self._eventos: Deque[Tuple[float, int]] = deque()
+        self._tokens = 0
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def _liberar(self, now: float) -> None:
+        while self._eventos and self._eventos[0][0] <= now - _JANELA:
+            _, tokens = self._eventos.popleft()
+            self._tokens -= tokens
+
+    def acquire(self, tokens: int) -> None:
+        """Bloqueia até a requisição caber no orçamento e a reserva."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._liberar(now)
+                cabe_tokens = self.tokens_per_minute <= 0 or self._tokens + tokens <= self.tokens_per_minute
+                cabe_req = self.requests_per_minute <= 0 or len(self._eventos) < self.requests_per_minute
+                if now >= self._pausado_ate and cabe_tokens and cabe_req:
+                    self._eventos.append((now, tokens))
+                    self._tokens += tokens
+                    return
+                espera = self._pausado_ate - now
+                if self._eventos and not (cabe_tokens and cabe_req):
+                    espera = max(espera, self._eventos[0][0] + _JANELA - now)
+            time.sleep(min(max(espera, 0.05), _JANELA))
+
+    def pause(self, seconds: float) -> None:
+        """Suspende novas requisições (ex.: após um 429)."""
+        with self._lock:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + seconds)
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    return getattr(exc, "status_code", None)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    status = _status_code(exc)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return isinstance(exc, (APIConnectionError, TimeoutError, ConnectionError))
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Segundos indicados pelo provedor no cabeçalho Retry-After, se houver."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    valor = headers.get("retry-after-ms")
+    if valor:
+        try:
+            return float(valor) / 1000
+        except ValueError:
+            pass
+    valor = headers.get("retry-after")
+    if valor:
+        try:
+            return float(valor)
+        except ValueError:
+            pass
+    return None
+
+
+class EmbeddingBatchScheduler:
+    """Envia lotes de embeddings em paralelo dentro dos limites do provedor."""
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        batch_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        """
+        Args:
+            embed_fn: Função síncrona que recebe textos e devolve os vetores na mesma ordem
+                (sem retentativas próprias: o agendador cuida delas)
+            batch_size: Máximo de chunks por requisição (padrão: INGESTION_EMBEDDING_BATCH_SIZE)
+            max_in_flight: Requisições simultâneas (padrão: INGESTION_EMBEDDING_MAX_IN_FLIGHT)
+            tokens_per_minute: Orçamento de tokens; 0 desativa (padrão: INGESTION_EMBEDDING_TPM)
+            requests_per_minute: Orçamento de requisições; 0 desativa (padrão: INGESTION_EMBEDDING_RPM)
+            max_retries: Tentativas extras por chunk (padrão: INGESTION_EMBEDDING_MAX_RETRIES)
+        """
+        cfg = config.ingestion
+        self.embed_fn = embed_fn
+        self.batch_size = min(batch_size or cfg.embedding_batch_size, MAX_INPUTS_PER_REQUEST)
+        self.max_in_flight = max(1, max_in_flight or cfg.embedding_max_in_flight)
+        self.max_retries = max_retries if max_retries is not None else cfg.embedding_max_retries
+        self.budget = RateBudget(
+            tokens_per_minute if tokens_per_minute is not None else cfg.embedding_tpm,
+            requests_per_minute if requests_per_minute is not None else cfg.embedding_rpm
+        )
+        self.max_tokens_per_batch = MAX_TOKENS_PER_REQUEST
+        if self.budget.tokens_per_minute > 0:
+            self.max_tokens_per_batch = min(self.max_tokens_per_batch, self.budget.tokens_per_minute)
+
+        # Pool compartilhado entre jobs simultâneos: limita as requisições do processo
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embeddings")
+
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failed_chunks": 0
+        }
+        self._stats_lock = threading.Lock()
+
+    def _contar(self, campo: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[campo] += n
+
+    def _proximo_lote(
+        self,
+        pendentes: Deque[int],
+        isolados: Set[int],
+        tokens: List[int]
+    ) -> List[int]:
+        """Monta o próximo lote respeitando tamanho e tokens por requisição."""
+        primeiro = pendentes.popleft()
+        lote = [primeiro]
+        if primeiro in isolados:
+            return lote
+        total = tokens[primeiro]
+        while pendentes and len(lote) < self.batch_size:
+            idx = pendentes[0]
+            if idx in isolados or total + tokens[idx] > self.max_tokens_per_batch:
+                break
+            lote.append(pendentes.popleft())
+            total += tokens[idx]
+        return lote
+
+    def _backoff(self, tentativa: int) -> float:
+        espera = min(_BACKOFF_BASE * 2 ** (tentativa - 1), _BACKOFF_MAX)
+        return espera * (0.5 + random.random() / 2)
+
+    def embed(
+        self,
+        textos: List[str],
+        progresso: Optional[Callable[[int, int], None]] = None,
+        ao_concluir_lote: Optional[Callable[[List[int], List[List[float]]], None]] = None
+    ) -> List[Optional[List[float]]]:
+        """
+        Gera os embeddings de todos os textos (bloqueante).
+
+        Args:
+            textos: Textos a embedar
+            progresso: Callback (chunks concluídos, total) chamado a cada lote concluído
+            ao_concluir_lote: Callback (índices, vetores) com cada lote bem-sucedido,
+                na ordem de conclusão (permite gravar sem esperar o documento inteiro)
+
+        Returns:
+            Vetores na ordem dos textos; `None` para chunks que esgotaram as tentativas
+        """
+        total = len(textos)
+        # Garantir que não há textos vazios
+        entradas = [texto if texto.strip() else " " for texto in textos]
+        tokens = [contar_tokens(texto) for texto in entradas]
+        vetores: List[Optional[List[float]]] = [None] * total
+
+        pendentes: Deque[int] = deque(range(total))
+        retentativas: List[Tuple[float, int]] = []  # heap (pronto_em, índice)
+        tentativas: Dict[int, int] = {}
+        isolados: Set[int] = set()
+        em_voo: Dict[Future, List[int]] = {}
+        concluidos = 0
+
+        def finalizar(indices: List[int]) -> None:
+            nonlocal concluidos
+            concluidos += len(indices)
+            if progresso:
+                progresso(concluidos, total)
+
+        while pendentes or retentativas or em_voo:
+            now = time.monotonic()
+            while retentativas and retentativas[0][0] <= now:
+                pendentes.append(heapq.heappop(retentativas)[1])
+
+            while pendentes and len(em_voo) < self.max_in_flight:
+                lote = self._proximo_lote(pendentes, isolados, tokens)
+                self.budget.acquire(sum(tokens[i] for i in lote))
+                futuro = self._executor.submit(self.embed_fn, [entradas[i] for i in lote])
+                em_voo[futuro] = lote
+                self._contar("requests")
+
+            if not em_voo:
+                # Só há retentativas agendadas: esperar a próxima ficar pronta
+                time.sleep(max(retentativas[0][0] - time.monotonic(), 0.0))
+                continue
+
+            timeout = max(retentativas[0][0] - time.monotonic(), 0.0) if retentativas else None
+            prontos, _ = wait(list(em_voo), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for futuro in prontos:
+                lote = em_voo.pop(futuro)
+                try:
+                    resultado = futuro.result()
+                    if len(resultado) != len(lote):
+                        raise ValueError(f"{len(resultado)} vetores para {len(lote)} textos")
+                except Exception as e:
+                    if not _is_retryable(e) and len(lote) > 1:
+                        # Erro definitivo: reenviar um a um para isolar o chunk inválido
+                        logger.warning(f"⚠️ Lote de {len(lote)} chunks rejeitado ({e}); reenviando individualmente")
+                        isolados.update(lote)
+                        pendentes.extendleft(reversed(lote))
+                        continue
+
+                    espera = None
+                    if _status_code(e) == 429:
+                        self._contar("rate_limited")
+                        espera = _retry_after(e) or self._backoff(1)
+                        self.budget.pause(espera)
+
+                    falhos = []
+                    for idx in lote:
+                        tentativas[idx] = tentativas.get(idx, 0) + 1
+                        if not _is_retryable(e) or tentativas[idx] > self.max_retries:
+                            falhos.append(idx)
+                        else:
+                            pronto_em = time.monotonic() + (espera or self._backoff(tentativas[idx]))
+                            heapq.heappush(retentativas, (pronto_em, idx))
+                            self._contar("retries")
+
+                    if falhos:
+                        logger.error(f"❌ Embeddings falharam para {len(falhos)} chunk(s): {e}")
+                        self._contar("failed_chunks", len(falhos))
+                        finalizar(falhos)
+                    if len(falhos) < len(lote):
+                        logger.warning(f"⚠️ {len(lote) - len(falhos)} chunk(s) serão reenviados: {e}")
+                    continue
+
+                for idx, vetor in zip(lote, resultado):
+                    vetores[idx] = vetor
+                if ao_concluir_lote:
+                    ao_concluir_lote(lote, resultado)
+                finalizar(lote)
+
+        return vetores
+
+    def get_stats(self) -> Dict[str, int]:
+        """Contadores de requisições, retentativas, 429s e chunks perdidos."""
+        with self._stats_lock:
+            return dict(self.stats)
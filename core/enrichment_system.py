@@ -13,12 +13,13 @@ Data: 2025-10-09
 """
 
 import asyncio
-import re
 from typing import List, Dict, Any, Optional
 import asyncpg
-from langchain_openai import OpenAIEmbeddings
 
 from core.config import ConfigManager
+from core.embedding_cache import CachedEmbeddings, get_embedding_service
+from core.llm_clients import openai_http_clients
+from core.glossario_corporativo import FONTE_TECNICO, GLOSSARIO_TECNICO, get_glossary_matcher
 
 
 class ResponseEnricher:
@@ -27,10 +28,7 @@ class ResponseEnricher:
     def __init__(self, config: ConfigManager, db_pool: asyncpg.Pool):
         self.config = config
         self.db_pool = db_pool
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            openai_api_key=config.openai.api_key
-        )
+        self.embeddings = get_embedding_service(config.openai.embedding_model)
         
         # Mapeamento de especialistas por área
         self.especialistas_map = {
@@ -70,26 +68,8 @@ class ResponseEnricher:
             }
         }
         
-        # Termos técnicos comuns e suas definições
-        self.glossario_base = {
-            'LGPD': 'Lei Geral de Proteção de Dados - Legislação brasileira que regula o tratamento de dados pessoais',
-            'ISO 27001': 'Norma internacional para gestão de segurança da informação',
-            'FDA CFR 21 Part 11': 'Regulamentação americana sobre assinaturas e registros eletrônicos',
-            'RDC ANVISA': 'Resolução da Diretoria Colegiada da Agência Nacional de Vigilância Sanitária',
-            'RAG': 'Retrieval-Augmented Generation - Técnica que combina busca de documentos com geração de texto',
-            'Embedding': 'Representação vetorial de texto que captura significado semântico',
-            'API': 'Application Programming Interface - Interface para comunicação entre sistemas',
-            'Cloud': 'Computação em nuvem - Recursos de TI acessados via internet',
-            'Backup': 'Cópia de segurança de dados para recuperação em caso de perda',
-            'Deploy': 'Processo de colocar uma aplicação em produção',
-            'CI/CD': 'Continuous Integration/Continuous Deployment - Automação de integração e deploy',
-            'VPN': 'Virtual Private Network - Rede privada virtual para acesso seguro',
-            'MFA': 'Multi-Factor Authentication - Autenticação com múltiplos fatores',
-            'SLA': 'Service Level Agreement - Acordo de nível de serviço',
-            'ABNT': 'Associação Brasileira de Normas Técnicas',
-            'Compliance': 'Conformidade com normas, leis e regulamentações',
-            'Governança': 'Conjunto de práticas para gestão e controle de recursos de TI'
-        }
+        # Termos técnicos comuns e suas definições (matcher compartilhado com o Neoson)
+        self.glossario_base = GLOSSARIO_TECNICO
     
     async def enrich(
         self, 
@@ -145,8 +125,8 @@ class ResponseEnricher:
             if not base_conhecimento:
                 return []
             
-            # Gerar embedding da pergunta
-            pergunta_embedding = self.embeddings.embed_query(pergunta)
+            # Gerar embedding da pergunta (cache compartilhado com os agentes)
+            pergunta_embedding = await self.embeddings.aembed_query(pergunta)
             
             # Buscar documentos similares (diferentes dos já usados na resposta)
             query = f"""
@@ -193,8 +173,8 @@ class ResponseEnricher:
     async def _get_similar_faqs(self, pergunta: str) -> List[Dict[str, str]]:
         """Busca FAQs similares já respondidas anteriormente"""
         try:
-            # Gerar embedding da pergunta
-            pergunta_embedding = self.embeddings.embed_query(pergunta)
+            # Gerar embedding da pergunta (cache compartilhado com os agentes)
+            pergunta_embedding = await self.embeddings.aembed_query(pergunta)
             
             # Buscar no histórico de FAQs (tabela que será criada)
             query = """
@@ -296,7 +276,8 @@ class ResponseEnricher:
             llm = ChatOpenAI(
                 model="gpt-4o-mini",
                 temperature=0.7,
-                openai_api_key=self.config.openai.api_key
+                openai_api_key=self.config.openai.api_key,
+                **openai_http_clients()
             )
             
             prompt = f"""Com base na pergunta e resposta abaixo, gere 3 perguntas relacionadas que o usuário pode querer fazer em seguida.
@@ -348,34 +329,8 @@ FORMATO: Retorne apenas as 3 perguntas, uma por linha, sem numeração ou marcad
     async def _extract_glossary(self, resposta: str) -> Dict[str, str]:
         """Extrai e define termos técnicos mencionados na resposta"""
         try:
-            glossary = {}
-            
-            # Buscar termos do glossário base que aparecem na resposta
-            resposta_upper = resposta.upper()
-            
-            for termo, definicao in self.glossario_base.items():
-                termo_upper = termo.upper()
-                # Buscar o termo como palavra completa (word boundary)
-                pattern = r'\b' + re.escape(termo_upper) + r'\b'
-                if re.search(pattern, resposta_upper):
-                    glossary[termo] = definicao
-            
-            # Ordenar por ordem de aparição na resposta
-            glossary_sorted = {}
-            for termo in glossary.keys():
-                pos = resposta_upper.find(termo.upper())
-                glossary_sorted[termo] = (pos, glossary[termo])
-            
-            # Retornar ordenado e sem a posição
-            result = {
-                termo: definicao 
-                for termo, (pos, definicao) in sorted(
-                    glossary_sorted.items(), 
-                    key=lambda x: x[1][0]
-                )
-            }
-            
-            return result
+            # Uma única passada do autômato; termos já vêm na ordem de aparição
+            return dict(get_glossary_matcher().termos_no_texto(resposta, fonte=FONTE_TECNICO))
             
         except Exception as e:
             print(f"❌ Erro ao extrair glossário: {e}")
@@ -414,7 +369,7 @@ async def create_faqs_table(db_pool: asyncpg.Pool):
 
 async def save_faq(
     db_pool: asyncpg.Pool,
-    embeddings: OpenAIEmbeddings,
+    embeddings: CachedEmbeddings,
     pergunta: str,
     resposta: str,
     agente_usado: str
@@ -422,7 +377,7 @@ async def save_faq(
     """Salva uma FAQ no histórico"""
     try:
         # Gerar embedding
-        pergunta_embedding = embeddings.embed_query(pergunta)
+        pergunta_embedding = await embeddings.aembed_query(pergunta)
         
         # Criar resposta curta (primeiros 200 chars)
         resposta_curta = resposta[:200] + ('...' if len(resposta) > 200 else '')
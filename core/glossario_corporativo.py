@@ -1,6 +1,10 @@
 # 📚 GLOSSÁRIO CORPORATIVO STRAUMANN GROUP
 # Jargões e termos internos da empresa
 
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
 GLOSSARIO_CORPORATIVO = {
     # Sistemas e Ferramentas
     "SAP": "Sistema integrado de gestão empresarial usado para RH, Finanças e Operações",
@@ -130,6 +134,217 @@ GLOSSARIO_CORPORATIVO = {
 }
 
 
+# 🛠️ GLOSSÁRIO TÉCNICO (usado no enriquecimento das respostas)
+GLOSSARIO_TECNICO = {
+    'LGPD': 'Lei Geral de Proteção de Dados - Legislação brasileira que regula o tratamento de dados pessoais',
+    'ISO 27001': 'Norma internacional para gestão de segurança da informação',
+    'FDA CFR 21 Part 11': 'Regulamentação americana sobre assinaturas e registros eletrônicos',
+    'RDC ANVISA': 'Resolução da Diretoria Colegiada da Agência Nacional de Vigilância Sanitária',
+    'RAG': 'Retrieval-Augmented Generation - Técnica que combina busca de documentos com geração de texto',
+    'Embedding': 'Representação vetorial de texto que captura significado semântico',
+    'API': 'Application Programming Interface - Interface para comunicação entre sistemas',
+    'Cloud': 'Computação em nuvem - Recursos de TI acessados via internet',
+    'Backup': 'Cópia de segurança de dados para recuperação em caso de perda',
+    'Deploy': 'Processo de colocar uma aplicação em produção',
+    'CI/CD': 'Continuous Integration/Continuous Deployment - Automação de integração e deploy',
+    'VPN': 'Virtual Private Network - Rede privada virtual para acesso seguro',
+    'MFA': 'Multi-Factor Authentication - Autenticação com múltiplos fatores',
+    'SLA': 'Service Level Agreement - Acordo de nível de serviço',
+    'ABNT': 'Associação Brasileira de Normas Técnicas',
+    'Compliance': 'Conformidade com normas, leis e regulamentações',
+    'Governança': 'Conjunto de práticas para gestão e controle de recursos de TI'
+}
+
+FONTE_CORPORATIVO = "corporativo"
+FONTE_TECNICO = "tecnico"
+
+
+# ============================================================================
+# MATCHER MULTI-PADRÃO (Aho-Corasick)
+# ============================================================================
+
+def normalizar_termo(texto: str) -> str:
+    """
+    Normaliza texto para comparação de termos: sem acentos, casefold e
+    espaços colapsados ("Férias  Coletivas" -> "ferias coletivas").
+    """
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+def _eh_caractere_de_palavra(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+class GlossaryMatcher:
+    """
+    Autômato Aho-Corasick sobre os termos normalizados dos glossários.
+    
+    Encontra todos os termos de um texto em uma única passada (custo linear
+    no tamanho do texto, independente do tamanho do glossário), respeitando
+    limites de palavra. Instâncias são imutáveis: mudanças no glossário geram
+    um novo matcher, trocado atomicamente (ver `recarregar_glossario`).
+    """
+
+    def __init__(self, glossarios: Dict[str, Dict[str, str]]):
+        """
+        Args:
+            glossarios: {fonte: {termo: definicao}} (ex.: corporativo, tecnico)
+        """
+        # Entradas por termo normalizado: [(fonte, termo original, definição)]
+        self.entradas: Dict[str, List[Tuple[str, str, str]]] = {}
+        for fonte, glossario in glossarios.items():
+            for termo, definicao in glossario.items():
+                chave = normalizar_termo(termo)
+                if chave:
+                    self.entradas.setdefault(chave, []).append((fonte, termo, definicao))
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._saida: List[List[str]] = [[]]
+        self._construir(self.entradas.keys())
+
+    def _construir(self, padroes: Iterable[str]) -> None:
+        # Trie
+        for padrao in padroes:
+            estado = 0
+            for c in padrao:
+                proximo = self._goto[estado].get(c)
+                if proximo is None:
+                    proximo = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._saida.append([])
+                    self._goto[estado][c] = proximo
+                estado = proximo
+            self._saida[estado].append(padrao)
+
+        # Links de falha (BFS)
+        fila = list(self._goto[0].values())
+        inicio = 0
+        while inicio < len(fila):
+            estado = fila[inicio]
+            inicio += 1
+            for c, filho in self._goto[estado].items():
+                fila.append(filho)
+                falha = self._fail[estado]
+                while falha and c not in self._goto[falha]:
+                    falha = self._fail[falha]
+                destino = self._goto[falha].get(c, 0)
+                self._fail[filho] = destino if destino != filho else 0
+                self._saida[filho] = self._saida[filho] + self._saida[self._fail[filho]]
+
+    def encontrar(self, texto: str) -> List[Tuple[int, str]]:
+        """
+        Retorna todas as ocorrências (posição, termo normalizado) em palavras completas.
+        
+        As posições referem-se ao texto normalizado e servem para ordenação.
+        """
+        alvo = normalizar_termo(texto)
+        ocorrencias: List[Tuple[int, str]] = []
+        estado = 0
+        goto, fail, saida = self._goto, self._fail, self._saida
+
+        for fim, c in enumerate(alvo):
+            while estado and c not in goto[estado]:
+                estado = fail[estado]
+            estado = goto[estado].get(c, 0)
+            for padrao in saida[estado]:
+                inicio = fim - len(padrao) + 1
+                if inicio > 0 and _eh_caractere_de_palavra(alvo[inicio - 1]):
+                    continue
+                if fim + 1 < len(alvo) and _eh_caractere_de_palavra(alvo[fim + 1]):
+                    continue
+                ocorrencias.append((inicio, padrao))
+
+        ocorrencias.sort()
+        return ocorrencias
+
+    def termos_no_texto(self, texto: str, fonte: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Retorna [(termo original, definição)] presentes no texto, sem repetição,
+        na ordem da primeira ocorrência.
+        
+        Args:
+            texto: Texto a analisar
+            fonte: Restringe a um glossário (ex.: FONTE_CORPORATIVO)
+        """
+        encontrados: List[Tuple[str, str]] = []
+        vistos = set()
+        for _, chave in self.encontrar(texto):
+            if chave in vistos:
+                continue
+            vistos.add(chave)
+            for fonte_entrada, termo, definicao in self.entradas[chave]:
+                if fonte is None or fonte_entrada == fonte:
+                    encontrados.append((termo, definicao))
+                    break
+        return encontrados
+
+    def definicao(self, termo: str, fonte: Optional[str] = None) -> Optional[str]:
+        """Busca a definição de um termo (sem diferenciar caixa/acentos)."""
+        for fonte_entrada, _, definicao in self.entradas.get(normalizar_termo(termo), []):
+            if fonte is None or fonte_entrada == fonte:
+                return definicao
+        return None
+
+
+_matcher: Optional[GlossaryMatcher] = None
+_matcher_assinatura: Optional[Tuple[int, int]] = None
+_matcher_lock = threading.Lock()
+
+
+def _assinatura_glossarios() -> Tuple[int, int]:
+    return (len(GLOSSARIO_CORPORATIVO), len(GLOSSARIO_TECNICO))
+
+
+def recarregar_glossario() -> GlossaryMatcher:
+    """Reconstrói o matcher a partir dos glossários e o publica atomicamente."""
+    global _matcher, _matcher_assinatura
+    with _matcher_lock:
+        novo = GlossaryMatcher({
+            FONTE_CORPORATIVO: dict(GLOSSARIO_CORPORATIVO),
+            FONTE_TECNICO: dict(GLOSSARIO_TECNICO),
+        })
+        _matcher, _matcher_assinatura = novo, _assinatura_glossarios()
+        return novo
+
+
+def get_glossary_matcher() -> GlossaryMatcher:
+    """
+    Retorna o matcher compartilhado (NeosonAsync e ResponseEnricher).
+    
+    É reconstruído se o número de termos mudar; para edições que mantêm o
+    tamanho, use `atualizar_glossario` ou `recarregar_glossario`.
+    """
+    matcher = _matcher
+    if matcher is None or _matcher_assinatura != _assinatura_glossarios():
+        matcher = recarregar_glossario()
+    return matcher
+
+
+def atualizar_glossario(
+    termos: Dict[str, str],
+    fonte: str = FONTE_CORPORATIVO,
+    substituir: bool = False
+) -> GlossaryMatcher:
+    """
+    Atualiza um glossário e troca o matcher atomicamente.
+    
+    Args:
+        termos: {termo: definicao}
+        fonte: FONTE_CORPORATIVO ou FONTE_TECNICO
+        substituir: Se True, substitui o glossário inteiro
+    """
+    glossario = GLOSSARIO_TECNICO if fonte == FONTE_TECNICO else GLOSSARIO_CORPORATIVO
+    with _matcher_lock:
+        if substituir:
+            glossario.clear()
+        glossario.update(termos)
+    return recarregar_glossario()
+
+
 def get_termo_corporativo(termo: str) -> str:
     """
     Busca a definição de um termo corporativo
@@ -140,18 +355,7 @@ def get_termo_corporativo(termo: str) -> str:
     Returns:
         Definição do termo ou None se não encontrado
     """
-    termo_upper = termo.upper()
-    
-    # Busca exata
-    if termo_upper in GLOSSARIO_CORPORATIVO:
-        return GLOSSARIO_CORPORATIVO[termo_upper]
-    
-    # Busca case-insensitive nas chaves
-    for key, value in GLOSSARIO_CORPORATIVO.items():
-        if key.upper() == termo_upper:
-            return value
-    
-    return None
+    return get_glossary_matcher().definicao(termo, fonte=FONTE_CORPORATIVO)
 
 
 def get_contexto_glossario() -> str:
@@ -208,14 +412,7 @@ def detectar_termos_corporativos(texto: str) -> list:
     Returns:
         Lista de termos corporativos encontrados
     """
-    termos_encontrados = []
-    texto_upper = texto.upper()
-    
-    for termo in GLOSSARIO_CORPORATIVO.keys():
-        # Busca palavra completa (evita matches parciais)
-        if f" {termo.upper()} " in f" {texto_upper} " or \
-           texto_upper.startswith(f"{termo.upper()} ") or \
-           texto_upper.endswith(f" {termo.upper()}"):
-            termos_encontrados.append(termo)
-    
-    return termos_encontrados
+    return [
+        termo
+        for termo, _ in get_glossary_matcher().termos_no_texto(texto, fonte=FONTE_CORPORATIVO)
+    ]
@@ -0,0 +1,449 @@
+"""
+Fila de jobs de ingestão de conhecimento (fora do event loop).
+
+Extração de PDF/DOCX, OCR, chunking, embeddings e gravação no banco são
+bloqueantes e podem levar minutos: o endpoint apenas grava o upload em disco,
+registra o job e responde com o id. Threads de trabalho executam o pipeline
+(a extração de texto roda em um pool de processos, sem disputar o GIL com o
+servidor) e publicam o progresso, que pode ser consultado a qualquer momento.
+
+A fila é durável e local: os jobs ficam em um SQLite em `INGESTION_DATA_DIR`
+(compartilhado por todos os workers do gunicorn na mesma máquina). Cada job em
+execução renova um lease a cada progresso; jobs cujo lease expira (processo
+encerrado no meio da ingestão) voltam para a fila.
+
+    fila = IngestionJobQueue(handler=processar_job)
+    fila.start()
+    job = await fila.submit(upload.file, upload.filename, "knowledge_ti", metadados)
+    fila.get(job.job_id).progress
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+from core.config import config
+
+logger = config.get_logger("IngestionJobs")
+
+
+class JobStatus:
+    """Estados de um job de ingestão."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    ERROR = "error"
+
+
+class IngestionJobError(Exception):
+    """Erro definitivo do job (arquivo inválido, sem texto...): não há nova tentativa."""
+
+
+@dataclass
+class IngestionJob:
+    """Job de ingestão persistido na fila."""
+    job_id: str
+    filename: str
+    file_path: str
+    target_table: str
+    metadata: Dict[str, Any]
+    status: str = JobStatus.QUEUED
+    stage: str = "queued"
+    progress: float = 0.0
+    message: str = ""
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "IngestionJob":
+        dados = dict(row)
+        dados.pop("heartbeat_at", None)
+        dados["metadata"] = json.loads(dados["metadata"])
+        dados["result"] = json.loads(dados["result"]) if dados["result"] else None
+        return cls(**dados)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representação pública (sem o caminho do arquivo em disco)."""
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "target_table": self.target_table,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+
+class JobContext:
+    """Contexto entregue ao handler: progresso (renova o lease) e pool de processos."""
+
+    def __init__(self, queue: "IngestionJobQueue", job: IngestionJob):
+        self._queue = queue
+        self.job = job
+
+    def progress(self, stage: str, fraction: float, message: str = "") -> None:
+        """Publica o progresso do job (0-1) e renova o lease."""
+        self._queue._update_progress(self.job.job_id, stage, max(0.0, min(1.0, fraction)), message)
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """Event loop da aplicação (None se a fila foi iniciada fora de um loop)."""
+        loop = self._queue._loop
+        return loop if loop is not None and not loop.is_closed() else None
+
+    def run_in_process(self, fn: Callable, *args) -> Any:
+        """Executa uma função (picklable) no pool de processos da fila."""
+        pool = self._queue._get_process_pool()
+        if pool is None:
+            return fn(*args)
+        return pool.submit(fn, *args).result()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    job_id       TEXT PRIMARY KEY,
+    filename     TEXT NOT NULL,
+    file_path    TEXT NOT NULL,
+    target_table TEXT NOT NULL,
+    metadata     TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    stage        TEXT NOT NULL,
+    progress     REAL NOT NULL DEFAULT 0,
+    message      TEXT NOT NULL DEFAULT '',
+    result       TEXT,
+    error        TEXT,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs (status, created_at);
+"""
+
+
+class IngestionJobQueue:
+    """
+    Fila durável de jobs de ingestão processada por threads de trabalho.
+
+    Attributes:
+        handler: Função `handler(job, ctx) -> dict` que executa o pipeline
+        workers: Número de threads de trabalho
+        max_attempts: Tentativas por job (falhas inesperadas / lease expirado)
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[IngestionJob, JobContext], Dict[str, Any]],
+        data_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+        process_workers: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        max_attempts: int = 3
+    ):
+        self.handler = handler
+        self.data_dir = data_dir or config.ingestion.data_dir
+        self.workers = max(1, workers or config.ingestion.workers)
+        self.process_workers = process_workers if process_workers is not None else config.ingestion.process_workers
+        self.lease_seconds = lease_seconds or config.ingestion.lease_seconds
+        self.poll_interval = poll_interval or config.ingestion.poll_interval
+        self.max_attempts = max_attempts
+
+        self.db_path = os.path.join(self.data_dir, "jobs.sqlite3")
+        self.spool_dir = os.path.join(self.data_dir, "uploads")
+
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._initialized = False
+
+    # ========================================================================
+    # SQLITE
+    # ========================================================================
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_storage(self) -> None:
+        with self._lock:
+            if self._initialized:
+                return
+            os.makedirs(self.spool_dir, exist_ok=True)
+            conn = self._connect()
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+            finally:
+                conn.close()
+            self._initialized = True
+
+    # ========================================================================
+    # CICLO DE VIDA
+    # ========================================================================
+
+    def start(self) -> None:
+        """
+        Cria o armazenamento e inicia as threads de trabalho (idempotente).
+
+        Chamado de dentro do event loop da aplicação, registra esse loop para que
+        os handlers executem corrotinas nele (ex.: pool asyncpg compartilhado).
+        """
+        self._init_storage()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"ingestion-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"📥 Fila de ingestão iniciada ({self.workers} worker(s), dados em {self.data_dir})")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Sinaliza as threads para parar.
+
+        Jobs em andamento não são interrompidos no meio: se o processo encerrar
+        antes do fim, o lease expira e o job volta para a fila.
+        """
+        self._stop.set()
+        self._wakeup.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+            pool, self._process_pool = self._process_pool, None
+        for thread in threads:
+            thread.join(timeout)
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.process_workers <= 0:
+            return None
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+            return self._process_pool
+
+    # ========================================================================
+    # API
+    # ========================================================================
+
+    async def submit(
+        self,
+        stream: BinaryIO,
+        filename: str,
+        target_table: str,
+        metadata: Dict[str, Any]
+    ) -> IngestionJob:
+        """Grava o upload em disco (fora do event loop) e enfileira o job."""
+        self.start()
+        job_id = uuid.uuid4().hex
+        file_path = os.path.join(self.spool_dir, f"{job_id}{os.path.splitext(filename)[1].lower()}")
+
+        def _spool_e_registrar() -> IngestionJob:
+            with open(file_path, "wb") as destino:
+                shutil.copyfileobj(stream, destino, length=1024 * 1024)
+            job = IngestionJob(
+                job_id=job_id,
+                filename=filename,
+                file_path=file_path,
+                target_table=target_table,
+                metadata=metadata
+            )
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT INTO ingestion_jobs (job_id, filename, file_path, target_table, metadata, "
+                    "status, stage, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.job_id, job.filename, job.file_path, job.target_table,
+                     json.dumps(job.metadata, ensure_ascii=False, default=str),
+                     job.status, job.stage, job.created_at, job.updated_at)
+                )
+            finally:
+                conn.close()
+            return job
+
+        job = await asyncio.to_thread(_spool_e_registrar)
+        self._wakeup.set()
+        logger.info(f"📥 Job de ingestão {job.job_id} enfileirado: {filename} -> {target_table}")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Estado atual de um job (None se não existir)."""
+        self._init_storage()
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM ingestion_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return IngestionJob.from_row(row) if row else None
+
+    def list_jobs(self, limit: int = 50) -> List[IngestionJob]:
+        """Jobs mais recentes primeiro."""
+        self._init_storage()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM ingestion_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [IngestionJob.from_row(row) for row in rows]
+
+    # ========================================================================
+    # WORKERS
+    # ========================================================================
+
+    def _requeue_stale(self, conn: sqlite3.Connection, now: float) -> List[str]:
+        """
+        Devolve à fila os jobs cujo lease expirou (ou falha após max_attempts).
+
+        Returns:
+            Arquivos dos jobs que falharam definitivamente (removidos após o COMMIT)
+        """
+        limite = now - self.lease_seconds
+        esgotados = conn.execute(
+            "SELECT file_path FROM ingestion_jobs WHERE status = ? AND heartbeat_at < ? AND attempts >= ?",
+            (JobStatus.RUNNING, limite, self.max_attempts)
+        ).fetchall()
+        conn.execute(
+            "UPDATE ingestion_jobs SET status = ?, stage = 'error', error = ?, updated_at = ? "
+            "WHERE status = ? AND heartbeat_at < ? AND attempts >= ?",
+            (JobStatus.ERROR, "Job interrompido repetidamente (lease expirado)", now,
+             JobStatus.RUNNING, limite, self.max_attempts)
+        )
+        conn.execute(
+            "UPDATE ingestion_jobs SET status = ?, stage = 'queued', message = 'Reenfileirado', updated_at = ? "
+            "WHERE status = ? AND heartbeat_at < ?",
+            (JobStatus.QUEUED, now, JobStatus.RUNNING, limite)
+        )
+        return [row["file_path"] for row in esgotados]
+
+    def _claim(self) -> Optional[IngestionJob]:
+        """Reserva atomicamente o job mais antigo da fila (seguro entre processos)."""
+        conn = self._connect()
+        try:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                abandonados = self._requeue_stale(conn, now)
+                row = conn.execute(
+                    "SELECT * FROM ingestion_jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (JobStatus.QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE ingestion_jobs SET status = ?, stage = 'starting', attempts = attempts + 1, "
+                        "heartbeat_at = ?, updated_at = ? WHERE job_id = ?",
+                        (JobStatus.RUNNING, now, now, row["job_id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+        for file_path in abandonados:
+            if os.path.exists(file_path):
+                os.unlink(file_path)
+        if row is None:
+            return None
+        job = IngestionJob.from_row(row)
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        return job
+
+    def _update_progress(self, job_id: str, stage: str, progress: float, message: str) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE ingestion_jobs SET stage = ?, progress = ?, message = ?, heartbeat_at = ?, "
+                "updated_at = ? WHERE job_id = ?",
+                (stage, progress, message, now, now, job_id)
+            )
+        finally:
+            conn.close()
+
+    def _finish(self, job: IngestionJob, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, stage = ?, progress = ?, result = ?, error = ?, "
+                "updated_at = ? WHERE job_id = ?",
+                (status, status, 1.0 if status == JobStatus.DONE else job.progress,
+                 json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                 error, time.time(), job.job_id)
+            )
+        finally:
+            conn.close()
+        if os.path.exists(job.file_path):
+            os.unlink(job.file_path)
+
+    def _run_job(self, job: IngestionJob) -> None:
+        logger.info(f"⚙️ Processando job {job.job_id} ({job.filename}, tentativa {job.attempts})")
+        try:
+            result = self.handler(job, JobContext(self, job))
+            self._finish(job, JobStatus.DONE, result=result)
+            logger.info(f"✅ Job {job.job_id} concluído: {result}")
+        except IngestionJobError as e:
+            self._finish(job, JobStatus.ERROR, error=str(e))
+            logger.warning(f"⚠️ Job {job.job_id} rejeitado: {e}")
+        except Exception as e:
+            logger.error(f"❌ Erro no job {job.job_id}: {e}", exc_info=True)
+            if job.attempts >= self.max_attempts:
+                self._finish(job, JobStatus.ERROR, error=str(e))
+            else:
+                # Nova tentativa: volta para a fila mantendo o arquivo em disco
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        "UPDATE ingestion_jobs SET status = ?, stage = 'queued', message = ?, updated_at = ? "
+                        "WHERE job_id = ?",
+                        (JobStatus.QUEUED, f"Nova tentativa após erro: {e}", time.time(), job.job_id)
+                    )
+                finally:
+                    conn.close()
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+            except Exception as e:
+                logger.error(f"❌ Erro ao buscar job de ingestão: {e}")
+                job = None
+
+            if job is None:
+                # Sem jobs: aguarda um novo envio (ou o intervalo, para jobs de outros processos)
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._run_job(job)
@@ -0,0 +1,104 @@
+"""
+Clientes HTTP compartilhados para as chamadas de LLM e embeddings.
+
+Todos os `ChatOpenAI`, `OpenAIEmbeddings` e `AsyncOpenAI` da aplicação usam
+o mesmo par de clientes httpx (síncrono e assíncrono), com pool de conexões
+keep-alive limitado, em vez de cada instância abrir o seu próprio pool:
+
+    llm = ChatOpenAI(api_key=..., model=..., **openai_http_clients())
+
+O cliente assíncrono mantém um transporte por event loop: conexões não podem
+ser compartilhadas entre loops (ex.: wrappers síncronos com asyncio.run), e
+o loop principal da aplicação reutiliza sempre as mesmas conexões.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+from core.config import config
+
+logger = config.get_logger("LLMClients")
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.openai.http_max_connections,
+        max_keepalive_connections=config.openai.http_max_keepalive_connections,
+        keepalive_expiry=config.openai.http_keepalive_expiry
+    )
+
+
+class _PerLoopAsyncTransport(httpx.AsyncBaseTransport):
+    """Transporte assíncrono com um pool de conexões por event loop."""
+
+    def __init__(self, limits: httpx.Limits):
+        self.limits = limits
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = weakref.WeakKeyDictionary()
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(limits=self.limits)
+            self._transports[loop] = transport
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        """Fecha o pool do event loop atual (os demais são liberados com seus loops)."""
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def get_http_client() -> httpx.Client:
+    """Cliente httpx síncrono compartilhado (pool keep-alive)."""
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(limits=_limits())
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Cliente httpx assíncrono compartilhado (pool keep-alive por event loop)."""
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None or _async_http_client.is_closed:
+            _async_http_client = httpx.AsyncClient(transport=_PerLoopAsyncTransport(_limits()))
+            logger.info(
+                f"🔌 Cliente HTTP de LLM compartilhado criado "
+                f"(max={config.openai.http_max_connections}, keepalive={config.openai.http_max_keepalive_connections})"
+            )
+        return _async_http_client
+
+
+def openai_http_clients() -> Dict[str, Any]:
+    """Argumentos `http_client`/`http_async_client` para ChatOpenAI e OpenAIEmbeddings."""
+    return {
+        "http_client": get_http_client(),
+        "http_async_client": get_async_http_client(),
+    }
+
+
+async def close_llm_http_clients() -> None:
+    """Fecha os clientes compartilhados (shutdown da aplicação)."""
+    global _http_client, _async_http_client
+    with _lock:
+        client, async_client = _http_client, _async_http_client
+        _http_client = _async_http_client = None
+
+    if async_client is not None:
+        await async_client.aclose()
+    if client is not None:
+        client.close()
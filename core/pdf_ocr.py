@@ -0,0 +1,235 @@
+"""
+OCR paralelo, página a página, para PDFs digitalizados.
+
+- Só passam pelo OCR as páginas cuja camada de texto (pypdf) veio vazia;
+- cada página é renderizada sob demanda (pdf2image com first_page/last_page)
+  dentro do próprio processo de OCR, no DPI configurado: a memória fica
+  limitada às páginas em processamento, não ao documento inteiro;
+- as páginas são distribuídas em um pool de processos do tamanho dos CPUs
+  disponíveis (INGESTION_OCR_WORKERS);
+- o texto reconhecido fica em cache no disco, indexado pelo hash do arquivo
+  (e DPI/idioma): reenviar o mesmo documento não repete o OCR.
+
+    paginas = extrair_paginas_pdf(caminho)
+    vazias = [i for i, texto in enumerate(paginas) if not texto.strip()]
+    for i, texto in ocr_paginas(caminho, vazias).items():
+        paginas[i] = texto
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pypdf
+
+from core.config import config
+
+# OCR opcional
+try:
+    import pytesseract
+    import pdf2image
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+
+logger = config.get_logger("PdfOCR")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+# ============================================================================
+# BINÁRIOS (Tesseract/Poppler empacotados no executável PyInstaller)
+# ============================================================================
+
+def _poppler_path() -> Optional[str]:
+    if getattr(sys, 'frozen', False):
+        poppler_bin = Path(sys._MEIPASS) / "poppler" / "Library" / "bin"
+        if poppler_bin.exists():
+            return str(poppler_bin)
+        logger.warning(f"⚠️ Poppler não encontrado em: {poppler_bin}")
+    return None
+
+
+def _configurar_tesseract() -> None:
+    """Aponta o pytesseract para o Tesseract empacotado (inicializador dos processos)."""
+    if not getattr(sys, 'frozen', False):
+        return
+    base_path = Path(sys._MEIPASS)
+    tesseract_exe = base_path / "tesseract" / "tesseract.exe"
+    if tesseract_exe.exists():
+        pytesseract.pytesseract.tesseract_cmd = str(tesseract_exe)
+        # Tesseract procura os arquivos .traineddata diretamente em $TESSDATA_PREFIX/
+        os.environ['TESSDATA_PREFIX'] = str(base_path / "tesseract" / "tessdata")
+
+
+# ============================================================================
+# EXTRAÇÃO
+# ============================================================================
+
+def extrair_paginas_pdf(caminho_arquivo: str) -> List[str]:
+    """Texto da camada de texto de cada página (pypdf)."""
+    reader = pypdf.PdfReader(caminho_arquivo)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def contar_paginas(caminho_arquivo: str) -> int:
+    """Número de páginas via Poppler (para PDFs que o pypdf não consegue ler)."""
+    info = pdf2image.pdfinfo_from_path(caminho_arquivo, poppler_path=_poppler_path())
+    return int(info["Pages"])
+
+
+def _ocr_pagina(caminho_arquivo: str, pagina: int, dpi: int, lang: str, poppler_path: Optional[str]) -> str:
+    """Renderiza uma única página (índice 0) e executa o Tesseract (no processo do pool)."""
+    imagens = pdf2image.convert_from_path(
+        caminho_arquivo,
+        dpi=dpi,
+        first_page=pagina + 1,
+        last_page=pagina + 1,
+        poppler_path=poppler_path
+    )
+    try:
+        return "\n".join(pytesseract.image_to_string(imagem, lang=lang).strip() for imagem in imagens)
+    finally:
+        for imagem in imagens:
+            imagem.close()
+
+
+def _ocr_workers() -> int:
+    return config.ingestion.ocr_workers or os.cpu_count() or 1
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """Pool de processos de OCR compartilhado (criado sob demanda)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_ocr_workers(), initializer=_configurar_tesseract)
+            logger.info(f"🔍 Pool de OCR iniciado com {_ocr_workers()} processo(s)")
+        return _pool
+
+
+def close_ocr_pool() -> None:
+    """Encerra o pool de OCR (shutdown da aplicação)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def _hash_arquivo(caminho_arquivo: str) -> str:
+    sha = hashlib.sha256()
+    with open(caminho_arquivo, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def _caminho_cache(caminho_arquivo: str, dpi: int, lang: str) -> Path:
+    chave = f"{_hash_arquivo(caminho_arquivo)}-{dpi}-{lang.replace('+', '_')}"
+    return Path(config.ingestion.data_dir) / "ocr_cache" / f"{chave}.json"
+
+
+def _ler_cache(caminho_cache: Path) -> Dict[int, str]:
+    try:
+        with open(caminho_cache, encoding="utf-8") as arquivo:
+            return {int(pagina): texto for pagina, texto in json.load(arquivo).items()}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Cache de OCR ilegível ({caminho_cache.name}): {e}")
+        return {}
+
+
+def _gravar_cache(caminho_cache: Path, paginas: Dict[int, str]) -> None:
+    try:
+        caminho_cache.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho_cache.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump({str(pagina): texto for pagina, texto in paginas.items()}, arquivo, ensure_ascii=False)
+        os.replace(temporario, caminho_cache)
+    except OSError as e:
+        logger.warning(f"⚠️ Não foi possível gravar o cache de OCR: {e}")
+
+
+# ============================================================================
+# OCR PARALELO
+# ============================================================================
+
+def ocr_paginas(
+    caminho_arquivo: str,
+    paginas: List[int],
+    progresso: Optional[Callable[[int, int], None]] = None
+) -> Dict[int, str]:
+    """
+    Executa o OCR das páginas indicadas (índices a partir de 0) em paralelo.
+
+    Args:
+        caminho_arquivo: PDF em disco
+        paginas: Índices das páginas sem camada de texto
+        progresso: Callback (páginas concluídas, total)
+
+    Returns:
+        Texto reconhecido por índice de página
+    """
+    if not OCR_AVAILABLE:
+        raise RuntimeError("OCR não disponível - pytesseract ou pdf2image não importado")
+
+    dpi, lang = config.ingestion.ocr_dpi, config.ingestion.ocr_lang
+    caminho_cache = _caminho_cache(caminho_arquivo, dpi, lang)
+    solicitadas = set(paginas)
+    resultado = {pagina: texto for pagina, texto in _ler_cache(caminho_cache).items() if pagina in solicitadas}
+    faltando = [pagina for pagina in paginas if pagina not in resultado]
+    total = len(paginas)
+
+    if resultado:
+        logger.info(f"♻️ OCR em cache para {len(resultado)}/{total} página(s)")
+    if progresso:
+        progresso(len(resultado), total)
+    if not faltando:
+        return resultado
+
+    pool = get_ocr_pool()
+    poppler_path = _poppler_path()
+    # Janela limitada de páginas em voo: só essas estão renderizadas em memória
+    janela = _ocr_workers() * 2
+    fila = iter(faltando)
+    em_voo = {}
+    novas = 0
+
+    try:
+        while True:
+            while len(em_voo) < janela:
+                pagina = next(fila, None)
+                if pagina is None:
+                    break
+                em_voo[pool.submit(_ocr_pagina, caminho_arquivo, pagina, dpi, lang, poppler_path)] = pagina
+            if not em_voo:
+                break
+
+            prontos, _ = wait(list(em_voo), return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                pagina = em_voo.pop(futuro)
+                resultado[pagina] = futuro.result()
+                novas += 1
+                if progresso:
+                    progresso(len(resultado), total)
+    finally:
+        for futuro in em_voo:
+            futuro.cancel()
+        # Páginas já reconhecidas ficam em cache mesmo se o job falhar no meio
+        if novas:
+            _gravar_cache(caminho_cache, {**_ler_cache(caminho_cache), **resultado})
+
+    logger.info(f"✅ OCR concluído: {novas} página(s) processada(s) a {dpi} DPI")
+    return resultado
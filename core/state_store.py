@@ -0,0 +1,243 @@
+"""
+Armazenamento limitado de estado por usuário/sessão.
+
+Memórias de conversa, perfis em cache, históricos de delegação e sessões A2A
+são indexados por usuário e, em um worker de longa duração com muitos
+usuários distintos, cresceriam sem limite. `BoundedStateStore` é um
+dicionário (MutableMapping) com:
+
+- limite de entradas (LRU: a entrada menos usada recentemente sai primeiro);
+- TTL contado a partir da última escrita;
+- limite opcional de bytes (tamanho estimado dos valores);
+- métricas de hits/misses e de evicções por motivo.
+
+    self.memoria_conversas = BoundedStateStore("memoria_conversas:ti")
+    self.memoria_conversas[usuario_id] = historico[-8:]
+
+Valores mutáveis alterados in-place não atualizam o TTL nem o tamanho
+estimado: reatribua a chave após alterar o valor.
+"""
+
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from core.config import config
+
+# Stores ativos (por id: MutableMapping não é hashable) para as métricas agregadas
+_stores: "weakref.WeakValueDictionary[int, BoundedStateStore]" = weakref.WeakValueDictionary()
+
+_MISSING = object()
+
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """Tamanho aproximado (bytes) de um valor, percorrendo containers e dataclasses."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, _seen) for item in value)
+    if hasattr(value, "__dict__"):
+        return size + estimate_size(vars(value), _seen)
+    return size
+
+
+class BoundedStateStore(MutableMapping):
+    """Dicionário thread-safe com LRU, TTL e limite opcional de bytes."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size
+    ):
+        """
+        Args:
+            name: Nome do store (usado nas métricas)
+            max_entries: Máximo de entradas (padrão: STATE_STORE_MAX_ENTRIES)
+            ttl_seconds: Validade após a última escrita; 0 desativa (padrão: STATE_STORE_TTL)
+            max_bytes: Tamanho máximo estimado dos valores; 0 desativa (padrão: STATE_STORE_MAX_BYTES)
+            sizeof: Função de estimativa de tamanho dos valores
+        """
+        self.name = name
+        self.max_entries = max_entries if max_entries is not None else config.state_store.max_entries
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else config.state_store.ttl_seconds
+        self.max_bytes = max_bytes if max_bytes is not None else config.state_store.max_bytes
+        self._sizeof = sizeof
+
+        # chave -> (valor, expira_em, bytes)
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._next_purge = 0.0
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions_lru": 0,
+            "evictions_ttl": 0,
+            "evictions_bytes": 0
+        }
+        _stores[id(self)] = self
+
+    # ========================================================================
+    # EVICÇÃO
+    # ========================================================================
+
+    def _expired(self, expires_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and expires_at <= now
+
+    def _drop(self, key: Hashable, reason: Optional[str] = None) -> None:
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+        if reason:
+            self.stats[f"evictions_{reason}"] += 1
+
+    def _purge_expired(self, now: float, force: bool = False) -> None:
+        """Remove as entradas expiradas (varredura completa, no máximo a cada TTL/4)."""
+        if self.ttl_seconds <= 0 or (now < self._next_purge and not force):
+            return
+        self._next_purge = now + self.ttl_seconds / 4
+        for key in [k for k, (_, expires_at, _) in self._data.items() if expires_at <= now]:
+            self._drop(key, "ttl")
+
+    def _enforce_limits(self) -> None:
+        while self._data and len(self._data) > self.max_entries:
+            self._drop(next(iter(self._data)), "lru")
+        while self._data and self.max_bytes > 0 and self._bytes > self.max_bytes:
+            self._drop(next(iter(self._data)), "bytes")
+
+    # ========================================================================
+    # INTERFACE DE DICIONÁRIO
+    # ========================================================================
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Valor da chave (marcando uso recente) ou _MISSING."""
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        if self._expired(entry[1], time.monotonic()):
+            self._drop(key, "ttl")
+            return _MISSING
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.stats["misses"] += 1
+                raise KeyError(key)
+            self.stats["hits"] += 1
+            return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value) if self.max_bytes > 0 else 0
+        with self._lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, now + self.ttl_seconds, size)
+            self._bytes += size
+            self._enforce_limits()
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            if key not in self._data:
+                raise KeyError(key)
+            self._drop(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False
+            if self._expired(entry[1], time.monotonic()):
+                self._drop(key, "ttl")
+                return False
+            return True
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._lock:
+            self._purge_expired(time.monotonic(), force=True)
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired(time.monotonic(), force=True)
+            return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.stats["misses"] += 1
+                return default
+            self.stats["hits"] += 1
+            return value
+
+    def setdefault(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                self[key] = value = default
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def items(self) -> list:
+        """Snapshot dos pares válidos, do menos para o mais recentemente usado."""
+        with self._lock:
+            self._purge_expired(time.monotonic(), force=True)
+            return [(key, value) for key, (value, _, _) in self._data.items()]
+
+    def values(self) -> list:
+        """Snapshot dos valores válidos, do menos para o mais recentemente usado."""
+        return [value for _, value in self.items()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas do store (entradas, bytes estimados, hits/misses e evicções)."""
+        with self._lock:
+            return {
+                **self.stats,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+    def __repr__(self) -> str:
+        return f"BoundedStateStore({self.name!r}, entries={len(self._data)}, max_entries={self.max_entries})"
+
+
+def get_state_store_stats() -> Dict[str, Dict[str, Any]]:
+    """Métricas agregadas de todos os stores ativos, por nome."""
+    agregado: Dict[str, Dict[str, Any]] = {}
+    for store in list(_stores.values()):
+        stats = store.get_stats()
+        atual = agregado.get(store.name)
+        if atual is None:
+            agregado[store.name] = stats
+        else:
+            for campo in ("hits", "misses", "evictions_lru", "evictions_ttl", "evictions_bytes", "entries", "bytes"):
+                atual[campo] += stats[campo]
+    return agregado
@@ -0,0 +1,293 @@
+"""
+Streaming de Respostas para Neoson.
+
+Permite que os endpoints de chat enviem eventos incrementais ao cliente
+(Server-Sent Events ou NDJSON) sem alterar a assinatura dos agentes:
+
+- O endpoint cria um `StreamSink` e executa o processamento com ele ativo
+  (via ContextVar, que se propaga para tasks e para os `asyncio.run` dos
+  wrappers síncronos).
+- O Neoson emite o evento `routing` assim que a classificação é conhecida.
+- Os agentes geram a resposta com `gerar_resposta_llm`, que usa `astream`
+  quando há um sink ativo e emite um evento `token` por fragmento.
+- Gerações em série (ex.: primeiro candidato da hierarquia) transmitem ao
+  vivo; se a resposta for descartada depois (validação, controle de acesso),
+  `reset_stream_answer` emite `answer_reset` e o cliente apaga o texto parcial.
+- Gerações concorrentes que ainda podem ser rejeitadas (fan-out especulativo)
+  rodam com um `StreamBuffer` ativo: os eventos ficam retidos e só chegam ao
+  cliente se a geração for aceita (`commit`).
+
+Eventos emitidos: routing, answer_start, token, answer_reset, answer,
+enrichment, error, done. `answer` traz o texto final (após a remoção de links)
+e substitui o texto acumulado dos tokens.
+"""
+
+import asyncio
+import contextvars
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+
+from core.config import config
+
+logger = config.get_logger("Streaming")
+
+_sink_atual: contextvars.ContextVar[Optional["StreamSink | StreamBuffer"]] = contextvars.ContextVar(
+    "neoson_stream_sink", default=None
+)
+
+FORMATOS_STREAM = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson",
+}
+
+
+@dataclass
+class StreamEvent:
+    """Evento emitido durante o processamento de uma pergunta."""
+    event: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def to_sse(self) -> str:
+        payload = json.dumps(self.data, ensure_ascii=False)
+        return f"event: {self.event}\ndata: {payload}\n\n"
+
+    def to_ndjson(self) -> str:
+        return json.dumps({"event": self.event, "data": self.data}, ensure_ascii=False) + "\n"
+
+    def format(self, formato: str) -> str:
+        return self.to_ndjson() if formato == "ndjson" else self.to_sse()
+
+
+class StreamSink:
+    """
+    Destino dos eventos de uma requisição em streaming.
+
+    É seguro emitir de qualquer thread/event loop: os eventos são entregues
+    na fila do loop que criou o sink. Apenas uma geração de LLM por vez
+    transmite tokens: as demais gerações simultâneas no mesmo destino geram a
+    resposta sem streaming.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[StreamEvent]" = asyncio.Queue()
+        self._token_owner: Optional[object] = None
+        self._tokens_enviados = False
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Emite um evento (thread-safe)."""
+        if event == "token":
+            with self._lock:
+                self._tokens_enviados = True
+        evento = StreamEvent(event, data or {})
+        try:
+            if _loop_em_execucao() is self._loop:
+                self._queue.put_nowait(evento)
+            else:
+                self._loop.call_soon_threadsafe(self._queue.put_nowait, evento)
+        except RuntimeError:
+            # Loop da requisição já encerrado (cliente desconectou)
+            pass
+
+    def claim_tokens(self, owner: object) -> bool:
+        """Reserva o canal de tokens para uma geração. Retorna False se já ocupado."""
+        with self._lock:
+            if self._token_owner is None:
+                self._token_owner = owner
+                return True
+            return self._token_owner is owner
+
+    def release_tokens(self, owner: object) -> None:
+        """Libera o canal de tokens reservado por `owner`."""
+        with self._lock:
+            if self._token_owner is owner:
+                self._token_owner = None
+
+    def reset_answer(self, motivo: str) -> None:
+        """Emite `answer_reset` se já foram enviados tokens da resposta descartada."""
+        with self._lock:
+            enviados, self._tokens_enviados = self._tokens_enviados, False
+        if enviados:
+            self.emit("answer_reset", {"motivo": motivo})
+
+    def run(self, coro: Awaitable[Any]) -> "asyncio.Task":
+        """Executa `coro` em uma task com este sink ativo."""
+        async def _executar():
+            _sink_atual.set(self)
+            return await coro
+
+        return asyncio.create_task(_executar())
+
+    async def events(self, task: "asyncio.Task") -> AsyncIterator[StreamEvent]:
+        """Itera sobre os eventos até que `task` termine (e a fila esvazie)."""
+        while True:
+            if task.done() and self._queue.empty():
+                # Dá uma volta no loop para entregar callbacks thread-safe pendentes
+                await asyncio.sleep(0)
+                if self._queue.empty():
+                    return
+
+            getter = asyncio.ensure_future(self._queue.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+            else:
+                getter.cancel()
+
+
+class StreamBuffer:
+    """
+    Retém os eventos de uma geração até que ela seja aceita.
+
+    `commit` reenvia os eventos retidos, na ordem, ao destino que estava ativo
+    quando o buffer foi criado (o sink ou outro buffer); um buffer descartado
+    (ou simplesmente abandonado) não entrega nada ao cliente.
+    """
+
+    def __init__(self, destino: "StreamSink | StreamBuffer"):
+        self._destino = destino
+        self._eventos: List[Tuple[str, Dict[str, Any]]] = []
+        self._token_owner: Optional[object] = None
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Retém um evento (thread-safe)."""
+        with self._lock:
+            self._eventos.append((event, data or {}))
+
+    def claim_tokens(self, owner: object) -> bool:
+        """Reserva o canal de tokens deste buffer. Retorna False se já ocupado."""
+        with self._lock:
+            if self._token_owner is None:
+                self._token_owner = owner
+                return True
+            return self._token_owner is owner
+
+    def release_tokens(self, owner: object) -> None:
+        """Libera o canal de tokens reservado por `owner`."""
+        with self._lock:
+            if self._token_owner is owner:
+                self._token_owner = None
+
+    def commit(self) -> None:
+        """Entrega os eventos retidos ao destino (geração aceita)."""
+        with self._lock:
+            eventos, self._eventos = self._eventos, []
+        for event, data in eventos:
+            self._destino.emit(event, data)
+
+    def discard(self) -> None:
+        """Descarta os eventos retidos (geração rejeitada)."""
+        with self._lock:
+            self._eventos = []
+
+    def reset_answer(self, motivo: str) -> None:
+        """Resposta descartada antes do commit: nada a avisar ao cliente."""
+        self.discard()
+
+
+def reset_stream_answer(motivo: str) -> None:
+    """Descarta a resposta transmitida até aqui (`answer_reset`); nada fora de streaming."""
+    destino = _sink_atual.get()
+    if destino is not None:
+        destino.reset_answer(motivo)
+
+
+def buffer_stream() -> Tuple[Optional[StreamBuffer], contextvars.Token]:
+    """
+    Passa a reter os eventos do contexto atual em um `StreamBuffer`.
+
+    Returns:
+        Tuple (buffer, token para reset_stream_target); buffer é None fora de streaming
+    """
+    destino = _sink_atual.get()
+    buffer = StreamBuffer(destino) if destino is not None else None
+    return buffer, _sink_atual.set(buffer)
+
+
+def suspend_stream() -> contextvars.Token:
+    """Desativa o streaming no contexto atual (ex.: agentes delegados via A2A)."""
+    return _sink_atual.set(None)
+
+
+def reset_stream_target(token: contextvars.Token) -> None:
+    """Restaura o destino anterior a buffer_stream/suspend_stream."""
+    _sink_atual.reset(token)
+
+
+def _loop_em_execucao() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_stream_sink() -> Optional["StreamSink | StreamBuffer"]:
+    """Retorna o destino ativo no contexto atual (ou None fora de streaming)."""
+    return _sink_atual.get()
+
+
+def emit_stream_event(event: str, data: Optional[Dict[str, Any]] = None) -> None:
+    """Emite um evento no sink ativo; não faz nada fora de streaming."""
+    sink = _sink_atual.get()
+    if sink is not None:
+        sink.emit(event, data)
+
+
+def _texto_chunk(chunk: Any) -> str:
+    conteudo = getattr(chunk, "content", chunk)
+    return conteudo if isinstance(conteudo, str) else str(conteudo or "")
+
+
+async def gerar_resposta_llm(llm: Any, prompt: Any, agente: str = "") -> str:
+    """
+    Gera a resposta de um LLM, transmitindo tokens se houver streaming ativo.
+
+    Args:
+        llm: Cliente de chat do LangChain (ChatOpenAI)
+        prompt: Prompt (string ou lista de mensagens)
+        agente: Nome do agente que está gerando (enviado em `answer_start`)
+
+    Returns:
+        Texto completo da resposta
+    """
+    sink = _sink_atual.get()
+    owner = object()
+    if sink is None or not sink.claim_tokens(owner):
+        resposta = await llm.ainvoke(prompt)
+        return _texto_chunk(resposta)
+
+    try:
+        sink.emit("answer_start", {"agente": agente})
+        partes = []
+        async for chunk in llm.astream(prompt):
+            texto = _texto_chunk(chunk)
+            if texto:
+                partes.append(texto)
+                sink.emit("token", {"content": texto})
+        return "".join(partes)
+    finally:
+        sink.release_tokens(owner)
+
+
+def gerar_resposta_llm_sync(llm: Any, prompt: Any, agente: str = "") -> str:
+    """Versão síncrona de `gerar_resposta_llm` (usa `llm.stream`)."""
+    sink = _sink_atual.get()
+    owner = object()
+    if sink is None or not sink.claim_tokens(owner):
+        return _texto_chunk(llm.invoke(prompt))
+
+    try:
+        sink.emit("answer_start", {"agente": agente})
+        partes = []
+        for chunk in llm.stream(prompt):
+            texto = _texto_chunk(chunk)
+            if texto:
+                partes.append(texto)
+                sink.emit("token", {"content": texto})
+        return "".join(partes)
+    finally:
+        sink.release_tokens(owner)
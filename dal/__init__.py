@@ -18,14 +18,14 @@ Uso recomendado:
 """
 
 from .postgres_dal import PostgresDAL
-from .base_dal import BaseDAL, DALException, SearchResult, ConnectionInfo
+from .base_dal import BaseDAL, DALException, SearchResult, ConnectionInfo, SQLCondition
 from .manager import (
     DALManager, DALFactory,
     get_main_dal, get_knowledge_dal, search_knowledge
 )
 
 __all__ = [
-    'PostgresDAL', 'BaseDAL', 'DALException', 'SearchResult', 'ConnectionInfo',
+    'PostgresDAL', 'BaseDAL', 'DALException', 'SearchResult', 'ConnectionInfo', 'SQLCondition',
     'DALManager', 'DALFactory',
     'get_main_dal', 'get_knowledge_dal', 'search_knowledge'
 ]
\ No newline at end of file
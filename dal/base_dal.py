@@ -6,7 +6,7 @@ garantindo consistência e permitindo diferentes tipos de banco de dados no futu
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Sequence, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -36,6 +36,109 @@ class SearchResult:
     metadata: Optional[Dict[str, Any]] = None
 
 
+@dataclass
+class SQLCondition:
+    """
+    Cláusula WHERE parametrizada para buscas vetoriais.
+    
+    O fragmento SQL usa placeholders `%s` (um por item de `params`); cada
+    implementação de DAL converte para o estilo do seu driver.
+    """
+    sql: str
+    params: List[Any]
+
+
+# Colunas padrão das tabelas de conhecimento
+VECTOR_COLUMN = "vetor"
+CONTENT_COLUMN = "conteudo_original"
+
+
+def quote_identifier(name: str) -> str:
+    """Quota um identificador SQL (tabela/coluna), escapando aspas internas."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def resolve_search_projection(
+    table_columns: Sequence[str],
+    columns: Optional[Sequence[str]] = None,
+    include_vector: bool = False
+) -> List[str]:
+    """
+    Define as colunas retornadas por uma busca vetorial.
+    
+    Args:
+        table_columns: Colunas existentes na tabela (ordem do catálogo)
+        columns: Projeção pedida pelo chamador (None = todas, exceto o vetor)
+        include_vector: Se a coluna do vetor deve ser retornada
+        
+    Returns:
+        Lista de colunas a projetar
+        
+    Raises:
+        DALException: Se alguma coluna pedida não existir na tabela
+    """
+    if columns is None:
+        projection = [c for c in table_columns if c != VECTOR_COLUMN]
+    else:
+        desconhecidas = [c for c in columns if c not in table_columns]
+        if desconhecidas:
+            raise DALException(f"Colunas inexistentes na tabela: {', '.join(desconhecidas)}")
+        projection = [c for c in columns if c != VECTOR_COLUMN]
+    
+    if include_vector and VECTOR_COLUMN in table_columns:
+        projection.append(VECTOR_COLUMN)
+    return projection
+
+
+def build_vector_search_sql(
+    table_name: str,
+    projection: Sequence[str],
+    where_clauses: Sequence[str],
+    vector_placeholder: str,
+    limit_placeholder: str,
+    threshold_placeholder: Optional[str] = None
+) -> str:
+    """
+    Monta a query de busca por similaridade coseno com projeção explícita.
+    
+    A distância é calculada uma única vez na subquery (que também ordena e
+    limita, permitindo o uso do índice HNSW/IVFFlat); o threshold de
+    similaridade é aplicado sobre os top-k, o que equivale a filtrar antes
+    de limitar, pois a ordenação é pela própria distância.
+    
+    Args:
+        table_name: Nome da tabela (será quoted)
+        projection: Colunas a retornar (ver resolve_search_projection)
+        where_clauses: Cláusulas WHERE já no estilo de placeholder do driver
+        vector_placeholder: Placeholder do vetor de consulta (ex.: `$1`, `%s`)
+        limit_placeholder: Placeholder do LIMIT
+        threshold_placeholder: Placeholder do threshold de similaridade (opcional)
+        
+    Returns:
+        SQL com as colunas projetadas, `conteudo` (alias de conteudo_original)
+        e `similarity_score`
+    """
+    inner_columns = [quote_identifier(c) for c in projection]
+    outer_columns = [f"hits.{quote_identifier(c)}" for c in projection]
+    if CONTENT_COLUMN in projection and "conteudo" not in projection:
+        outer_columns.append(f"hits.{quote_identifier(CONTENT_COLUMN)} AS conteudo")
+    
+    inner_select = ", ".join(inner_columns + [
+        f"{quote_identifier(VECTOR_COLUMN)} <=> {vector_placeholder}::vector AS distancia"
+    ])
+    outer_select = ", ".join(outer_columns + ["1 - hits.distancia AS similarity_score"])
+    
+    query = f"SELECT {inner_select} FROM {quote_identifier(table_name)}"
+    if where_clauses:
+        query += " WHERE " + " AND ".join(where_clauses)
+    query += f" ORDER BY distancia LIMIT {limit_placeholder}"
+    
+    query = f"SELECT {outer_select} FROM ({query}) AS hits"
+    if threshold_placeholder:
+        query += f" WHERE hits.distancia <= 1 - {threshold_placeholder}::float8"
+    return query + " ORDER BY hits.distancia"
+
+
 @dataclass
 class ConnectionInfo:
     """Informações sobre a conexão com o banco."""
@@ -105,7 +208,10 @@ class BaseDAL(ABC):
         query_vector: List[float], 
         limit: int = 10,
         filters: Optional[Dict[str, Any]] = None,
-        similarity_threshold: Optional[float] = None
+        similarity_threshold: Optional[float] = None,
+        conditions: Optional[List[SQLCondition]] = None,
+        columns: Optional[Sequence[str]] = None,
+        include_vector: bool = False
     ) -> SearchResult:
         """
         Realiza busca por similaridade vetorial.
@@ -116,6 +222,9 @@ class BaseDAL(ABC):
             limit: Número máximo de resultados a retornar
             filters: Filtros adicionais a aplicar na consulta
             similarity_threshold: Threshold mínimo de similaridade
+            conditions: Cláusulas WHERE parametrizadas (ex.: governança de acesso)
+            columns: Colunas a retornar (None = todas, exceto o vetor)
+            include_vector: Se o vetor de cada documento deve ser retornado
             
         Returns:
             SearchResult com os documentos encontrados e metadados
@@ -0,0 +1,173 @@
+"""
+Carga em massa via COPY binário, alimentada a partir de threads síncronas.
+
+Os jobs de ingestão rodam em threads de trabalho, mas o pool asyncpg
+compartilhado pertence ao event loop da aplicação. `StreamingCopyLoader`
+abre um único COPY ... FROM STDIN (binário, em uma transação, com conexão do
+pool) nesse loop e recebe as linhas da thread à medida que ficam prontas:
+
+    loader = StreamingCopyLoader(dal, "knowledge_ti", COLUNAS, loop=ctx.loop)
+    loader.start()
+    for linha in linhas:
+        loader.put(linha)        # bloqueia se o banco estiver mais lento (backpressure)
+    gravadas = loader.finish()   # COMMIT
+    # ou loader.abort(erro)      # ROLLBACK
+
+`prepare` (corrotina que recebe a conexão) roda na mesma transação antes do
+COPY; `start()` só retorna depois dela, com o resultado em `loader.prepared`.
+
+A conexão fica reservada durante toda a carga (inclusive enquanto a etapa
+anterior ainda produz linhas). Sem loop da aplicação (ex.: scripts), o
+loader cria um event loop próprio em uma thread auxiliar, com um pool
+temporário fechado ao final.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from core.config import config
+from dal.base_dal import DALException
+from dal.postgres_dal_async import PostgresDALAsync, close_shared_pools
+
+logger = config.get_logger("BulkLoader")
+
+_FIM = object()
+
+
+class _Abortar:
+    def __init__(self, erro: BaseException):
+        self.erro = erro
+
+
+class StreamingCopyLoader:
+    """COPY binário em streaming de uma thread síncrona para o event loop do pool."""
+
+    def __init__(
+        self,
+        dal: PostgresDALAsync,
+        table_name: str,
+        columns: Sequence[str],
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        max_pending: int = 1000,
+        timeout: Optional[float] = None,
+        prepare: Optional[Callable[[Any], Awaitable[Any]]] = None
+    ):
+        """
+        Args:
+            dal: DAL assíncrono (pool compartilhado)
+            table_name: Tabela de destino
+            columns: Colunas na ordem das linhas enviadas
+            loop: Event loop dono do pool; None cria um loop próprio
+            max_pending: Linhas aguardando envio antes de `put` bloquear
+            timeout: Tempo máximo do COPY (padrão: INGESTION_COPY_TIMEOUT)
+            prepare: Corrotina (conexão) executada na transação antes do COPY
+        """
+        self.dal = dal
+        self.table_name = table_name
+        self.columns = list(columns)
+        self.max_pending = max_pending
+        self.timeout = timeout or config.ingestion.copy_timeout
+        self.prepare = prepare
+        self.prepared: Any = None
+
+        self._loop = loop
+        self._own_thread: Optional[threading.Thread] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._future: Optional[Future] = None
+        self._started = threading.Event()
+        self.sent = 0
+
+    # ========================================================================
+    # LADO ASSÍNCRONO (event loop)
+    # ========================================================================
+
+    async def _records(self):
+        while True:
+            item = await self._queue.get()
+            if item is _FIM:
+                return
+            if isinstance(item, _Abortar):
+                # Exceção dentro do COPY: a transação é desfeita
+                raise item.erro
+            yield item
+
+    async def _before(self, conn) -> None:
+        if self.prepare is not None:
+            self.prepared = await self.prepare(conn)
+        self._started.set()
+
+    async def _copy(self) -> int:
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        return await self.dal.copy_records_async(
+            self.table_name, self.columns, self._records(), timeout=self.timeout, before=self._before
+        )
+
+    # ========================================================================
+    # LADO SÍNCRONO (thread do job)
+    # ========================================================================
+
+    def start(self) -> "StreamingCopyLoader":
+        """Abre a transação (executando `prepare`) e o COPY no event loop."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._own_thread = threading.Thread(target=self._loop.run_forever, name="copy-loader", daemon=True)
+            self._own_thread.start()
+
+        self._future = asyncio.run_coroutine_threadsafe(self._copy(), self._loop)
+        # Aguardar a transação aberta e o `prepare` concluído (ou a falha antes disso)
+        while not self._started.wait(0.05):
+            if self._future.done():
+                self._future.result()
+        return self
+
+    def _send(self, item: Any) -> None:
+        envio = asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop)
+        while True:
+            try:
+                return envio.result(timeout=0.5)
+            except FutureTimeoutError:
+                if self._future.done():
+                    # COPY encerrado (erro no banco) com a fila cheia: propagar em vez de bloquear
+                    envio.cancel()
+                    self._future.result()
+                    raise DALException("COPY encerrado antes do fim dos registros", None)
+
+    def put(self, record: Sequence[Any]) -> None:
+        """Envia uma linha (bloqueia enquanto houver `max_pending` linhas na fila)."""
+        self._send(tuple(record))
+        self.sent += 1
+
+    def finish(self) -> int:
+        """Encerra o COPY e confirma a transação; retorna as linhas gravadas."""
+        try:
+            self._send(_FIM)
+            count = self._future.result()
+            logger.info(f"✅ {count} registro(s) gravado(s) em {self.table_name} via COPY")
+            return count
+        finally:
+            self._close_loop()
+
+    def abort(self, erro: Optional[BaseException] = None) -> None:
+        """Desfaz a transação (nenhuma linha enviada é gravada)."""
+        try:
+            if self._future is not None and not self._future.done():
+                try:
+                    self._send(_Abortar(erro or DALException("Carga cancelada", None)))
+                    self._future.result()
+                except Exception:
+                    pass
+            logger.warning(f"⚠️ Carga em {self.table_name} desfeita ({self.sent} linha(s) descartada(s))")
+        finally:
+            self._close_loop()
+
+    def _close_loop(self) -> None:
+        if self._own_thread is None:
+            return
+        # Pool criado neste loop próprio não sobrevive a ele
+        asyncio.run_coroutine_threadsafe(close_shared_pools(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._own_thread.join()
+        self._loop.close()
+        self._own_thread = None
@@ -5,14 +5,27 @@ Esta classe implementa a interface BaseDAL para PostgreSQL com suporte a
 extensões vetoriais (pgvector) e funcionalidades específicas do Postgres.
 """
 
+import numpy as np
 import psycopg2
 import psycopg2.extras
 import time
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence
 from urllib.parse import urlparse
 
+from pgvector.psycopg2 import register_vector
+
 from core.config import config
-from .base_dal import BaseDAL, DALException, SearchResult, ConnectionInfo, ConnectionStatus
+from .base_dal import (
+    BaseDAL, DALException, SearchResult, ConnectionInfo, ConnectionStatus, SQLCondition,
+    build_vector_search_sql, quote_identifier, resolve_search_projection
+)
+
+SQL_TABLE_COLUMNS = """
+    SELECT column_name
+    FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = %s
+    ORDER BY ordinal_position
+"""
 
 
 class PostgresDAL(BaseDAL):
@@ -37,6 +50,7 @@ class PostgresDAL(BaseDAL):
         super().__init__(connection_string)
         self._connection = None
         self._cursor = None
+        self._table_columns: Dict[str, List[str]] = {}
         self.logger = config.get_logger("PostgresDAL")
         
     def connect(self) -> bool:
@@ -60,6 +74,7 @@ class PostgresDAL(BaseDAL):
             # Configurações de performance e comportamento
             self._connection.autocommit = True
             self._cursor = self._connection.cursor()
+            self._register_vector()
             
             self.logger.info("✅ Conexão PostgreSQL estabelecida com sucesso")
             return True
@@ -134,7 +149,10 @@ class PostgresDAL(BaseDAL):
         query_vector: List[float],
         limit: int = 10,
         filters: Optional[Dict[str, Any]] = None,
-        similarity_threshold: Optional[float] = None
+        similarity_threshold: Optional[float] = None,
+        conditions: Optional[List[SQLCondition]] = None,
+        columns: Optional[Sequence[str]] = None,
+        include_vector: bool = False
     ) -> SearchResult:
         """
         Realiza busca por similaridade vetorial usando pgvector.
@@ -143,8 +161,11 @@ class PostgresDAL(BaseDAL):
             table_name: Nome da tabela (será quoted automaticamente)
             query_vector: Vetor de consulta (embedding)
             limit: Número máximo de resultados
-            filters: Filtros adicionais (WHERE clauses)
+            filters: Filtros adicionais (coluna -> valor ou lista de valores)
             similarity_threshold: Threshold mínimo de similaridade coseno
+            conditions: Cláusulas WHERE parametrizadas (placeholders %s)
+            columns: Colunas a retornar (None = todas, exceto o vetor)
+            include_vector: Se o vetor de cada documento deve ser retornado (numpy array)
             
         Returns:
             SearchResult com documentos e metadados da busca
@@ -155,43 +176,41 @@ class PostgresDAL(BaseDAL):
             if not self._connection or self._connection.closed:
                 self.connect()
             
-            # Construir query com segurança (quoted table name)
-            quoted_table = f'"{table_name}"'
-            
-            # Query base para busca por similaridade coseno
-            query = f"""
-                SELECT *,
-                       conteudo_original AS conteudo,
-                       1 - (vetor <=> %s::vector) as similarity_score
-                FROM {quoted_table}
-            """
-            
-            params = [query_vector]
+            projection = resolve_search_projection(
+                self._get_table_columns(table_name), columns, include_vector
+            )
             
-            # Adicionar filtros se fornecidos
+            # Parâmetros na ordem em que aparecem na query: vetor, filtros, LIMIT, threshold
+            params = [np.asarray(query_vector, dtype=np.float32)]
             where_clauses = []
             
             if filters:
                 for key, value in filters.items():
                     if isinstance(value, list):
                         placeholders = ','.join(['%s'] * len(value))
-                        where_clauses.append(f"{key} IN ({placeholders})")
+                        where_clauses.append(f"{quote_identifier(key)} IN ({placeholders})")
                         params.extend(value)
                     else:
-                        where_clauses.append(f"{key} = %s")
+                        where_clauses.append(f"{quote_identifier(key)} = %s")
                         params.append(value)
             
-            # Adicionar threshold de similaridade se fornecido
-            if similarity_threshold:
-                where_clauses.append("(1 - (vetor <=> %s::vector)) >= %s")
-                params.extend([query_vector, similarity_threshold])
+            # Adicionar cláusulas parametrizadas (ex.: governança)
+            for condition in conditions or []:
+                where_clauses.append(f"({condition.sql})")
+                params.extend(condition.params)
             
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-            
-            # Ordenar por similaridade e limitar resultados
-            query += " ORDER BY similarity_score DESC LIMIT %s"
             params.append(limit)
+            if similarity_threshold:
+                params.append(similarity_threshold)
+            
+            query = build_vector_search_sql(
+                table_name,
+                projection,
+                where_clauses,
+                vector_placeholder="%s",
+                limit_placeholder="%s",
+                threshold_placeholder="%s" if similarity_threshold else None
+            )
             
             self.logger.debug(f"🔍 Executando busca vetorial em {table_name} (limit={limit})")
             
@@ -216,10 +235,14 @@ class PostgresDAL(BaseDAL):
                     'table_name': table_name,
                     'query_vector_dim': len(query_vector),
                     'filters_applied': filters or {},
-                    'similarity_threshold': similarity_threshold
+                    'conditions_applied': len(conditions or []),
+                    'similarity_threshold': similarity_threshold,
+                    'columns': projection
                 }
             )
             
+        except DALException:
+            raise
         except psycopg2.Error as e:
             self.logger.error(f"❌ Erro PostgreSQL na busca vetorial: {e}")
             raise DALException(f"Erro na busca vetorial: {e}", e)
@@ -227,6 +250,30 @@ class PostgresDAL(BaseDAL):
             self.logger.error(f"❌ Erro inesperado na busca: {e}")
             raise DALException(f"Erro inesperado na busca: {e}", e)
     
+    def _register_vector(self) -> None:
+        """
+        Registra os adapters do pgvector na conexão.
+        
+        numpy arrays são enviados como literais `vector` (sem passar por
+        ARRAY[...] de numeric) e colunas `vector` retornam numpy arrays.
+        """
+        try:
+            register_vector(self._connection)
+        except psycopg2.ProgrammingError:
+            # Banco sem a extensão vector: conexão segue utilizável para o restante
+            self.logger.warning("⚠️ Tipo 'vector' não encontrado no banco - adapters pgvector não registrados")
+    
+    def _get_table_columns(self, table_name: str) -> List[str]:
+        """Colunas da tabela (consultadas no catálogo uma vez por tabela e cacheadas)."""
+        table_columns = self._table_columns.get(table_name)
+        if table_columns is None:
+            self._cursor.execute(SQL_TABLE_COLUMNS, (table_name,))
+            table_columns = [row['column_name'] for row in self._cursor.fetchall()]
+            if not table_columns:
+                raise DALException(f"Tabela '{table_name}' não encontrada")
+            self._table_columns[table_name] = table_columns
+        return table_columns
+    
     def execute_query(
         self,
         query: str,
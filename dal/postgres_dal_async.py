@@ -3,13 +3,192 @@ PostgreSQL Data Access Layer - VERSÃO ASSÍNCRONA
 Implementação assíncrona usando asyncpg para operações não-bloqueantes
 """
 
+import asyncio
 import asyncpg
+import re
 import time
-from typing import Dict, List, Any, Optional
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Any, Optional, Sequence, Tuple, Union
 from urllib.parse import urlparse
 
+from pgvector.asyncpg import register_vector
+
 from core.config import config
-from dal.base_dal import DALException, SearchResult, ConnectionInfo, ConnectionStatus
+from dal.base_dal import (
+    DALException, SearchResult, ConnectionInfo, ConnectionStatus, SQLCondition,
+    build_vector_search_sql, quote_identifier, resolve_search_projection
+)
+
+
+# ============================================================================
+# POOL COMPARTILHADO (um por DSN no processo)
+# ============================================================================
+
+_shared_pools: Dict[str, asyncpg.Pool] = {}
+_shared_pool_loops: Dict[str, asyncio.AbstractEventLoop] = {}
+_shared_pool_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+# Colunas de cada tabela (por DSN), usadas na projeção das buscas vetoriais
+_table_columns_cache: Dict[Tuple[str, str], List[str]] = {}
+
+SQL_TABLE_COLUMNS = """
+    SELECT column_name
+    FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = $1
+    ORDER BY ordinal_position
+"""
+
+
+def _safe_dsn(connection_string: str) -> str:
+    """Retorna host:porta/banco para logging (sem senha)."""
+    parsed_url = urlparse(connection_string)
+    return f"{parsed_url.hostname}:{parsed_url.port}/{parsed_url.path.lstrip('/')}"
+
+
+def _pool_owner_loop(dsn: str) -> Optional[asyncio.AbstractEventLoop]:
+    """
+    Retorna o event loop dono do pool da DSN, descartando pools órfãos
+    (cujo loop já foi encerrado, ex.: criados dentro de asyncio.run).
+    """
+    pool = _shared_pools.get(dsn)
+    loop = _shared_pool_loops.get(dsn)
+    if pool is None or loop is None:
+        return None
+    if loop.is_closed() or pool.is_closing():
+        _shared_pools.pop(dsn, None)
+        _shared_pool_loops.pop(dsn, None)
+        try:
+            pool.terminate()
+        except Exception:
+            pass
+        return None
+    return loop
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """
+    Registra o codec binário do pgvector em cada conexão nova do pool.
+    
+    Embeddings são enviados no formato binário do tipo `vector` (direto de
+    listas/arrays, sem serializar texto) e colunas `vector` retornam numpy arrays.
+    """
+    try:
+        await register_vector(conn)
+    except ValueError:
+        # Banco sem a extensão vector: conexão segue utilizável para o restante
+        config.get_logger("PostgresDALAsync").warning(
+            "⚠️ Tipo 'vector' não encontrado no banco - codec pgvector não registrado"
+        )
+
+
+async def get_shared_pool(connection_string: Optional[str] = None) -> asyncpg.Pool:
+    """
+    Retorna o pool asyncpg compartilhado para a DSN, criando-o na primeira chamada.
+    
+    Todos os agentes e serviços assíncronos que usam a mesma DSN tomam conexões
+    emprestadas deste pool em vez de abrir/fechar conexões a cada pergunta.
+    
+    Args:
+        connection_string: DSN do banco. Se None, usa configuração padrão
+        
+    Returns:
+        Pool asyncpg pronto para uso
+        
+    Raises:
+        DALException: Se o pool não puder ser criado ou pertencer a outro event loop
+    """
+    dsn = connection_string or config.database.main_url
+    loop = asyncio.get_running_loop()
+    
+    owner = _pool_owner_loop(dsn)
+    if owner is loop:
+        return _shared_pools[dsn]
+    if owner is not None:
+        raise DALException("Pool compartilhado pertence a outro event loop", None)
+    
+    lock = _shared_pool_locks.get(loop)
+    if lock is None:
+        lock = _shared_pool_locks[loop] = asyncio.Lock()
+    
+    async with lock:
+        if _pool_owner_loop(dsn) is loop:
+            return _shared_pools[dsn]
+        
+        pool_config = config.database_pool
+        logger = config.get_logger("PostgresDALAsync")
+        logger.info(
+            f"🔌 Criando pool asyncpg compartilhado em {_safe_dsn(dsn)} "
+            f"(min={pool_config.min_size}, max={pool_config.max_size})"
+        )
+        
+        try:
+            pool = await asyncio.wait_for(
+                asyncpg.create_pool(
+                    dsn,
+                    min_size=pool_config.min_size,
+                    max_size=pool_config.max_size,
+                    statement_cache_size=pool_config.statement_cache_size,
+                    max_inactive_connection_lifetime=pool_config.max_inactive_connection_lifetime,
+                    command_timeout=pool_config.command_timeout,
+                    init=_init_connection
+                ),
+                timeout=pool_config.connect_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"❌ Timeout ao criar pool PostgreSQL (>{pool_config.connect_timeout:.0f}s) - Verifique conectividade de rede")
+            raise DALException(
+                f"Timeout na conexão com banco de dados (>{pool_config.connect_timeout:.0f}s). Verifique VPN/rede.",
+                None
+            )
+        except asyncpg.PostgresError as e:
+            logger.error(f"❌ Erro ao criar pool PostgreSQL: {e}")
+            raise DALException(f"Falha na conexão PostgreSQL: {e}", e)
+        
+        _shared_pools[dsn] = pool
+        _shared_pool_loops[dsn] = loop
+        logger.info("✅ Pool asyncpg compartilhado pronto")
+        return pool
+
+
+async def close_shared_pools() -> None:
+    """Fecha todos os pools compartilhados do loop atual (usar no shutdown da aplicação)."""
+    loop = asyncio.get_running_loop()
+    for dsn in list(_shared_pools):
+        if _shared_pool_loops.get(dsn) is not loop:
+            continue
+        pool = _shared_pools.pop(dsn)
+        _shared_pool_loops.pop(dsn, None)
+        try:
+            await pool.close()
+        except Exception as e:
+            config.get_logger("PostgresDALAsync").warning(f"⚠️ Erro ao fechar pool {_safe_dsn(dsn)}: {e}")
+
+
+def _to_positional(sql: str, start_index: int) -> Tuple[str, int]:
+    """Converte placeholders `%s` em `$n` (asyncpg), retornando o próximo índice livre."""
+    counter = [start_index]
+    
+    def _next(_match):
+        placeholder = f"${counter[0]}"
+        counter[0] += 1
+        return placeholder
+    
+    return re.sub(r"%s", _next, sql), counter[0]
+
+
+def get_pool_stats() -> Dict[str, Dict[str, int]]:
+    """Retorna tamanho/ociosidade de cada pool compartilhado (para métricas)."""
+    return {
+        _safe_dsn(dsn): {
+            'size': pool.get_size(),
+            'idle': pool.get_idle_size(),
+            'min_size': pool.get_min_size(),
+            'max_size': pool.get_max_size()
+        }
+        for dsn, pool in _shared_pools.items()
+        if not pool.is_closing()
+    }
 
 
 class PostgresDALAsync:
@@ -19,8 +198,11 @@ class PostgresDALAsync:
     Características:
     - Totalmente assíncrono usando asyncpg
     - Suporte completo ao pgvector para busca por similaridade
-    - Connection pooling automático
+    - Pool de conexões compartilhado por DSN (ver get_shared_pool)
     - Operações não-bloqueantes para máxima performance
+    
+    Instâncias são baratas: todas que usam a mesma DSN compartilham o mesmo
+    pool, e cada operação empresta uma conexão apenas pelo tempo da query.
     """
     
     def __init__(self, connection_string: Optional[str] = None):
@@ -35,78 +217,106 @@ class PostgresDALAsync:
         self._pool = None
         self.logger = config.get_logger("PostgresDALAsync")
         
+    async def initialize(self) -> bool:
+        """Vincula esta instância ao pool compartilhado da DSN (criando-o se necessário)."""
+        self._pool = await get_shared_pool(self.connection_string)
+        return True
+    
+    @property
+    def pool(self) -> Optional[asyncpg.Pool]:
+        """Pool asyncpg compartilhado (disponível após initialize())."""
+        return self._pool
+    
     async def connect(self) -> bool:
-        """Estabelece conexão assíncrona com PostgreSQL."""
+        """Garante acesso ao pool compartilhado (mantido por compatibilidade)."""
         try:
-            if self._connection and not self._connection.is_closed():
+            if self._pool_usable():
                 return True
-                
-            self.logger.info("🔌 Estabelecendo conexão assíncrona com PostgreSQL...")
             
-            # Parse da URL de conexão para logging (sem senha)
-            parsed_url = urlparse(self.connection_string)
-            safe_url = f"{parsed_url.hostname}:{parsed_url.port}/{parsed_url.path.lstrip('/')}"
-            self.logger.info(f"📡 Conectando em (ASYNC): {safe_url}")
-            
-            # Criar conexão assíncrona com timeout de 10 segundos
-            import asyncio
-            self._connection = await asyncio.wait_for(
-                asyncpg.connect(self.connection_string),
-                timeout=10.0
-            )
-            
-            self.logger.info("✅ Conexão PostgreSQL assíncrona estabelecida com sucesso")
-            return True
+            self.logger.info(f"📡 Conectando em (ASYNC/POOL): {_safe_dsn(self.connection_string)}")
+            return await self.initialize()
             
-        except asyncio.TimeoutError:
-            self.logger.error(f"❌ Timeout ao conectar PostgreSQL (>10s) - Verifique conectividade de rede")
-            raise DALException("Timeout na conexão com banco de dados (>10s). Verifique VPN/rede.", None)
-        except asyncpg.PostgresError as e:
-            self.logger.error(f"❌ Erro ao conectar PostgreSQL (ASYNC): {e}")
-            raise DALException(f"Falha na conexão PostgreSQL: {e}", e)
+        except DALException:
+            raise
         except Exception as e:
             self.logger.error(f"❌ Erro inesperado na conexão (ASYNC): {e}")
             raise DALException(f"Erro inesperado: {e}", e)
     
     async def disconnect(self) -> bool:
-        """Encerra a conexão assíncrona com PostgreSQL."""
+        """
+        Libera a referência ao pool compartilhado.
+        
+        O pool em si só é fechado por close_shared_pools() no shutdown da aplicação.
+        """
         try:
             if self._connection and not self._connection.is_closed():
                 await self._connection.close()
-                self._connection = None
-                
-            if self._pool:
-                await self._pool.close()
-                self._pool = None
-                
-            self.logger.info("🔌 Conexão PostgreSQL assíncrona encerrada")
+            self._connection = None
+            self._pool = None
             return True
             
         except Exception as e:
             self.logger.error(f"❌ Erro ao desconectar (ASYNC): {e}")
             return False
     
+    def _pool_usable(self) -> bool:
+        """Indica se o pool vinculado ainda é o pool ativo do event loop em execução."""
+        return (
+            self._pool is not None
+            and _shared_pools.get(self.connection_string) is self._pool
+            and _pool_owner_loop(self.connection_string) is asyncio.get_running_loop()
+        )
+    
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        """
+        Empresta uma conexão do pool compartilhado.
+        
+        Quando chamado a partir de um event loop diferente do que criou o pool
+        (ex.: wrappers síncronos com asyncio.run), usa uma conexão dedicada de
+        vida curta, já que conexões asyncpg não podem cruzar event loops.
+        """
+        owner = _pool_owner_loop(self.connection_string)
+        
+        if owner is None or owner is asyncio.get_running_loop():
+            if not self._pool_usable():
+                await self.connect()
+            async with self._pool.acquire() as conn:
+                yield conn
+            return
+        
+        try:
+            conn = await asyncio.wait_for(
+                asyncpg.connect(
+                    self.connection_string,
+                    statement_cache_size=config.database_pool.statement_cache_size
+                ),
+                timeout=config.database_pool.connect_timeout
+            )
+        except asyncio.TimeoutError:
+            self.logger.error("❌ Timeout ao conectar PostgreSQL - Verifique conectividade de rede")
+            raise DALException("Timeout na conexão com banco de dados. Verifique VPN/rede.", None)
+        try:
+            await _init_connection(conn)
+            yield conn
+        finally:
+            await conn.close()
+    
     async def test_connection(self) -> ConnectionInfo:
         """Testa a conexão de forma assíncrona e retorna informações detalhadas."""
         try:
-            if not self._connection or self._connection.is_closed():
-                if not await self.connect():
-                    return ConnectionInfo(
-                        status=ConnectionStatus.ERROR,
-                        error_message="Não foi possível estabelecer conexão"
-                    )
-            
-            # Obter informações do banco
-            db_info = await self._connection.fetchrow(
-                "SELECT current_database(), current_user, inet_server_addr(), inet_server_port()"
-            )
-            
-            # Verificar extensões instaladas
-            extensions = await self._connection.fetch("""
-                SELECT extname FROM pg_extension 
-                WHERE extname IN ('vector', 'pgvector', 'uuid-ossp', 'btree_gin')
-                ORDER BY extname
-            """)
+            async with self.acquire() as conn:
+                # Obter informações do banco
+                db_info = await conn.fetchrow(
+                    "SELECT current_database(), current_user, inet_server_addr(), inet_server_port()"
+                )
+                
+                # Verificar extensões instaladas
+                extensions = await conn.fetch("""
+                    SELECT extname FROM pg_extension 
+                    WHERE extname IN ('vector', 'pgvector', 'uuid-ossp', 'btree_gin')
+                    ORDER BY extname
+                """)
             
             parsed_url = urlparse(self.connection_string)
             
@@ -131,7 +341,10 @@ class PostgresDALAsync:
         query_vector: List[float],
         limit: int = 10,
         filters: Optional[Dict[str, Any]] = None,
-        similarity_threshold: Optional[float] = None
+        similarity_threshold: Optional[float] = None,
+        conditions: Optional[List[SQLCondition]] = None,
+        columns: Optional[Sequence[str]] = None,
+        include_vector: bool = False
     ) -> SearchResult:
         """
         Realiza busca por similaridade vetorial de forma ASSÍNCRONA usando pgvector.
@@ -140,8 +353,11 @@ class PostgresDALAsync:
             table_name: Nome da tabela
             query_vector: Vetor de consulta (embedding)
             limit: Número máximo de resultados
-            filters: Filtros adicionais (WHERE clauses)
+            filters: Filtros adicionais (coluna -> valor ou lista de valores)
             similarity_threshold: Threshold mínimo de similaridade coseno
+            conditions: Cláusulas WHERE parametrizadas (placeholders %s, convertidos para $n)
+            columns: Colunas a retornar (None = todas, exceto o vetor)
+            include_vector: Se o vetor de cada documento deve ser retornado (numpy array)
             
         Returns:
             SearchResult com documentos e metadados da busca
@@ -149,24 +365,8 @@ class PostgresDALAsync:
         start_time = time.time()
         
         try:
-            if not self._connection or self._connection.is_closed():
-                await self.connect()
-            
-            # Construir query com segurança
-            quoted_table = f'"{table_name}"'
-            
-            # Converter o vetor para string no formato correto do pgvector
-            vector_str = '[' + ','.join(map(str, query_vector)) + ']'
-            
-            # Query base para busca por similaridade coseno
-            query = f"""
-                SELECT *,
-                       conteudo_original AS conteudo,
-                       1 - (vetor <=> $1::vector) as similarity_score
-                FROM {quoted_table}
-            """
-            
-            params = [vector_str]  # Passar como string
+            # Vetor enviado no formato binário do pgvector (codec registrado no pool)
+            params = [query_vector]
             param_index = 2
             
             # Adicionar filtros se fornecidos
@@ -176,31 +376,47 @@ class PostgresDALAsync:
                 for key, value in filters.items():
                     if isinstance(value, list):
                         placeholders = ','.join([f'${i}' for i in range(param_index, param_index + len(value))])
-                        where_clauses.append(f"{key} IN ({placeholders})")
+                        where_clauses.append(f"{quote_identifier(key)} IN ({placeholders})")
                         params.extend(value)
                         param_index += len(value)
                     else:
-                        where_clauses.append(f"{key} = ${param_index}")
+                        where_clauses.append(f"{quote_identifier(key)} = ${param_index}")
                         params.append(value)
                         param_index += 1
             
-            # Adicionar threshold de similaridade se fornecido
+            # Adicionar cláusulas parametrizadas (ex.: governança)
+            for condition in conditions or []:
+                condition_sql, param_index = _to_positional(condition.sql, param_index)
+                where_clauses.append(f"({condition_sql})")
+                params.extend(condition.params)
+            
+            limit_placeholder = f"${param_index}"
+            params.append(limit)
+            param_index += 1
+            
+            threshold_placeholder = None
             if similarity_threshold:
-                where_clauses.append(f"(1 - (vetor <=> $1::vector)) >= ${param_index}")
+                threshold_placeholder = f"${param_index}"
                 params.append(similarity_threshold)
                 param_index += 1
             
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-            
-            # Ordenar por similaridade e limitar resultados
-            query += f" ORDER BY similarity_score DESC LIMIT ${param_index}"
-            params.append(limit)
-            
             self.logger.debug(f"🔍 Executando busca vetorial assíncrona em {table_name} (limit={limit})")
             
-            # Executar query de forma assíncrona
-            results = await self._connection.fetch(query, *params)
+            async with self.acquire() as conn:
+                projection = resolve_search_projection(
+                    await self._get_table_columns(conn, table_name), columns, include_vector
+                )
+                query = build_vector_search_sql(
+                    table_name,
+                    projection,
+                    where_clauses,
+                    vector_placeholder="$1",
+                    limit_placeholder=limit_placeholder,
+                    threshold_placeholder=threshold_placeholder
+                )
+                
+                # Executar query de forma assíncrona
+                results = await conn.fetch(query, *params)
             
             # Converter para lista de dicionários
             documents = [dict(row) for row in results]
@@ -219,11 +435,15 @@ class PostgresDALAsync:
                     'table_name': table_name,
                     'query_vector_dim': len(query_vector),
                     'filters_applied': filters or {},
+                    'conditions_applied': len(conditions or []),
                     'similarity_threshold': similarity_threshold,
+                    'columns': projection,
                     'async': True
                 }
             )
             
+        except DALException:
+            raise
         except asyncpg.PostgresError as e:
             self.logger.error(f"❌ Erro PostgreSQL na busca vetorial assíncrona: {e}")
             raise DALException(f"Erro na busca vetorial: {e}", e)
@@ -231,6 +451,18 @@ class PostgresDALAsync:
             self.logger.error(f"❌ Erro inesperado na busca assíncrona: {e}")
             raise DALException(f"Erro inesperado na busca: {e}", e)
     
+    async def _get_table_columns(self, conn: asyncpg.Connection, table_name: str) -> List[str]:
+        """Colunas da tabela (consultadas no catálogo uma vez por DSN/tabela e cacheadas)."""
+        cache_key = (self.connection_string, table_name)
+        table_columns = _table_columns_cache.get(cache_key)
+        if table_columns is None:
+            rows = await conn.fetch(SQL_TABLE_COLUMNS, table_name)
+            table_columns = [row['column_name'] for row in rows]
+            if not table_columns:
+                raise DALException(f"Tabela '{table_name}' não encontrada")
+            _table_columns_cache[cache_key] = table_columns
+        return table_columns
+    
     async def execute_query_async(
         self,
         query: str,
@@ -238,15 +470,13 @@ class PostgresDALAsync:
     ) -> List[Dict[str, Any]]:
         """Executa uma consulta SQL customizada de forma ASSÍNCRONA."""
         try:
-            if not self._connection or self._connection.is_closed():
-                await self.connect()
-            
             self.logger.debug(f"🔍 Executando query assíncrona: {query[:100]}...")
             
-            if parameters:
-                results = await self._connection.fetch(query, *parameters)
-            else:
-                results = await self._connection.fetch(query)
+            async with self.acquire() as conn:
+                if parameters:
+                    results = await conn.fetch(query, *parameters)
+                else:
+                    results = await conn.fetch(query)
             
             return [dict(row) for row in results]
                 
@@ -257,6 +487,41 @@ class PostgresDALAsync:
             self.logger.error(f"❌ Erro inesperado na query assíncrona: {e}")
             raise DALException(f"Erro inesperado na query: {e}", e)
     
+    async def copy_records_async(
+        self,
+        table_name: str,
+        columns: Sequence[str],
+        records: Union[Iterable[Sequence[Any]], AsyncIterable[Sequence[Any]]],
+        timeout: Optional[float] = None,
+        before: Optional[Callable[[asyncpg.Connection], Awaitable[Any]]] = None
+    ) -> int:
+        """
+        Grava registros com COPY binário (FROM STDIN) em uma única transação.
+        
+        `records` pode ser um iterável assíncrono: as linhas são enviadas ao
+        banco à medida que são produzidas. Colunas `vector` usam o codec binário
+        do pgvector registrado na conexão. `before` roda na mesma transação,
+        antes do COPY (ex.: remover ou atualizar linhas existentes).
+        
+        Returns:
+            Número de linhas gravadas
+        """
+        try:
+            async with self.acquire() as conn:
+                async with conn.transaction():
+                    if before is not None:
+                        await before(conn)
+                    status = await conn.copy_records_to_table(
+                        table_name,
+                        records=records,
+                        columns=list(columns),
+                        timeout=timeout
+                    )
+            return int(status.split()[-1])
+        except asyncpg.PostgresError as e:
+            self.logger.error(f"❌ Erro PostgreSQL no COPY para {table_name}: {e}")
+            raise DALException(f"Erro ao gravar registros em {table_name}: {e}", e)
+    
     async def get_table_info_async(self, table_name: str) -> Dict[str, Any]:
         """Obtém informações detalhadas sobre uma tabela de forma ASSÍNCRONA."""
         try:
@@ -283,13 +548,14 @@ class PostgresDALAsync:
                 WHERE tablename = $1
             """
             
-            table_info = await self._connection.fetchrow(table_query, table_name)
-            
-            if not table_info:
-                raise DALException(f"Tabela '{table_name}' não encontrada")
-            
-            columns = await self._connection.fetch(columns_query, table_name)
-            indexes = await self._connection.fetch(indexes_query, table_name)
+            async with self.acquire() as conn:
+                table_info = await conn.fetchrow(table_query, table_name)
+                
+                if not table_info:
+                    raise DALException(f"Tabela '{table_name}' não encontrada")
+                
+                columns = await conn.fetch(columns_query, table_name)
+                indexes = await conn.fetch(indexes_query, table_name)
             
             return {
                 'table_info': dict(table_info),
@@ -313,7 +579,8 @@ class PostgresDALAsync:
                 ORDER BY tablename
             """
             
-            results = await self._connection.fetch(query)
+            async with self.acquire() as conn:
+                results = await conn.fetch(query)
             
             return [row['tablename'] for row in results]
             
@@ -373,6 +640,7 @@ if __name__ == "__main__":
         
         finally:
             await dal.disconnect()
+            await close_shared_pools()
             print("\n👋 Teste concluído")
     
     asyncio.run(test_dal_async())
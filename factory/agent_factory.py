@@ -338,8 +338,12 @@ import asyncio
 
 from subagents.base_subagent import SubagentConfig
 from dal.postgres_dal_async import PostgresDALAsync
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
 from core.config import config
+from core.embedding_cache import get_embedding_service
+from core.llm_clients import openai_http_clients
+from core.state_store import BoundedStateStore
+from core.streaming import gerar_resposta_llm
 
 PROMPT_TEMPLATE = dedent(
     """
@@ -369,7 +373,7 @@ class Agente{identifier}Async:
         self.dal_async = PostgresDALAsync()
         self.llm = None
         self.embeddings = None
-        self.memoria_conversas = {{}}
+        self.memoria_conversas = BoundedStateStore("memoria_conversas:{identifier}")
         
         # Configuração de ferramentas MCP
         self.enable_mcp_tools = {enable_mcp_tools}
@@ -387,13 +391,11 @@ class Agente{identifier}Async:
             api_key=api_key,
             model="{llm_model}",
             temperature={llm_temperature},
-            max_tokens={llm_max_tokens}
+            max_tokens={llm_max_tokens},
+            **openai_http_clients()
         )
         
-        self.embeddings = OpenAIEmbeddings(
-            api_key=api_key,
-            model=config.openai.embedding_model
-        )
+        self.embeddings = get_embedding_service(config.openai.embedding_model)
     
     async def processar_async(self, pergunta: str, user_profile: dict) -> str:
         """Processa pergunta de forma ASSÍNCRONA"""
@@ -401,14 +403,8 @@ class Agente{identifier}Async:
             if self.config.debug:
                 print(f"🔄 [{{self.config.name}}] Processando pergunta (ASYNC): '{{pergunta[:50]}}...'")
             
-            # Conectar ao banco de forma assíncrona
-            await self.dal_async.connect()
-            
             # Gerar embedding da pergunta
-            query_embedding = await asyncio.to_thread(
-                self.embeddings.embed_query,
-                pergunta
-            )
+            query_embedding = await self.embeddings.aembed_query(pergunta)
             
             # Buscar contexto relevante de forma assíncrona
             search_result = await self.dal_async.search_vectors_async(
@@ -439,12 +435,7 @@ class Agente{identifier}Async:
             if self.config.debug:
                 print(f"🤖 [{{self.config.name}}] Gerando resposta com LLM (ASYNC)...")
             
-            resposta = await asyncio.to_thread(
-                self.llm.invoke,
-                prompt_final
-            )
-            
-            resposta_texto = resposta.content if hasattr(resposta, 'content') else str(resposta)
+            resposta_texto = await gerar_resposta_llm(self.llm, prompt_final, self.config.name)
             
             # Armazenar na memória
             self._adicionar_memoria(usuario_id, pergunta, resposta_texto)
@@ -458,9 +449,6 @@ class Agente{identifier}Async:
             error_msg = f"❌ Erro ao processar pergunta (Agente {{self.config.name}}): {{str(e)}}"
             print(error_msg)
             return "{error_message}"
-        
-        finally:
-            await self.dal_async.disconnect()
     
     def processar_pergunta(self, pergunta: str, user_profile: dict) -> str:
         """Wrapper síncrono para compatibilidade com sistema hierárquico"""
@@ -521,10 +509,7 @@ class Agente{identifier}Async:
     
     def _preparar_historico(self, usuario_id: str) -> str:
         """Prepara o histórico de conversas do usuário"""
-        if usuario_id not in self.memoria_conversas:
-            return ""
-        
-        historico = self.memoria_conversas[usuario_id]
+        historico = self.memoria_conversas.get(usuario_id)
         if not historico:
             return ""
         
@@ -543,14 +528,10 @@ class Agente{identifier}Async:
     
     def _adicionar_memoria(self, usuario_id: str, pergunta: str, resposta: str):
         """Adiciona interação à memória de conversas"""
-        if usuario_id not in self.memoria_conversas:
-            self.memoria_conversas[usuario_id] = []
-        
-        self.memoria_conversas[usuario_id].append((pergunta, resposta))
+        historico = self.memoria_conversas.get(usuario_id, []) + [(pergunta, resposta)]
         
-        # Manter apenas últimas 10 interações por usuário
-        if len(self.memoria_conversas[usuario_id]) > 10:
-            self.memoria_conversas[usuario_id] = self.memoria_conversas[usuario_id][-10:]
+        # Manter apenas últimas 10 interações por usuário (reatribuir renova o TTL no store)
+        self.memoria_conversas[usuario_id] = historico[-10:]
 
 
 def criar_agente_{identifier}_async(*, debug: bool = False) -> Agente{identifier}Async:
@@ -654,7 +635,10 @@ class {identifier}CoordinatorAsync:
                 else:
                     logger.warning(f"⚠️ Falha ao criar sub-agente {{name}}")
             
-            # 4. Verificar estatísticas
+            # 4. Centróides do roteador vetorial (uma vez, no startup)
+            await self.hierarchical_agent.prepare_router_async()
+            
+            # 5. Verificar estatísticas
             stats = self.hierarchical_agent.get_hierarchy_stats()
             logger.info(f"📊 Hierarquia {specialty} configurada (ASYNC): {{stats}}")
             
@@ -704,9 +688,8 @@ class {identifier}CoordinatorAsync:
             else:
                 pergunta_com_dica = pergunta
             
-            # Processar de forma assíncrona
-            resultado = await asyncio.to_thread(
-                self.hierarchical_agent.process_with_hierarchy,
+            # Caminho assíncrono nativo (sem thread/event loop extra por pergunta)
+            resultado = await self.hierarchical_agent.process_with_hierarchy_async(
                 pergunta_com_dica,
                 user_profile
             )
@@ -722,11 +705,7 @@ class {identifier}CoordinatorAsync:
             logger.error(f"❌ Erro no processamento hierárquico (ASYNC): {{e}}")
             # Fallback para agente base
             if self.base_agent:
-                return await asyncio.to_thread(
-                    self.base_agent.processar_pergunta,
-                    pergunta,
-                    user_profile
-                )
+                return await self.hierarchical_agent.call_agent_async(self.base_agent, pergunta, user_profile)
             else:
                 return "❌ Erro no sistema de {specialty}. Tente novamente ou contate o suporte."
     
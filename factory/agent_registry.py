@@ -19,6 +19,8 @@ class AgentRegistry:
         
         self.registry_file = Path(registry_file)
         self.agents: Dict[str, Dict[str, Any]] = self._load_registry()
+        # Incrementado a cada alteração/recarga (usado para invalidar caches dependentes)
+        self.version = 0
     
     def _load_registry(self) -> Dict[str, Dict[str, Any]]:
         """Carrega registro do arquivo JSON"""
@@ -35,10 +37,12 @@ class AgentRegistry:
         """Recarrega o registry do arquivo JSON"""
         print(f"🔄 [Registry] Recarregando dados do arquivo...")
         self.agents = self._load_registry()
+        self.version += 1
         print(f"✅ [Registry] {len(self.agents)} agentes recarregados")
     
     def _save_registry(self):
         """Salva registro no arquivo JSON"""
+        self.version += 1
         try:
             # Criar diretório se não existir
             self.registry_file.parent.mkdir(parents=True, exist_ok=True)
@@ -15,12 +15,16 @@ CREATE TABLE IF NOT EXISTS knowledge_governance (
     responsavel TEXT,
     aprovador TEXT,
     data_ingestao TIMESTAMPTZ DEFAULT NOW(),
-    vetor VECTOR(1536) NOT NULL
+    vetor VECTOR(1536) NOT NULL,
+    documento_id TEXT,
+    documento_versao INTEGER,
+    hash_conteudo TEXT
 );
 
 CREATE INDEX IF NOT EXISTS idx_governance_tenant_id ON knowledge_governance (tenant_id);
 CREATE INDEX IF NOT EXISTS idx_governance_fonte_documento ON knowledge_governance (fonte_documento);
 CREATE INDEX IF NOT EXISTS idx_governance_data_validade ON knowledge_governance (data_validade);
+CREATE INDEX IF NOT EXISTS idx_governance_documento ON knowledge_governance (documento_id, hash_conteudo);
 
 CREATE INDEX IF NOT EXISTS idx_governance_vetor_hnsw
     ON knowledge_governance USING hnsw (vetor vector_cosine_ops);
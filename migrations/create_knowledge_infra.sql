@@ -15,12 +15,16 @@ CREATE TABLE IF NOT EXISTS knowledge_infra (
     responsavel TEXT,
     aprovador TEXT,
     data_ingestao TIMESTAMPTZ DEFAULT NOW(),
-    vetor VECTOR(1536) NOT NULL
+    vetor VECTOR(1536) NOT NULL,
+    documento_id TEXT,
+    documento_versao INTEGER,
+    hash_conteudo TEXT
 );
 
 CREATE INDEX IF NOT EXISTS idx_infra_tenant_id ON knowledge_infra (tenant_id);
 CREATE INDEX IF NOT EXISTS idx_infra_fonte_documento ON knowledge_infra (fonte_documento);
 CREATE INDEX IF NOT EXISTS idx_infra_data_validade ON knowledge_infra (data_validade);
+CREATE INDEX IF NOT EXISTS idx_infra_documento ON knowledge_infra (documento_id, hash_conteudo);
 
 CREATE INDEX IF NOT EXISTS idx_infra_vetor_hnsw
     ON knowledge_infra USING hnsw (vetor vector_cosine_ops);
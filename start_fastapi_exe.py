@@ -6,8 +6,13 @@ Este arquivo substitui o start_fastapi.py quando rodando como executável
 import sys
 import os
 import shutil
+import multiprocessing
 from pathlib import Path
 
+# Necessário para o pool de processos da fila de ingestão no executável
+# (os processos filhos reexecutam este arquivo)
+multiprocessing.freeze_support()
+
 # ============================================================================
 # Configurar paths para executável
 # ============================================================================
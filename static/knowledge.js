@@ -192,6 +192,7 @@ function clearKnowledgeForm() {
     document.getElementById('knDadoSensivel').checked = false;
     document.getElementById('knApenasSi').checked = false;
     document.getElementById('knProjetos').value = 'N/A';
+    document.getElementById('knDocumentoId').value = '';
     
     // Limpar log
     clearLog();
@@ -219,7 +220,9 @@ function getMetadata() {
         idioma: document.getElementById('knIdioma').value,
         data_validade: document.getElementById('knDataValidade').value || null,
         dado_sensivel: document.getElementById('knDadoSensivel').checked,
-        apenas_para_si: document.getElementById('knApenasSi').checked
+        apenas_para_si: document.getElementById('knApenasSi').checked,
+        // Vazio = documento novo; preenchido = nova versão do documento com esse ID
+        documento_id: document.getElementById('knDocumentoId').value.trim() || null
     };
 }
 
@@ -246,6 +249,12 @@ async function startIngestion() {
         return;
     }
     
+    const documentoId = document.getElementById('knDocumentoId').value.trim();
+    if (documentoId && selectedFiles.length > 1) {
+        alert('❌ Para atualizar um documento existente (ID do documento), envie um único arquivo.');
+        return;
+    }
+    
     // Preparar UI
     const startBtn = document.getElementById('startIngestionBtn');
     const statusDiv = document.getElementById('ingestionStatus');
@@ -323,16 +332,58 @@ async function processFile(file, targetAgent, metadata) {
         throw new Error(error.detail || 'Erro ao processar arquivo');
     }
     
-    const result = await response.json();
+    // A ingestão roda em segundo plano: acompanhar o job até terminar
+    const job = await response.json();
+    addLog(`  → Job de ingestão criado: ${job.job_id}`, 'info');
+    
+    const result = await waitForIngestionJob(job.status_url);
     
     addLog(`  → Texto extraído: ${result.text_length} caracteres`, 'info');
     addLog(`  → Chunks gerados: ${result.chunks_count}`, 'info');
+    addLog(`  → ID do documento: ${result.document_id} (use-o para enviar uma nova versão)`, 'info');
+    if (result.document_version > 1) {
+        addLog(`  → Versão ${result.document_version}: ${result.unchanged_count} chunks inalterados, ${result.deleted_count} removidos`, 'info');
+    }
     addLog(`  → Embeddings criados: ${result.embeddings_count}`, 'info');
     addLog(`  → Inseridos no banco: ${result.inserted_count}`, 'success');
     
     return result;
 }
 
+async function waitForIngestionJob(statusUrl, intervalMs = 2000) {
+    let lastProgress = null;
+    
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+        
+        const response = await fetch(statusUrl, {
+            headers: {
+                'Authorization': `Bearer ${localStorage.getItem('token')}`
+            }
+        });
+        
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Erro ao consultar job de ingestão');
+        }
+        
+        const job = await response.json();
+        
+        const progress = `${job.stage}: ${job.message}`;
+        if (job.stage && progress !== lastProgress) {
+            addLog(`  → [${Math.round(job.progress * 100)}%] ${progress}`, 'info');
+            lastProgress = progress;
+        }
+        
+        if (job.status === 'done') {
+            return job.result;
+        }
+        if (job.status === 'error') {
+            throw new Error(job.error || 'Erro ao processar arquivo');
+        }
+    }
+}
+
 function updateStatus(message) {
     const statusMessage = document.getElementById('statusMessage');
     if (statusMessage) {
@@ -2,17 +2,56 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import json
 import warnings
 from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
 
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_openai import ChatOpenAI
 
-from dal import get_knowledge_dal, BaseDAL
+from core.agent_classifier import (
+    get_routing_plan, plan_delegation, plan_tools, reset_routing_plan, set_routing_plan
+)
+from core.embedding_cache import CachedEmbeddings, get_embedding_service
+from core.llm_clients import openai_http_clients
+from core.state_store import BoundedStateStore
+from core.streaming import gerar_resposta_llm, reset_stream_answer, reset_stream_target, suspend_stream
+from dal import get_knowledge_dal, BaseDAL, SQLCondition
+from dal.postgres_dal_async import PostgresDALAsync
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
 
+# Países cobertos pelo valor "ALL_LATAM" nas listas de governança
+PAISES_LATAM = {"BR", "MX", "AR", "CL", "CO", "PE", "VE", "EC", "UY", "PY", "BO"}
+
+# Consultas fixas da busca multilíngue de governança (embeddings pré-computados no startup)
+TERMOS_GOVERNANCA = [
+    "FDA CFR 21 Part 11 electronic signature",
+    "ABNT NBR ISO validação sistemas",
+    "RDC ANVISA regulamentação",
+    "governance policy signature validation"
+]
+
+# Coletor do contexto da resposta (documentos e embedding da pergunta) para a
+# validação externa: um dict por chamada, fornecido pelo chamador, em vez de
+# atributos da instância compartilhados entre requisições concorrentes
+_contexto_validacao: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "subagent_validation_context", default=None
+)
+
+
+def set_validation_context(coletor: Optional[Dict[str, Any]]) -> contextvars.Token:
+    """Ativa o coletor de contexto de validação (retorna o token para reset)."""
+    return _contexto_validacao.set(coletor)
+
+
+def reset_validation_context(token: contextvars.Token) -> None:
+    """Restaura o coletor anterior a set_validation_context."""
+    _contexto_validacao.reset(token)
+
 
 # ============================================================================
 # QUICK WINS: Classes de otimização de performance
@@ -27,7 +66,7 @@ class ProfileAnalyzer:
         Extrai informações do perfil para otimizar buscas.
         
         Returns:
-            Dict com: geografia, projetos (list), nivel_hierarquico, area
+            Dict com: nome, geografia, projetos (list), nivel_hierarquico, area
         """
         def _get_val(perfil: Dict, *keys):
             for key in keys:
@@ -49,8 +88,10 @@ class ProfileAnalyzer:
         projetos = _normalize_list(projetos_raw)
         nivel = int(_get_val(perfil_usuario, "nivel_hierarquico", "Nivel_Hierarquico") or 1)
         area = _get_val(perfil_usuario, "area", "Departamento")
+        nome = _get_val(perfil_usuario, "nome", "Nome")
         
         return {
+            "nome": nome,
             "geografia": geografia,
             "projetos": projetos,
             "nivel_hierarquico": nivel,
@@ -58,23 +99,125 @@ class ProfileAnalyzer:
         }
 
 
+class GovernanceFilterBuilder:
+    """
+    Traduz o perfil analisado (ProfileAnalyzer) em cláusulas WHERE de governança.
+    
+    Replica no SQL as regras de BaseSubagent.verificar_permissao_documento para
+    que o LIMIT da busca vetorial retorne apenas documentos que o usuário pode usar.
+    """
+    
+    @staticmethod
+    def _array_permite(coluna: str, tokens: List[str]) -> SQLCondition:
+        """Coluna TEXT[] nula (sem restrição) ou com algum elemento em `tokens`."""
+        return SQLCondition(
+            sql=(
+                f"{coluna} IS NULL OR EXISTS ("
+                f"SELECT 1 FROM unnest({coluna}) AS v WHERE UPPER(TRIM(v)) = ANY(%s::text[]))"
+            ),
+            params=[tokens]
+        )
+    
+    @staticmethod
+    def _tokens_valor(valor_usuario: Optional[Any]) -> List[str]:
+        """Tokens aceitos para áreas/geografias: ALL, ALL_LATAM (se aplicável) e o valor do usuário."""
+        tokens = ["ALL"]
+        if valor_usuario:
+            valor = str(valor_usuario).upper()
+            tokens.append(valor)
+            if valor in PAISES_LATAM:
+                tokens.append("ALL_LATAM")
+        return tokens
+    
+    @classmethod
+    def build(cls, perfil_analisado: Dict[str, Any]) -> List[SQLCondition]:
+        """
+        Gera as condições de governança para o perfil.
+        
+        Args:
+            perfil_analisado: Resultado de ProfileAnalyzer.analyze_user_profile
+        
+        Returns:
+            Lista de SQLCondition sobre areas_liberadas, nivel_hierarquico_minimo,
+            geografias_liberadas, projetos_liberados, data_validade, apenas_para_si
+            e dado_sensivel
+        """
+        nivel_usuario = int(perfil_analisado.get("nivel_hierarquico") or 1)
+        nome_usuario = str(perfil_analisado.get("nome") or "").strip().lower()
+        nivel_minimo_sql = "COALESCE(NULLIF(nivel_hierarquico_minimo, 0), 1)"
+        
+        condicoes = [
+            # Validade
+            SQLCondition(sql="data_validade IS NULL OR data_validade >= CURRENT_DATE", params=[]),
+            # Documentos pessoais
+            SQLCondition(
+                sql=(
+                    "NOT COALESCE(apenas_para_si, FALSE) "
+                    "OR COALESCE(TRIM(responsavel), '') = '' "
+                    "OR LOWER(TRIM(responsavel)) = %s"
+                ),
+                params=[nome_usuario]
+            ),
+            # Área e geografia
+            cls._array_permite("areas_liberadas", cls._tokens_valor(perfil_analisado.get("area"))),
+            cls._array_permite("geografias_liberadas", cls._tokens_valor(perfil_analisado.get("geografia"))),
+            # Nível hierárquico e dados sensíveis
+            SQLCondition(sql=f"{nivel_minimo_sql} <= %s", params=[nivel_usuario]),
+            SQLCondition(
+                sql=f"NOT (COALESCE(dado_sensivel, FALSE) AND %s < GREATEST({nivel_minimo_sql}, 4))",
+                params=[nivel_usuario]
+            ),
+        ]
+        
+        # Projetos: usuário com ALL vê tudo; documento com ALL ou apenas N/A é liberado
+        projetos_usuario = [str(p).upper() for p in perfil_analisado.get("projetos") or [] if p]
+        if "ALL" not in projetos_usuario:
+            condicoes.append(SQLCondition(
+                sql=(
+                    "projetos_liberados IS NULL "
+                    "OR EXISTS (SELECT 1 FROM unnest(projetos_liberados) AS p "
+                    "WHERE UPPER(TRIM(p)) = ANY(%s::text[])) "
+                    "OR (EXISTS (SELECT 1 FROM unnest(projetos_liberados) AS p WHERE UPPER(TRIM(p)) = 'N/A') "
+                    "AND NOT EXISTS (SELECT 1 FROM unnest(projetos_liberados) AS p "
+                    "WHERE TRIM(p) <> '' AND UPPER(TRIM(p)) <> 'N/A'))"
+                ),
+                params=[["ALL"] + projetos_usuario]
+            ))
+        
+        return condicoes
+
+
+def _documentos_com_similaridade(search_results) -> List[Dict[str, Any]]:
+    """Devolve os documentos com o `similarity_score` (pergunta x chunk) calculado pelo banco.
+    
+    O score fica no próprio documento para que a validação da resposta reaproveite
+    a similaridade já calculada, sem novas chamadas de embedding.
+    """
+    documentos = search_results.documents
+    for doc, score in zip(documentos, search_results.similarity_scores or []):
+        doc['similarity_score'] = score
+    return documentos
+
+
 class OptimizedDocumentSearch:
     """Busca otimizada com filtros SQL para reduzir documentos retornados."""
     
     @staticmethod
     async def search_with_profile_filter(
-        dal: BaseDAL,
+        dal: PostgresDALAsync,
         table_name: str,
         query_embedding: List[float],
         user_profile: Dict[str, Any],
         limit: int = 15
     ) -> List[Dict[str, Any]]:
         """
-        Busca documentos aplicando filtros de perfil no SQL.
-        NOTA: Esta versão é síncrona mas mantém signature async para compatibilidade futura.
+        Busca documentos aplicando os filtros de governança do perfil no SQL.
+        
+        Os filtros são avaliados junto com o ORDER BY do pgvector, então o LIMIT
+        retorna apenas documentos que o usuário pode acessar.
         
         Args:
-            dal: Data Access Layer
+            dal: Data Access Layer assíncrona (pool compartilhado)
             table_name: Nome da tabela
             query_embedding: Embedding da pergunta
             user_profile: Perfil analisado (resultado de ProfileAnalyzer)
@@ -83,30 +226,47 @@ class OptimizedDocumentSearch:
         Returns:
             Lista de documentos filtrados
         """
-        # Por enquanto, usar busca padrão da DAL sem filtros customizados
-        # A governança será aplicada depois no verificar_permissao_documento
-        # Isso mantém a compatibilidade sem quebrar o sistema existente
-        
         try:
-            # Usar método padrão da DAL
-            search_results = dal.search_vectors(
+            search_results = await dal.search_vectors_async(
                 table_name=table_name,
                 query_vector=query_embedding,
-                limit=limit * 2,  # Buscar mais para compensar filtros posteriores
-                filters=None  # Filtros complexos serão aplicados depois
+                limit=limit,
+                conditions=GovernanceFilterBuilder.build(user_profile)
             )
             
-            return search_results.documents
+            return _documentos_com_similaridade(search_results)
             
         except Exception as e:
-            # Fallback: busca mínima se der erro
+            # Fallback: tabela sem colunas de governança -> filtragem apenas em Python
             print(f"⚠️ Erro na busca otimizada: {e}")
-            search_results = dal.search_vectors(
+            search_results = await dal.search_vectors_async(
                 table_name=table_name,
                 query_vector=query_embedding,
-                limit=limit
+                limit=limit * 2
             )
-            return search_results.documents
+            return _documentos_com_similaridade(search_results)
+
+
+async def _executar_fases_concorrentes(fases: Dict[str, Awaitable[Any]]) -> Dict[str, Any]:
+    """
+    Executa fases independentes do pipeline concorrentemente e une os resultados.
+    
+    Cada fase encadeia internamente suas próprias dependências (ex.: seleção de
+    tools -> execução); o chamador só depende do conjunto completo. Se uma fase
+    falhar, as demais são canceladas e a exceção é propagada.
+    
+    Returns:
+        Resultado de cada fase, pelo nome
+    """
+    tarefas = {nome: asyncio.ensure_future(fase) for nome, fase in fases.items()}
+    try:
+        await asyncio.gather(*tarefas.values())
+    except BaseException:
+        for tarefa in tarefas.values():
+            tarefa.cancel()
+        await asyncio.gather(*tarefas.values(), return_exceptions=True)
+        raise
+    return {nome: tarefa.result() for nome, tarefa in tarefas.items()}
 
 
 class ResponseValidator:
@@ -476,9 +636,11 @@ class BaseSubagent:
     def __init__(self, config: SubagentConfig) -> None:
         self.config = config
         self.llm: Optional[ChatOpenAI] = None
-        self.embeddings: Optional[OpenAIEmbeddings] = None
+        self.embeddings: Optional[CachedEmbeddings] = None
         self.dal: Optional[BaseDAL] = None
-        self.memoria_conversas: Dict[str, List[Dict[str, Any]]] = {}
+        self.dal_async: Optional[PostgresDALAsync] = None
+        # Estado por usuário limitado (LRU + TTL): ver core.state_store
+        self.memoria_conversas: BoundedStateStore = BoundedStateStore(f"memoria_conversas:{config.identifier}")
         self.db_dsn: Optional[str] = None
         self.table_name: str = config.table_name
         # MCP Components
@@ -491,7 +653,7 @@ class BaseSubagent:
         self.last_tools_used: List[str] = []
         # QUICK WIN: Cache de análise de perfil
         self.profile_analyzer = ProfileAnalyzer()
-        self.cached_user_profiles: Dict[str, Dict[str, Any]] = {}
+        self.cached_user_profiles: BoundedStateStore = BoundedStateStore(f"perfis_analisados:{config.identifier}")
 
     # ------------------------------------------------------------------
     # Helpers de logging
@@ -558,8 +720,10 @@ class BaseSubagent:
             model=app_config.openai.chat_model,
             temperature=app_config.openai.temperature,
             max_tokens=app_config.openai.max_tokens,
+            **openai_http_clients()
         )
-        self.embeddings = OpenAIEmbeddings(api_key=api_key, model=app_config.openai.embedding_model)
+        self.embeddings = get_embedding_service(app_config.openai.embedding_model)
+        self.embeddings.warmup(TERMOS_GOVERNANCA)
         self._log("✅ Modelos OpenAI inicializados.")
 
     def configurar_vector_store(self) -> None:
@@ -578,6 +742,9 @@ class BaseSubagent:
         if not self.dal.connect():
             raise RuntimeError(f"Falha ao conectar à base de conhecimento {self.table_name}")
         
+        # Caminho assíncrono (processar_pergunta_async): mesma base, pool asyncpg compartilhado
+        self.dal_async = PostgresDALAsync(self.dal.connection_string)
+        
         self._log("✅ Conexão com a base de conhecimento estabelecida via DAL.")
 
     def _detect_table_suffix(self) -> str:
@@ -602,13 +769,13 @@ class BaseSubagent:
             return
 
         try:
-            from tools.mcp import MCPClient
+            from tools.mcp import AsyncMCPClient
             from tools.mcp.registry import default_registry
 
             self._log(f"--- 🔧 Configurando MCP Tools para categoria '{self.config.mcp_tools_category}'... ---")
             
-            # Inicializa cliente MCP
-            self.mcp_client = MCPClient(self.config.mcp_tool_server_url)
+            # Inicializa cliente MCP (assíncrono, keep-alive e retry por tool)
+            self.mcp_client = AsyncMCPClient(self.config.mcp_tool_server_url)
             
             # Carrega tools da categoria
             category_tools = default_registry.get_tools_for_category(self.config.mcp_tools_category)
@@ -654,8 +821,7 @@ class BaseSubagent:
         if "ALL" in valores_upper:
             return True
         if "ALL_LATAM" in valores_upper and valor_usuario:
-            latam_paises = {"BR", "MX", "AR", "CL", "CO", "PE", "VE", "EC", "UY", "PY", "BO"}
-            if valor_usuario.upper() in latam_paises:
+            if valor_usuario.upper() in PAISES_LATAM:
                 return True
         if not valor_usuario:
             return False
@@ -731,23 +897,23 @@ class BaseSubagent:
         self._log(f"✅ {fonte}: Documento aprovado")
         return True
 
-    def _busca_multilingue(self, pergunta: str) -> List[Dict[str, Any]]:
+    async def _busca_multilingue_async(self, pergunta: str) -> List[Dict[str, Any]]:
         """
         Realiza busca multilíngue para garantir que documentos em todos os idiomas sejam considerados.
         """
         candidatos_unicos = {}
         
         # 1. Busca com a pergunta original
-        consulta_embedding = self.embeddings.embed_query(pergunta)
+        consulta_embedding = await self.embeddings.aembed_query(pergunta)
         self._log(f"📊 Embedding gerado, consultando tabela '{self.table_name}'...")
         # Buscar candidatos usando a consulta na língua original
-        search_results = self.dal.search_vectors(
+        search_results = await self.dal_async.search_vectors_async(
             table_name=self.table_name, 
             query_vector=consulta_embedding, 
             limit=30
         )
-        # Converter resultados para dicionários
-        for r in search_results.documents:
+        # Converter resultados para dicionários (com a similaridade à pergunta original)
+        for r in _documentos_com_similaridade(search_results):
             # r já é um dicionário vindo da DAL
             doc_dict = r if isinstance(r, dict) else dict(r)
             doc_id = doc_dict.get("id")
@@ -803,9 +969,9 @@ class BaseSubagent:
         # Se houve mudança, fazer busca adicional
         if pergunta_traduzida != pergunta_lower:
             self._log(f"🌐 Fazendo busca adicional com: '{pergunta_traduzida}'")
-            consulta_embedding_trad = self.embeddings.embed_query(pergunta_traduzida)
+            consulta_embedding_trad = await self.embeddings.aembed_query(pergunta_traduzida)
             # Buscar candidatos traduzindo a consulta para inglês
-            search_results_trad = self.dal.search_vectors(
+            search_results_trad = await self.dal_async.search_vectors_async(
                 table_name=self.table_name,
                 query_vector=consulta_embedding_trad,
                 limit=30
@@ -820,17 +986,9 @@ class BaseSubagent:
         
         # 4. Busca adicional por termos-chave específicos para governança
         if any(termo in pergunta_lower for termo in ["governance", "governança", "policy", "política", "signature", "assinatura"]):
-            # Busca específica por documentos conhecidos de governança
-            termos_governanca = [
-                "FDA CFR 21 Part 11 electronic signature",
-                "ABNT NBR ISO validação sistemas",
-                "RDC ANVISA regulamentação",
-                "governance policy signature validation"
-            ]
-            
-            for termo in termos_governanca:
-                consulta_embedding_gov = self.embeddings.embed_query(termo)
-                search_results_gov = self.dal.search_vectors(
+            # Busca específica por documentos conhecidos de governança (embeddings já em cache)
+            for consulta_embedding_gov in await self.embeddings.aembed_documents(TERMOS_GOVERNANCA):
+                search_results_gov = await self.dal_async.search_vectors_async(
                     table_name=self.table_name,
                     query_vector=consulta_embedding_gov,
                     limit=10
@@ -1011,17 +1169,17 @@ class BaseSubagent:
         return f"{nome_usuario}_{area_usuario}"
 
     def adicionar_ao_historico(self, usuario_id: str, pergunta: str, resposta: str) -> None:
-        self.memoria_conversas.setdefault(usuario_id, [])
-        self.memoria_conversas[usuario_id].append(
+        historico = self.memoria_conversas.get(usuario_id, [])
+        historico = historico + [
             {
                 "pergunta": pergunta,
                 "resposta": resposta,
                 "timestamp": datetime.now().strftime("%H:%M"),
                 "agente": self.config.specialty,
             }
-        )
-        if len(self.memoria_conversas[usuario_id]) > 8:
-            self.memoria_conversas[usuario_id] = self.memoria_conversas[usuario_id][-8:]
+        ]
+        # Reatribuir (não alterar in-place) renova o TTL e o tamanho no store
+        self.memoria_conversas[usuario_id] = historico[-8:]
 
     def obter_historico_formatado(self, usuario_id: str) -> str:
         historico = self.memoria_conversas.get(usuario_id)
@@ -1045,7 +1203,7 @@ class BaseSubagent:
     # ------------------------------------------------------------------
     # MCP Tools Support
     # ------------------------------------------------------------------
-    def _identificar_tools_necessarios(self, pergunta: str) -> List[str]:
+    async def _identificar_tools_necessarios_async(self, pergunta: str) -> List[str]:
         """Usa LLM para identificar quais tools MCP usar para responder a pergunta.
         
         Args:
@@ -1075,7 +1233,7 @@ class BaseSubagent:
         """
         
         try:
-            resposta = self.llm.invoke(prompt).content.strip().lower()
+            resposta = (await self.llm.ainvoke(prompt)).content.strip().lower()
             
             if resposta in ["nenhuma", "nenhum", "none", ""]:
                 return []
@@ -1097,44 +1255,55 @@ class BaseSubagent:
             self._log(f"❌ Erro ao identificar tools necessárias: {exc}")
             return []
 
-    def _executar_tools_mcp(self, tools: List[str], perfil_usuario: Dict[str, Any]) -> str:
-        """Executa as tools MCP selecionadas.
+    async def _executar_tools_mcp_async(
+        self,
+        tools: List[str],
+        perfil_usuario: Dict[str, Any],
+        parametros_extraidos: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> str:
+        """Executa as tools MCP selecionadas em paralelo.
         
         Args:
             tools: Lista de nomes de tools para executar
             perfil_usuario: Perfil do usuário para extrair parâmetros
+            parametros_extraidos: Parâmetros citados na pergunta, por tool (plano de roteamento);
+                os dados do perfil têm precedência
             
         Returns:
-            String com os resultados das tools executadas
+            String com os resultados das tools executadas (na ordem de `tools`)
         """
         if not tools or not self.mcp_client:
             return ""
         
-        resultados = []
-        
+        chamadas = []
+        resultados_por_tool: Dict[str, str] = {}
         for tool_name in tools:
             try:
                 # Extrai parâmetros automaticamente do perfil
                 params = self._extrair_parametros_tool(tool_name, perfil_usuario)
-                
+                if parametros_extraidos and tool_name in parametros_extraidos:
+                    aceitos = self.mcp_client.get_tool(tool_name).parameters
+                    params = {
+                        **{k: v for k, v in parametros_extraidos[tool_name].items() if k in aceitos},
+                        **params
+                    }
                 self._log(f"🔧 Executando tool '{tool_name}' com parâmetros: {params}")
-                
-                # Executa a tool
-                resultado = self.mcp_client.call_tool(tool_name, params)
-                
-                if resultado.is_success:
-                    data_str = str(resultado.data) if resultado.data else resultado.message
-                    resultados.append(f"📊 {tool_name}: {data_str}")
-                    self._log(f"✅ Tool '{tool_name}' executada com sucesso")
-                else:
-                    resultados.append(f"❌ {tool_name}: {resultado.error_message}")
-                    self._log(f"❌ Erro na tool '{tool_name}': {resultado.error_message}")
-                    
+                chamadas.append((tool_name, params))
             except Exception as exc:
-                error_msg = f"Erro ao executar: {str(exc)}"
-                resultados.append(f"❌ {tool_name}: {error_msg}")
+                resultados_por_tool[tool_name] = f"❌ {tool_name}: Erro ao executar: {str(exc)}"
                 self._log(f"❌ Exceção na tool '{tool_name}': {exc}")
         
+        # Executa as tools independentes concorrentemente
+        for (tool_name, _), resultado in zip(chamadas, await self.mcp_client.call_tools(chamadas)):
+            if resultado.is_success:
+                data_str = str(resultado.data) if resultado.data else resultado.message
+                resultados_por_tool[tool_name] = f"📊 {tool_name}: {data_str}"
+                self._log(f"✅ Tool '{tool_name}' executada com sucesso ({resultado.execution_time_ms}ms)")
+            else:
+                resultados_por_tool[tool_name] = f"❌ {tool_name}: {resultado.error_message}"
+                self._log(f"❌ Erro na tool '{tool_name}': {resultado.error_message}")
+        
+        resultados = [resultados_por_tool[t] for t in tools if t in resultados_por_tool]
         return "\n".join(resultados) if resultados else ""
 
     def _extrair_parametros_tool(self, tool_name: str, perfil_usuario: Dict[str, Any]) -> Dict[str, Any]:
@@ -1176,6 +1345,10 @@ class BaseSubagent:
         self._log(f"🤝 A2A Registry configurado para {self.config.name}")
     
     def can_delegate_query(self, pergunta: str) -> tuple[bool, Optional[str], Optional[str]]:
+        """Wrapper síncrono de compatibilidade para can_delegate_query_async."""
+        return asyncio.run(self.can_delegate_query_async(pergunta))
+    
+    async def can_delegate_query_async(self, pergunta: str) -> tuple[bool, Optional[str], Optional[str]]:
         """Determina se deve delegar parte da pergunta para outro agente.
         
         Returns:
@@ -1191,13 +1364,35 @@ class BaseSubagent:
                 if score > 0:
                     self._log(f"🎯 Regra de delegação ativada: {rule.name} (score: {score:.2f})")
                     # Gera sub-query focada na área do agente alvo
-                    sub_query = self._generate_focused_subquery(pergunta, rule.target_agent, rule.keywords)
+                    sub_query = await self._generate_focused_subquery_async(pergunta, rule.target_agent, rule.keywords)
                     return True, rule.target_agent, sub_query
         
-        # 2. Se não há regras específicas, usa LLM para análise
-        return self._analyze_delegation_with_llm(pergunta)
+        # 2. Plano de roteamento do Neoson (decisão tomada na mesma chamada da classificação)
+        decisao_do_plano = plan_delegation(get_routing_plan())
+        if decisao_do_plano is not None:
+            return self._validar_delegacao_do_plano(*decisao_do_plano, pergunta=pergunta)
+        
+        # 3. Sem plano: usa LLM para análise
+        return await self._analyze_delegation_with_llm_async(pergunta)
+    
+    def _validar_delegacao_do_plano(
+        self,
+        should_delegate: bool,
+        target_agent: Optional[str],
+        sub_query: Optional[str],
+        *,
+        pergunta: str
+    ) -> tuple[bool, Optional[str], Optional[str]]:
+        """Aceita a delegação do plano apenas para agentes registrados (e não para si mesmo)."""
+        if not should_delegate or not target_agent or target_agent == self.config.identifier:
+            return False, None, None
+        if target_agent not in self.agent_registry.get_available_agents():
+            self._log(f"🗺️ Delegação do plano ignorada: '{target_agent}' não está no registry A2A")
+            return False, None, None
+        self._log(f"🗺️ Plano de roteamento recomenda delegação para {target_agent}")
+        return True, target_agent, sub_query or pergunta
     
-    def _generate_focused_subquery(self, original_query: str, target_agent: str, keywords: List[str]) -> str:
+    async def _generate_focused_subquery_async(self, original_query: str, target_agent: str, keywords: List[str]) -> str:
         """Gera uma sub-pergunta focada para o agente alvo."""
         try:
             prompt = f"""
@@ -1212,7 +1407,7 @@ class BaseSubagent:
             Resposta:
             """
             
-            response = self.llm.invoke(prompt)
+            response = await self.llm.ainvoke(prompt)
             sub_query = response.content.strip()
             
             self._log(f"📝 Sub-query gerada para {target_agent}: {sub_query}")
@@ -1222,7 +1417,7 @@ class BaseSubagent:
             self._log(f"⚠️ Erro ao gerar sub-query: {e}")
             return original_query  # Fallback para pergunta original
     
-    def _analyze_delegation_with_llm(self, pergunta: str) -> tuple[bool, Optional[str], Optional[str]]:
+    async def _analyze_delegation_with_llm_async(self, pergunta: str) -> tuple[bool, Optional[str], Optional[str]]:
         """Usa LLM para analisar se deve delegar."""
         if not self.agent_registry:
             return False, None, None
@@ -1264,10 +1459,9 @@ class BaseSubagent:
             }}
             """
             
-            response = self.llm.invoke(prompt)
+            response = await self.llm.ainvoke(prompt)
             
             try:
-                import json
                 analysis = json.loads(response.content.strip())
                 
                 should_delegate = analysis.get("should_delegate", False)
@@ -1292,7 +1486,11 @@ class BaseSubagent:
             return False, None, None
     
     def delegate_to_agent(self, target_agent: str, query: str, context: Dict = None) -> Optional[Dict]:
-        """Delega uma sub-pergunta para outro agente."""
+        """Wrapper síncrono de compatibilidade para delegate_to_agent_async."""
+        return asyncio.run(self.delegate_to_agent_async(target_agent, query, context))
+    
+    async def delegate_to_agent_async(self, target_agent: str, query: str, context: Dict = None) -> Optional[Dict]:
+        """Delega uma sub-pergunta para outro agente (o destino roda no event loop atual)."""
         if not self.config.enable_a2a or not self.agent_registry:
             self._log("❌ A2A não habilitado para delegação")
             return None
@@ -1310,7 +1508,19 @@ class BaseSubagent:
             
             self._log(f"📤 Delegando para {target_agent}: {query}")
             
-            response = self.agent_registry.route_message(message, self.current_session)
+            # O plano de roteamento é da pergunta original: o agente delegado
+            # analisa tools e delegação da sub-pergunta por conta própria (e não
+            # grava seu contexto no coletor de validação nem transmite tokens da
+            # sua resposta, que é só insumo para a resposta deste agente)
+            token_plano = set_routing_plan(None)
+            token_validacao = set_validation_context(None)
+            token_stream = suspend_stream()
+            try:
+                response = await self.agent_registry.route_message_async(message, self.current_session)
+            finally:
+                reset_stream_target(token_stream)
+                reset_validation_context(token_validacao)
+                reset_routing_plan(token_plano)
             
             if response.is_success:
                 self._log(f"📥 Resposta recebida de {target_agent}: {len(response.content)} chars")
@@ -1434,11 +1644,145 @@ class BaseSubagent:
         # Se tem 2 ou mais padrões de conhecimento geral, considerar genérica
         return general_count >= 2
 
+    # ------------------------------------------------------------------
+    # Fases pré-resposta (executadas concorrentemente)
+    # ------------------------------------------------------------------
+    async def _fase_busca(
+        self,
+        pergunta: str,
+        analyzed_profile: Dict[str, Any],
+        perfil_usuario: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, List[str]], List[float]]:
+        """Busca vetorial com filtros de governança.
+        
+        Returns:
+            Tuple (documentos_permitidos, motivos_rejeicao, embedding_da_pergunta)
+        """
+        # ===================================================================
+        # QUICK WIN 2: BUSCA OTIMIZADA COM FILTROS SQL
+        # ===================================================================
+        # Gerar embedding da pergunta
+        consulta_embedding = await self.embeddings.aembed_query(pergunta)
+        self._log(f"📊 Embedding gerado, iniciando busca otimizada na tabela '{self.table_name}'...")
+        
+        try:
+            # Busca otimizada com filtros de perfil no SQL (pool asyncpg compartilhado)
+            candidatos = await OptimizedDocumentSearch.search_with_profile_filter(
+                dal=self.dal_async,
+                table_name=self.table_name,
+                query_embedding=consulta_embedding,
+                user_profile=analyzed_profile,
+                limit=15
+            )
+            self._log(f"🎯 Busca otimizada: {len(candidatos)} candidatos (filtrados no SQL)")
+        except Exception as e:
+            # Fallback para busca tradicional se der erro
+            self._log(f"⚠️ Busca otimizada falhou ({e}), usando busca tradicional...")
+            candidatos = await self._busca_multilingue_async(pergunta)
+            self._log(f"🔎 Busca tradicional: {len(candidatos)} candidatos")
+
+        # Verificar permissões e coletar motivos de rejeição
+        documentos_permitidos = []
+        motivos_rejeicao = {}
+        
+        for registro in candidatos:
+            if self.verificar_permissao_documento(registro, perfil_usuario):
+                documentos_permitidos.append(registro)
+            else:
+                # Coletar motivo da rejeição para transparência
+                motivo = self._obter_motivo_rejeicao(registro, perfil_usuario)
+                fonte = registro.get("fonte_documento", "documento")
+                if motivo not in motivos_rejeicao:
+                    motivos_rejeicao[motivo] = []
+                motivos_rejeicao[motivo].append(fonte)
+        
+        self._log(f"✅ {len(documentos_permitidos)} documentos válidos após governança")
+        return documentos_permitidos, motivos_rejeicao, consulta_embedding
+
+    async def _fase_tools(self, pergunta: str, perfil_usuario: Dict[str, Any]) -> Tuple[str, List[str]]:
+        """Seleção (LLM) seguida da execução das tools MCP.
+        
+        Returns:
+            Tuple (tools_info para o prompt, tools usadas)
+        """
+        if not self.config.enable_mcp_tools:
+            return "", []
+        
+        # Plano de roteamento do Neoson: tools e parâmetros já decididos (sem chamada de LLM)
+        tools_do_plano = plan_tools(get_routing_plan(), self.available_tools)
+        if tools_do_plano is not None:
+            tools_necessarias = list(tools_do_plano)
+            self._log(f"🗺️ Tools definidas pelo plano de roteamento: {tools_necessarias or 'nenhuma'}")
+        else:
+            tools_necessarias = await self._identificar_tools_necessarios_async(pergunta)
+        if not tools_necessarias:
+            return "", []
+        
+        self._log(f"🔧 Tools MCP identificadas: {', '.join(tools_necessarias)}")
+        tools_resultado = await self._executar_tools_mcp_async(tools_necessarias, perfil_usuario, tools_do_plano)
+        if not tools_resultado:
+            return "", []
+        return f"\n\n🔧 INFORMAÇÕES OBTIDAS VIA FERRAMENTAS:\n{tools_resultado}", tools_necessarias
+
+    async def _fase_delegacao(self, pergunta: str, perfil_usuario: Dict[str, Any]) -> Dict[str, Any]:
+        """Análise (regras/LLM) seguida da delegação A2A.
+        
+        Returns:
+            Dict com info (contexto do prompt), colaboracao (summary ao usuário),
+            sources e tools do agente delegado
+        """
+        resultado = {"info": "", "colaboracao": "", "sources": [], "tools": []}
+        if not self.config.enable_a2a:
+            return resultado
+        
+        should_delegate, target_agent, sub_query = await self.can_delegate_query_async(pergunta)
+        if not (should_delegate and target_agent):
+            return resultado
+        
+        self._log(f"🤝 Delegação A2A identificada: {target_agent}")
+        delegation_result = await self.delegate_to_agent_async(
+            target_agent,
+            sub_query,
+            {"original_query": pergunta, "user_profile": perfil_usuario}
+        )
+        
+        if delegation_result and delegation_result.get("success"):
+            resultado["info"] = f"\n\n🤝 INFORMAÇÃO DE {target_agent.upper()}:\n{delegation_result['content']}"
+            
+            # Rastrear fontes e ferramentas do agente delegado
+            resultado["sources"] = delegation_result.get("sources") or []
+            resultado["tools"] = delegation_result.get("tools") or []
+            
+            # Preparar summary de colaboração para o usuário
+            resultado["colaboracao"] = f"\n\n{delegation_result.get('contribution', '')}"
+        else:
+            error_msg = delegation_result.get("error", "Erro desconhecido") if delegation_result else "Falha na comunicação"
+            self._log(f"⚠️ Delegação falhou: {error_msg}")
+            resultado["info"] = f"\n\n⚠️ Tentei consultar {target_agent} mas houve um problema técnico."
+        return resultado
+
     # ------------------------------------------------------------------
     # Fluxo principal
     # ------------------------------------------------------------------
     def processar_pergunta(self, pergunta: str, perfil_usuario: Dict[str, Any]) -> str:
-        if not self.llm or not self.embeddings or not self.dal:
+        """Wrapper síncrono de compatibilidade para processar_pergunta_async.
+        
+        Executa o pipeline em um event loop descartável; use processar_pergunta_async
+        a partir de código assíncrono.
+        """
+        async def _processar_e_fechar() -> str:
+            try:
+                return await self.processar_pergunta_async(pergunta, perfil_usuario)
+            finally:
+                # O loop de asyncio.run é descartável: fecha as conexões MCP dele
+                if self.mcp_client:
+                    await self.mcp_client.aclose()
+
+        return asyncio.run(_processar_e_fechar())
+
+    async def processar_pergunta_async(self, pergunta: str, perfil_usuario: Dict[str, Any]) -> str:
+        """Pipeline completo (busca, tools MCP, delegação A2A e geração) no event loop atual."""
+        if not self.llm or not self.embeddings or not self.dal_async:
             raise RuntimeError("Subagente não inicializado corretamente.")
 
         nome_usuario = self._perfil_val(perfil_usuario, "nome", "Nome") or "usuário"
@@ -1447,6 +1791,8 @@ class BaseSubagent:
         # Reset rastreamento para nova pergunta
         self.last_sources_used = []
         self.last_tools_used = []
+        # Capturado na entrada: agentes delegados durante a pergunta não o recebem
+        coletor_validacao = _contexto_validacao.get()
 
         try:
             self._log(f"🔍 {self.config.name} processando pergunta: '{pergunta}' para {nome_usuario}")
@@ -1455,7 +1801,8 @@ class BaseSubagent:
             # QUICK WIN 1: ANÁLISE DE PERFIL ANTECIPADA
             # ===================================================================
             # Verificar se já temos análise em cache
-            if usuario_id not in self.cached_user_profiles:
+            analyzed_profile = self.cached_user_profiles.get(usuario_id)
+            if analyzed_profile is None:
                 self._log(f"🔍 Analisando perfil de {nome_usuario}...")
                 analyzed_profile = self.profile_analyzer.analyze_user_profile(perfil_usuario)
                 self.cached_user_profiles[usuario_id] = analyzed_profile
@@ -1464,92 +1811,28 @@ class BaseSubagent:
                     f"projetos={analyzed_profile.get('projetos')}, nivel={analyzed_profile.get('nivel_hierarquico')}"
                 )
             else:
-                analyzed_profile = self.cached_user_profiles[usuario_id]
                 self._log("✅ Perfil recuperado do cache")
             
             # ===================================================================
-            # QUICK WIN 2: BUSCA OTIMIZADA COM FILTROS SQL
+            # FASES PRÉ-RESPOSTA CONCORRENTES
             # ===================================================================
-            # Gerar embedding da pergunta
-            consulta_embedding = self.embeddings.embed_query(pergunta)
-            self._log(f"� Embedding gerado, iniciando busca otimizada na tabela '{self.table_name}'...")
-            
-            # Usar busca otimizada com filtros de perfil (síncrona por enquanto, asyncio depois)
-            import asyncio
-            try:
-                # Tentar usar busca otimizada async
-                candidatos = asyncio.run(
-                    OptimizedDocumentSearch.search_with_profile_filter(
-                        dal=self.dal,
-                        table_name=self.table_name,
-                        query_embedding=consulta_embedding,
-                        user_profile=analyzed_profile,
-                        limit=15
-                    )
-                )
-                self._log(f"🎯 Busca otimizada: {len(candidatos)} candidatos (filtrados no SQL)")
-            except Exception as e:
-                # Fallback para busca tradicional se der erro
-                self._log(f"⚠️ Busca otimizada falhou ({e}), usando busca tradicional...")
-                candidatos = self._busca_multilingue(pergunta)
-                self._log(f"🔎 Busca tradicional: {len(candidatos)} candidatos")
-
-            # Verificar permissões e coletar motivos de rejeição
-            documentos_permitidos = []
-            motivos_rejeicao = {}
-            
-            for registro in candidatos:
-                if self.verificar_permissao_documento(registro, perfil_usuario):
-                    documentos_permitidos.append(registro)
-                else:
-                    # Coletar motivo da rejeição para transparência
-                    motivo = self._obter_motivo_rejeicao(registro, perfil_usuario)
-                    fonte = registro.get("fonte_documento", "documento")
-                    if motivo not in motivos_rejeicao:
-                        motivos_rejeicao[motivo] = []
-                    motivos_rejeicao[motivo].append(fonte)
-            
-            self._log(f"✅ {len(documentos_permitidos)} documentos válidos após governança")
-            
-            # 2. NOVO: Verifica se precisa de tools MCP para informações adicionais
-            tools_info = ""
-            if self.config.enable_mcp_tools:
-                tools_necessarias = self._identificar_tools_necessarios(pergunta)
-                if tools_necessarias:
-                    self._log(f"🔧 Tools MCP identificadas: {', '.join(tools_necessarias)}")
-                    tools_resultado = self._executar_tools_mcp(tools_necessarias, perfil_usuario)
-                    if tools_resultado:
-                        tools_info = f"\n\n🔧 INFORMAÇÕES OBTIDAS VIA FERRAMENTAS:\n{tools_resultado}"
-                        self.last_tools_used.extend(tools_necessarias)
-            
-            # 3. NOVO: Verifica se precisa de delegação A2A
-            delegacao_info = ""
-            colaboracao_summary = ""
-            if self.config.enable_a2a:
-                should_delegate, target_agent, sub_query = self.can_delegate_query(pergunta)
-                if should_delegate and target_agent:
-                    self._log(f"🤝 Delegação A2A identificada: {target_agent}")
-                    delegation_result = self.delegate_to_agent(
-                        target_agent,
-                        sub_query,
-                        {"original_query": pergunta, "user_profile": perfil_usuario}
-                    )
-                    
-                    if delegation_result and delegation_result.get("success"):
-                        delegacao_info = f"\n\n🤝 INFORMAÇÃO DE {target_agent.upper()}:\n{delegation_result['content']}"
-                        
-                        # Rastrear fontes e ferramentas do agente delegado
-                        if delegation_result.get("sources"):
-                            self.last_sources_used.extend(delegation_result["sources"])
-                        if delegation_result.get("tools"):
-                            self.last_tools_used.extend(delegation_result["tools"])
-                        
-                        # Preparar summary de colaboração para o usuário
-                        colaboracao_summary = f"\n\n{delegation_result.get('contribution', '')}"
-                    else:
-                        error_msg = delegation_result.get("error", "Erro desconhecido") if delegation_result else "Falha na comunicação"
-                        self._log(f"⚠️ Delegação falhou: {error_msg}")
-                        delegacao_info = f"\n\n⚠️ Tentei consultar {target_agent} mas houve um problema técnico."
+            # Busca vetorial, seleção/execução de tools MCP e análise/execução de
+            # delegação A2A dependem apenas da pergunta e do perfil: rodam juntas
+            # e são unidas antes da montagem do prompt.
+            fases = await _executar_fases_concorrentes({
+                "busca": self._fase_busca(pergunta, analyzed_profile, perfil_usuario),
+                "tools": self._fase_tools(pergunta, perfil_usuario),
+                "delegacao": self._fase_delegacao(pergunta, perfil_usuario),
+            })
+            documentos_permitidos, motivos_rejeicao, consulta_embedding = fases["busca"]
+            tools_info, tools_usadas = fases["tools"]
+            delegacao = fases["delegacao"]
+            delegacao_info = delegacao["info"]
+            colaboracao_summary = delegacao["colaboracao"]
+            
+            self.last_tools_used.extend(tools_usadas)
+            self.last_sources_used.extend(delegacao["sources"])
+            self.last_tools_used.extend(delegacao["tools"])
 
             # Preparar informações de transparência sobre restrições
             info_restricoes = ""
@@ -1558,16 +1841,17 @@ class BaseSubagent:
                 docs_selecionados = self._selecionar_documentos_diversificados(documentos_permitidos)
                 fontes_debug = [doc.get("fonte_documento", "sem fonte") for doc in docs_selecionados]
                 self._log(f"📄 Fontes selecionadas (diversificadas): {fontes_debug}")
-                
-                # Armazenar contexto para validação externa (usado pelo hierarchical)
-                self._last_context_docs = docs_selecionados
             else:
                 docs_selecionados = []
-                self._last_context_docs = []
                 self._log("⚠️ Nenhum documento aprovado. Resposta pode ser genérica.")
                 if motivos_rejeicao:
                     info_restricoes = self._criar_mensagem_restricoes(motivos_rejeicao)
 
+            # Contexto para validação externa (usado pelo hierarchical), sem nova chamada de embedding
+            if coletor_validacao is not None:
+                coletor_validacao["context_docs"] = docs_selecionados
+                coletor_validacao["query_embedding"] = consulta_embedding
+
             historico_formatado = self.obter_historico_formatado(usuario_id)
             contexto = self._formatar_contexto(docs_selecionados, especialidade=self.config.specialty)
             
@@ -1597,8 +1881,7 @@ INFORMAÇÕES DISPONÍVEIS:
                 pergunta=pergunta,
             )
 
-            resposta_raw = self.llm.invoke(prompt_formatado)
-            resposta_final = resposta_raw.content if hasattr(resposta_raw, "content") else str(resposta_raw)
+            resposta_final = await gerar_resposta_llm(self.llm, prompt_formatado, self.config.name)
 
             # ===================================================================
             # QUICK WIN 3: VALIDAÇÃO RIGOROSA DA RESPOSTA
@@ -1629,6 +1912,8 @@ INFORMAÇÕES DISPONÍVEIS:
                     "Desculpe, não posso fornecer essas informações devido a restrições de acesso. "
                     "Por favor, entre em contato com o suporte ou seu gestor para mais detalhes."
                 )
+                # Em streaming, o cliente descarta o texto já transmitido
+                reset_stream_answer("Resposta bloqueada pelo controle de acesso")
             
             # Verificar se a resposta é genérica (não usa documentos específicos)
             is_generic_response = self._is_response_generic(resposta_final)
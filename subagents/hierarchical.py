@@ -2,20 +2,49 @@
 
 from __future__ import annotations
 
+import asyncio
+import itertools
 import logging
 import re
+import unicodedata
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple, TYPE_CHECKING
 
 import numpy as np
-from langchain_openai import OpenAIEmbeddings
+
+from core.config import config
+from core.embedding_cache import get_embedding_service
+from core.streaming import buffer_stream, reset_stream_answer, reset_stream_target
+from core.state_store import BoundedStateStore
+from dal.base_dal import VECTOR_COLUMN
+from subagents.base_subagent import reset_validation_context, set_validation_context
 
 if TYPE_CHECKING:
     from subagents.base_subagent import BaseSubagent
 
 logger = logging.getLogger(__name__)
 
+# Palavras ignoradas na sobreposição lexical (pt/en/es)
+_STOPWORDS = {
+    "que", "qual", "quais", "como", "para", "por", "com", "sem", "uma", "uns", "umas",
+    "dos", "das", "nos", "nas", "pelo", "pela", "sobre", "entre", "onde", "quando",
+    "isso", "esta", "este", "essa", "esse", "sao", "ser", "tem", "ter", "mais", "meu",
+    "minha", "seu", "sua", "nao", "sim", "the", "and", "for", "what", "how", "which",
+    "with", "this", "that", "are", "los", "las", "del", "cual", "cuales"
+}
+
+
+def _termos(texto: str) -> Set[str]:
+    """Radicais (5 primeiros caracteres, sem acentos) das palavras de conteúdo do texto."""
+    normalizado = unicodedata.normalize("NFKD", texto.lower())
+    normalizado = "".join(c for c in normalizado if not unicodedata.combining(c))
+    return {
+        palavra[:5]
+        for palavra in re.findall(r"[a-z0-9]+", normalizado)
+        if len(palavra) > 2 and palavra not in _STOPWORDS
+    }
+
 
 @dataclass
 class SubSpecialtyRule:
@@ -26,6 +55,121 @@ class SubSpecialtyRule:
     description: str
     confidence_threshold: float = 0.1
     priority: int = 1  # Maior número = maior prioridade
+    examples: List[str] = field(default_factory=list)  # Perguntas típicas (centróide do roteador)
+
+
+@dataclass
+class RoutingDecision:
+    """Resultado do roteamento de uma pergunta entre sub-especialistas."""
+    candidates: List[Tuple[str, float]]  # (sub-agente, score) em ordem decrescente
+    margin: float  # Diferença entre o 1º e o 2º score (1.0 se houver um único candidato)
+    margin_threshold: float
+    method: str  # "embeddings" ou "keywords"
+    
+    @property
+    def confident(self) -> bool:
+        """Margem alta: a pergunta vai direto para um único sub-agente."""
+        return self.margin >= self.margin_threshold
+    
+    @property
+    def ambiguous(self) -> List[Tuple[str, float]]:
+        """Candidatos empatados com o primeiro (dentro da margem) - executados em paralelo."""
+        if not self.candidates:
+            return []
+        topo = self.candidates[0][1]
+        return [(agent, score) for agent, score in self.candidates if topo - score < self.margin_threshold]
+
+
+class SubspecialtyRouter:
+    """
+    Roteador vetorial entre sub-especialidades.
+    
+    Cada sub-agente alvo tem um centróide (média normalizada dos embeddings da
+    descrição, dos exemplos e das keywords das suas regras), calculado uma vez
+    no startup. Rotear uma pergunta é um único produto matriz-vetor contra o
+    embedding da pergunta (normalmente já em cache).
+    """
+    
+    KEYWORDS_POR_TEXTO = 8  # Keywords agrupadas por texto embedado (contexto + menos chamadas)
+    
+    def __init__(self):
+        self._targets: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._assinatura: Optional[Tuple] = None
+    
+    @property
+    def ready(self) -> bool:
+        return self._matrix is not None
+    
+    @classmethod
+    def _textos_da_regra(cls, rule: SubSpecialtyRule) -> List[str]:
+        keywords = list(dict.fromkeys(rule.keywords))
+        grupos = [
+            ", ".join(keywords[i:i + cls.KEYWORDS_POR_TEXTO])
+            for i in range(0, len(keywords), cls.KEYWORDS_POR_TEXTO)
+        ]
+        return [rule.description, *rule.examples, *grupos]
+    
+    @staticmethod
+    def _assinatura_regras(rules: Sequence[SubSpecialtyRule]) -> Tuple:
+        return tuple(
+            (r.target_subagent, r.description, tuple(r.keywords), tuple(r.examples))
+            for r in rules
+        )
+    
+    def is_stale(self, rules: Sequence[SubSpecialtyRule]) -> bool:
+        """Indica se as regras mudaram desde a construção dos centróides."""
+        return self._assinatura != self._assinatura_regras(rules)
+    
+    def _textos(self, rules: Sequence[SubSpecialtyRule]) -> Tuple[List[str], List[str]]:
+        """Textos a embedar e o sub-agente alvo de cada um."""
+        textos, alvos = [], []
+        for rule in rules:
+            for texto in self._textos_da_regra(rule):
+                textos.append(texto)
+                alvos.append(rule.target_subagent)
+        return textos, alvos
+    
+    def _montar(self, rules: Sequence[SubSpecialtyRule], alvos: List[str], vetores: List[List[float]]) -> None:
+        matriz = np.asarray(vetores, dtype=np.float32)
+        matriz /= np.linalg.norm(matriz, axis=1, keepdims=True).clip(min=1e-12)
+        
+        targets = list(dict.fromkeys(alvos))
+        alvos_array = np.asarray(alvos)
+        centroides = np.stack([matriz[alvos_array == target].mean(axis=0) for target in targets])
+        centroides /= np.linalg.norm(centroides, axis=1, keepdims=True).clip(min=1e-12)
+        
+        self._targets = targets
+        self._matrix = centroides
+        self._assinatura = self._assinatura_regras(rules)
+        logger.info(f"🧭 Roteador vetorial pronto: {len(targets)} sub-especialidades, {len(vetores)} textos")
+    
+    def build(self, rules: Sequence[SubSpecialtyRule], embeddings) -> None:
+        """Calcula os centróides (síncrono)."""
+        textos, alvos = self._textos(rules)
+        if textos:
+            self._montar(rules, alvos, embeddings.embed_documents(textos))
+    
+    async def build_async(self, rules: Sequence[SubSpecialtyRule], embeddings) -> None:
+        """Calcula os centróides sem bloquear o event loop."""
+        textos, alvos = self._textos(rules)
+        if textos:
+            self._montar(rules, alvos, await embeddings.aembed_documents(textos))
+    
+    def score(self, query_embedding: List[float], allowed: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Similaridade coseno da pergunta com cada centróide, em ordem decrescente."""
+        if self._matrix is None:
+            return []
+        vetor = np.asarray(query_embedding, dtype=np.float32)
+        vetor /= max(float(np.linalg.norm(vetor)), 1e-12)
+        similaridades = self._matrix @ vetor
+        ranking = [
+            (target, float(sim))
+            for target, sim in zip(self._targets, similaridades)
+            if allowed is None or target in allowed
+        ]
+        ranking.sort(key=lambda item: item[1], reverse=True)
+        return ranking
 
 
 class HierarchicalAgent(ABC):
@@ -34,7 +178,12 @@ class HierarchicalAgent(ABC):
     def __init__(self):
         self.sub_agents: Dict[str, 'BaseSubagent'] = {}
         self.subspecialty_rules: List[SubSpecialtyRule] = []
-        self.delegation_history: List[str] = []
+        # Histórico limitado (LRU + TTL), chaveado por ordem de chegada
+        self.delegation_history = BoundedStateStore(
+            f"delegation_history:{self.__class__.__name__}", max_entries=500
+        )
+        self._delegation_seq = itertools.count()
+        self.router = SubspecialtyRouter()
     
     def register_sub_agent(self, sub_agent: 'BaseSubagent') -> None:
         """Registra um sub-agente especializado."""
@@ -42,46 +191,96 @@ class HierarchicalAgent(ABC):
         self.sub_agents[identifier] = sub_agent
         logger.info(f"Sub-agente registrado: {identifier} sob {self.__class__.__name__}")
     
+    def _record_delegation(self, registro: str) -> None:
+        """Registra uma delegação no histórico limitado."""
+        self.delegation_history[next(self._delegation_seq)] = registro
+    
     def add_subspecialty_rule(self, rule: SubSpecialtyRule) -> None:
         """Adiciona regra de sub-especialização."""
         self.subspecialty_rules.append(rule)
         # Ordena por prioridade (maior número primeiro)
         self.subspecialty_rules.sort(key=lambda r: r.priority, reverse=True)
     
-    def find_best_subagent(self, query: str) -> Tuple[Optional[str], float]:
-        """Encontra o melhor sub-agente para uma pergunta."""
-        best_match = None
-        best_score = 0.0
-        
+    def _keyword_scores(self, query: str) -> List[Tuple[str, float]]:
+        """Score por keywords (fallback quando o roteador vetorial não está disponível)."""
         query_lower = query.lower()
-        print(f"🔎 Analisando palavras-chave em: '{query_lower}'")
-        logger.debug(f"Analisando query: '{query_lower}'")
-        
+        scores: Dict[str, float] = {}
         for rule in self.subspecialty_rules:
-            # Calcula score baseado nas keywords
-            matches = 0
-            matched_keywords = []
-            
-            for keyword in rule.keywords:
-                if keyword.lower() in query_lower:
-                    matches += 1
-                    matched_keywords.append(keyword)
-            
-            if matches > 0:
-                # Score baseado no número de matches e peso das palavras
-                score = matches / len(rule.keywords)
-                
-                print(f"📝 Regra '{rule.target_subagent}': {matches} matches {matched_keywords}, score: {score:.3f}")
-                logger.debug(f"Regra '{rule.name}': {matches} matches {matched_keywords}, score: {score:.3f}, threshold: {rule.confidence_threshold}")
-                
-                if score >= rule.confidence_threshold and score > best_score:
-                    best_match = rule.target_subagent
-                    best_score = score
-                    print(f"🎯 Nova melhor opção: {best_match} (score: {score:.3f})")
-                    logger.debug(f"Nova melhor opção: {best_match} (score: {score:.3f})")
-        
-        logger.info(f"Delegação hierárquica: '{query[:50]}...' -> {best_match} (score: {best_score:.3f})")
-        return best_match, best_score
+            matches = sum(1 for keyword in rule.keywords if keyword.lower() in query_lower)
+            if not matches:
+                continue
+            score = matches / len(rule.keywords)
+            logger.debug(f"Regra '{rule.name}': {matches} matches, score: {score:.3f}, threshold: {rule.confidence_threshold}")
+            if score >= rule.confidence_threshold:
+                scores[rule.target_subagent] = max(score, scores.get(rule.target_subagent, 0.0))
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    
+    @staticmethod
+    def _strip_agent_hint(query: str) -> str:
+        """Remove a dica '[SUGESTÃO_AGENTE: x]' do coordenador (mantém o embedding da pergunta em cache)."""
+        return re.sub(r"^\[SUGESTÃO_AGENTE:[^\]]*\]\s*", "", query)
+    
+    def _decision(
+        self,
+        ranking: List[Tuple[str, float]],
+        method: str,
+        top_k: int
+    ) -> RoutingDecision:
+        if self.sub_agents:
+            ranking = [(agent, score) for agent, score in ranking if agent in self.sub_agents]
+        if method == "embeddings":
+            ranking = [(agent, score) for agent, score in ranking if score >= config.hierarchy.router_min_similarity]
+        candidates = ranking[:top_k]
+        margin = candidates[0][1] - candidates[1][1] if len(candidates) > 1 else 1.0
+        decision = RoutingDecision(
+            candidates=candidates,
+            margin=margin,
+            # Scores de keywords não são comparáveis entre regras: sem fan-out por margem
+            margin_threshold=config.hierarchy.router_margin if method == "embeddings" else 0.0,
+            method=method
+        )
+        logger.info(
+            f"🧭 Roteamento ({method}): {[(a, round(sc, 3)) for a, sc in candidates]} "
+            f"margem={margin:.3f} {'(direto)' if decision.confident else '(fan-out)'}"
+        )
+        return decision
+    
+    async def prepare_router_async(self) -> bool:
+        """Calcula os centróides do roteador vetorial (chamar no startup)."""
+        if not self.router.is_stale(self.subspecialty_rules):
+            return True
+        try:
+            await self.router.build_async(self.subspecialty_rules, get_embedding_service())
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Roteador vetorial indisponível, usando keywords: {e}")
+            return False
+    
+    async def route_async(self, query: str, top_k: int = 3) -> RoutingDecision:
+        """Roteia a pergunta pelo embedding (fallback: keywords)."""
+        if await self.prepare_router_async():
+            try:
+                embedding = await get_embedding_service().aembed_query(self._strip_agent_hint(query))
+                return self._decision(self.router.score(embedding), "embeddings", top_k)
+            except Exception as e:
+                logger.warning(f"⚠️ Falha no roteamento vetorial, usando keywords: {e}")
+        return self._decision(self._keyword_scores(query), "keywords", top_k)
+    
+    def route(self, query: str, top_k: int = 3) -> RoutingDecision:
+        """Versão síncrona de route_async."""
+        try:
+            if self.router.is_stale(self.subspecialty_rules):
+                self.router.build(self.subspecialty_rules, get_embedding_service())
+            embedding = get_embedding_service().embed_query(self._strip_agent_hint(query))
+            return self._decision(self.router.score(embedding), "embeddings", top_k)
+        except Exception as e:
+            logger.warning(f"⚠️ Falha no roteamento vetorial, usando keywords: {e}")
+        return self._decision(self._keyword_scores(query), "keywords", top_k)
+    
+    def find_best_subagent(self, query: str) -> Tuple[Optional[str], float]:
+        """Encontra o melhor sub-agente para uma pergunta."""
+        candidates = self.route(query, top_k=1).candidates
+        return candidates[0] if candidates else (None, 0.0)
 
     def find_top_candidates(self, query: str, top_k: int = 3) -> List[Tuple[str, float]]:
         """
@@ -94,51 +293,88 @@ class HierarchicalAgent(ABC):
         Returns:
             Lista ordenada de (agente, score) por score decrescente
         """
-        candidates = []
-        query_lower = query.lower()
-        
-        print(f"🔍 Analisando query: '{query_lower}'")
-        print(f"📋 Total de regras: {len(self.subspecialty_rules)}")
-        
-        for rule in self.subspecialty_rules:
-            matches = 0
-            matched_keywords = []
-            
-            for keyword in rule.keywords:
-                if keyword.lower() in query_lower:
-                    matches += 1
-                    matched_keywords.append(keyword)
-            
-            if matches > 0:
-                score = matches / len(rule.keywords)
-                print(f"🎯 Regra '{rule.name}' → {matches} matches, score: {score:.3f}, threshold: {rule.confidence_threshold}")
-                print(f"   Keywords matched: {matched_keywords}")
-                
-                if score >= rule.confidence_threshold:
-                    candidates.append((rule.target_subagent, score))
-                    print(f"   ✅ Adicionado candidato: {rule.target_subagent}")
-                else:
-                    print(f"   ❌ Score abaixo do threshold")
-            else:
-                print(f"⚪ Regra '{rule.name}' → 0 matches")
-        
-        # Ordenar por score decrescente e pegar os top-k
-        candidates.sort(key=lambda x: x[1], reverse=True)
-        print(f"🏆 Candidatos finais: {candidates}")
-        return candidates[:top_k]
+        return self.route(query, top_k=top_k).candidates
     
     @abstractmethod
-    def process_with_hierarchy(self, query: str, user_profile: Dict) -> str:
-        """Processa pergunta considerando hierarquia de sub-agentes."""
+    async def process_with_hierarchy_async(self, query: str, user_profile: Dict) -> str:
+        """Processa pergunta considerando hierarquia de sub-agentes (caminho nativo assíncrono)."""
         pass
+    
+    def process_with_hierarchy(self, query: str, user_profile: Dict) -> str:
+        """Wrapper síncrono de compatibilidade para process_with_hierarchy_async."""
+        return asyncio.run(self.process_with_hierarchy_async(query, user_profile))
+    
+    @staticmethod
+    async def call_agent_async(agent, query: str, user_profile: Dict) -> str:
+        """Chama o caminho assíncrono nativo do agente, sem thread intermediária."""
+        if hasattr(agent, 'processar_pergunta_async'):
+            return await agent.processar_pergunta_async(query, user_profile)
+        if hasattr(agent, 'processar_async'):
+            return await agent.processar_async(query, user_profile)
+        # Agentes legados apenas síncronos
+        return await asyncio.to_thread(agent.processar_pergunta, query, user_profile)
+    
+    @classmethod
+    async def call_agent_with_context_async(
+        cls,
+        agent,
+        query: str,
+        user_profile: Dict,
+        buffered: bool = False
+    ) -> Tuple[str, Dict]:
+        """
+        Chama o agente coletando o contexto da resposta desta chamada.
+        
+        Em streaming, a resposta é transmitida ao vivo (se rejeitada, o chamador
+        usa reset_stream_answer). Com `buffered` (candidatos concorrentes), os
+        eventos ficam retidos em "stream_buffer" até que a resposta seja aceita
+        (ver _publish_stream).
+        
+        Returns:
+            Tuple (resposta, {"context_docs", "query_embedding", "stream_buffer"});
+            as duas primeiras chaves só existem se o agente expõe o contexto
+        """
+        contexto: Dict = {}
+        buffer, token_stream = buffer_stream() if buffered else (None, None)
+        token = set_validation_context(contexto)
+        try:
+            result = await cls.call_agent_async(agent, query, user_profile)
+        finally:
+            reset_validation_context(token)
+            if token_stream is not None:
+                reset_stream_target(token_stream)
+        contexto["stream_buffer"] = buffer
+        return result, contexto
+    
+    @staticmethod
+    def _publish_stream(contexto: Dict) -> None:
+        """Entrega ao cliente os eventos retidos da resposta aceita."""
+        buffer = contexto.get("stream_buffer")
+        if buffer is not None:
+            buffer.commit()
 
 
 class TIHierarchicalAgent(HierarchicalAgent):
     """Agente de TI com capacidade hierárquica."""
     
-    def __init__(self, base_agent: 'BaseSubagent'):
+    def __init__(
+        self,
+        base_agent: 'BaseSubagent',
+        *,
+        speculative: Optional[bool] = None,
+        speculative_top_n: Optional[int] = None,
+        speculative_max_concurrency: Optional[int] = None
+    ):
         super().__init__()
         self.base_agent = base_agent
+        
+        # Execução especulativa (opt-in): candidatos em paralelo com orçamento de concorrência
+        self.speculative_enabled = config.hierarchy.speculative_enabled if speculative is None else speculative
+        self.speculative_top_n = speculative_top_n or config.hierarchy.speculative_top_n
+        self.speculative_max_concurrency = max(
+            1, speculative_max_concurrency or config.hierarchy.speculative_max_concurrency
+        )
+        
         self._setup_default_rules()
     
     def _setup_default_rules(self) -> None:
@@ -169,6 +405,12 @@ class TIHierarchicalAgent(HierarchicalAgent):
                 "capítulo", "sección", "artículo", "cláusula"  # ← ADICIONADO
             ],
             description="Questões de governança, compliance e políticas de TI",
+            examples=[
+                "Qual a política de senhas da empresa?",
+                "Quais requisitos da ISO 27001 se aplicam ao nosso ambiente?",
+                "Como funciona a validação de assinaturas eletrônicas?",
+                "Quais controles de LGPD precisamos seguir na auditoria?"
+            ],
             confidence_threshold=0.02,  # ← REDUZIDO de 0.03 para 0.02 (mais sensível)
             priority=3
         )
@@ -183,6 +425,12 @@ class TIHierarchicalAgent(HierarchicalAgent):
                 "performance", "storage", "virtualização", "cloud", "aws", "status"
             ],
             description="Questões de infraestrutura e operações",
+            examples=[
+                "O servidor de arquivos está fora do ar?",
+                "Qual a rotina de backup dos bancos de produção?",
+                "Como solicitar mais capacidade de storage na cloud?",
+                "Qual o status da rede do datacenter?"
+            ],
             confidence_threshold=0.05,  # Threshold mais baixo
             priority=2
         )
@@ -204,6 +452,12 @@ class TIHierarchicalAgent(HierarchicalAgent):
                 "docker", "container", "kubernetes", "devops"
             ],
             description="Questões de desenvolvimento e sistemas",
+            examples=[
+                "Como faço o deploy da aplicação em homologação?",
+                "Qual o padrão de branches e pull requests do repositório?",
+                "Como integrar nosso sistema com a API REST do ERP?",
+                "Encontrei um bug no backend, como reportar?"
+            ],
             confidence_threshold=0.05,
             priority=1
         )
@@ -218,6 +472,12 @@ class TIHierarchicalAgent(HierarchicalAgent):
                 "suporte", "help", "ajuda", "como usar", "tutorial"
             ],
             description="Questões de suporte ao usuário final e ferramentas básicas",
+            examples=[
+                "Esqueci minha senha, como faço o reset?",
+                "Não consigo acessar meu email no Outlook",
+                "Como compartilhar a tela numa reunião do Teams?",
+                "Minha conta está bloqueada, preciso de ajuda"
+            ],
             confidence_threshold=0.05,
             priority=4  # Maior prioridade para questões de usuário
         )
@@ -262,15 +522,19 @@ class TIHierarchicalAgent(HierarchicalAgent):
         self, 
         query: str, 
         response: str, 
-        context_docs: Optional[List[Dict]] = None
+        context_docs: Optional[List[Dict]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> Tuple[bool, float, Dict[str, float]]:
         """
         Validação multi-critério da qualidade da resposta.
         
+        Totalmente local: não faz chamadas de embedding nem de LLM.
+        
         Args:
             query: Pergunta original do usuário
             response: Resposta gerada pelo agente
             context_docs: Documentos usados como contexto (opcional)
+            query_embedding: Embedding da pergunta já calculado na busca (opcional)
             
         Returns:
             (is_valid, overall_score, detailed_scores)
@@ -286,8 +550,8 @@ class TIHierarchicalAgent(HierarchicalAgent):
         scores['specificity'] = specificity_score
         
         # 2. CRITÉRIO: Relevância Semântica (35% do peso)
-        # Verifica se resposta está semanticamente relacionada à pergunta
-        relevance_score = self._check_semantic_relevance(query, response)
+        # Similaridade pergunta x chunks usados na resposta + sobreposição lexical
+        relevance_score = self._check_semantic_relevance(query, response, context_docs, query_embedding)
         scores['relevance'] = relevance_score
         
         # 3. CRITÉRIO: Citação de Fontes (20% do peso)
@@ -373,38 +637,70 @@ class TIHierarchicalAgent(HierarchicalAgent):
         
         return specificity_score
     
-    def _check_semantic_relevance(self, query: str, response: str) -> float:
+    def _check_semantic_relevance(
+        self,
+        query: str,
+        response: str,
+        context_docs: Optional[List[Dict]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> float:
         """
-        Verifica relevância semântica entre pergunta e resposta usando embeddings.
+        Verifica a relevância entre pergunta e resposta sem chamadas de rede.
+        
+        Para cada chunk do contexto, a similaridade com a pergunta (calculada pelo
+        banco na busca, ou localmente a partir do vetor do chunk e do embedding da
+        pergunta) é ponderada pelo quanto a resposta usa aquele chunk. Sem chunks
+        com similaridade conhecida, usa a sobreposição lexical pergunta x resposta.
         
-        Retorna score de 0 a 1 baseado em similaridade coseno.
+        Retorna score de 0 a 1.
         """
-        try:
-            # Inicializar embeddings (lazy loading)
-            if not hasattr(self, '_embeddings'):
-                self._embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-            
-            # Gerar embeddings
-            query_embedding = self._embeddings.embed_query(query)
-            response_embedding = self._embeddings.embed_query(response[:1000])  # Limitar tamanho
-            
-            # Calcular similaridade coseno
-            query_vec = np.array(query_embedding)
-            response_vec = np.array(response_embedding)
-            
-            cosine_sim = np.dot(query_vec, response_vec) / (
-                np.linalg.norm(query_vec) * np.linalg.norm(response_vec)
-            )
-            
-            # Normalizar para 0-1 (cosine já retorna -1 a 1, mas em prática é 0-1 para textos)
-            relevance_score = max(0.0, min(1.0, cosine_sim))
-            
-            return relevance_score
-            
-        except Exception as e:
-            logger.warning(f"Erro ao calcular relevância semântica: {e}")
-            # Fallback: se houver erro, assumir relevância moderada
-            return 0.65
+        termos_resposta = _termos(response)
+        lexical = self._lexical_overlap(_termos(query), termos_resposta)
+        
+        peso_total = 0.0
+        relevancia_chunks = 0.0
+        for doc in context_docs or []:
+            similaridade = self._chunk_similarity(doc, query_embedding)
+            if similaridade is None:
+                continue
+            conteudo = doc.get("conteudo_original") or doc.get("conteudo") or ""
+            # Quanto do chunk aparece na resposta (grounding)
+            uso = self._lexical_overlap(_termos(conteudo), termos_resposta)
+            peso_total += uso
+            relevancia_chunks += uso * similaridade
+        
+        if peso_total == 0.0:
+            return lexical
+        return 0.6 * (relevancia_chunks / peso_total) + 0.4 * lexical
+    
+    def _chunk_similarity(self, doc: Dict, query_embedding: Optional[List[float]]) -> Optional[float]:
+        """Similaridade pergunta x chunk já disponível em memória (None se desconhecida)."""
+        if doc.get("similarity_score") is not None:
+            return float(max(0.0, min(1.0, doc["similarity_score"])))
+        vetor = doc.get(VECTOR_COLUMN)
+        if query_embedding is not None and vetor is not None:
+            return self._cosine_relevance(query_embedding, vetor)
+        return None
+    
+    @staticmethod
+    def _lexical_overlap(termos_referencia: Set[str], termos_resposta: Set[str]) -> float:
+        """Fração dos termos de referência presentes na resposta (0-1)."""
+        if not termos_referencia:
+            return 0.5  # Neutro se não há termos de conteúdo
+        return len(termos_referencia & termos_resposta) / len(termos_referencia)
+    
+    @staticmethod
+    def _cosine_relevance(query_embedding: List[float], response_embedding: List[float]) -> float:
+        """Similaridade coseno normalizada para 0-1."""
+        query_vec = np.array(query_embedding)
+        response_vec = np.array(response_embedding)
+        
+        cosine_sim = np.dot(query_vec, response_vec) / (
+            np.linalg.norm(query_vec) * np.linalg.norm(response_vec)
+        )
+        
+        # Normalizar para 0-1 (cosine já retorna -1 a 1, mas em prática é 0-1 para textos)
+        return float(max(0.0, min(1.0, cosine_sim)))
     
     def _check_citations(self, response: str, context_docs: Optional[List[Dict]]) -> float:
         """
@@ -558,20 +854,192 @@ class TIHierarchicalAgent(HierarchicalAgent):
         
         return f"Agente com maior score de relevância ({score:.3f}) para esta consulta"
     
-    def process_with_hierarchy(self, query: str, user_profile: Dict) -> str:
-        """Processa pergunta usando hierarquia de sub-especialistas com fallback chain."""
+    @staticmethod
+    def _is_error_message(result: str) -> bool:
+        """Mensagens de erro informativas dos sub-agentes são repassadas sem validação."""
+        return (
+            result.startswith("⚠️") or
+            result.startswith("Desculpe") or
+            "Problema de Conectividade" in result or
+            "Timeout" in result
+        )
+    
+    @staticmethod
+    def _build_transparency_section(decision_chain: List[str], footer_lines: List[str]) -> str:
+        """Monta a seção de cadeia de decisão anexada às respostas."""
+        transparency_section = "\n\n" + "="*60 + "\n"
+        transparency_section += "🧠 **CADEIA DE DECISÃO E RACIOCÍNIO**\n"
+        transparency_section += "="*60 + "\n"
+        for step in decision_chain:
+            transparency_section += f"{step}\n"
+        transparency_section += "\n" + "\n".join(footer_lines)
+        transparency_section += "\n" + "="*60
+        return transparency_section
+    
+    async def _run_candidate_async(
+        self,
+        candidate_agent: str,
+        query: str,
+        user_profile: Dict,
+        semaphore: asyncio.Semaphore
+    ) -> Dict:
+        """Executa e valida um candidato respeitando o orçamento de concorrência."""
+        sub_agent = self.sub_agents[candidate_agent]
+        async with semaphore:
+            logger.info(f"⚡ [Especulativo] Chamando {sub_agent.config.name} (tabela: {sub_agent.config.table_name})")
+            result, contexto = await self.call_agent_with_context_async(
+                sub_agent, query, user_profile, buffered=True
+            )
+            
+            outcome = {
+                "agent": candidate_agent,
+                "result": result,
+                "contexto": contexto,
+                "is_error": self._is_error_message(result),
+                "is_valid": False,
+                "score": 0.0,
+                "scores": {}
+            }
+            if outcome["is_error"]:
+                return outcome
+            
+            is_valid, quality_score, detailed_scores = self._validate_response_quality(
+                query,
+                result,
+                contexto.get("context_docs"),
+                contexto.get("query_embedding")
+            )
+            outcome.update(is_valid=is_valid, score=quality_score, scores=detailed_scores)
+            return outcome
+    
+    async def _process_speculative_async(
+        self,
+        query: str,
+        user_profile: Dict,
+        candidates: List[Tuple[str, float]],
+        decision_chain: List[str]
+    ) -> Optional[str]:
+        """
+        Executa os top-N candidatos concorrentemente.
+        
+        Aceita a primeira resposta aprovada na validação (cancelando as demais) ou,
+        se nenhuma for aprovada, a de maior score após todas terminarem.
+        
+        Returns:
+            Resposta com seção de transparência, ou None se nenhum candidato respondeu
+        """
+        candidatos = [(agent, score) for agent, score in candidates[:self.speculative_top_n] if agent in self.sub_agents]
+        if not candidatos:
+            return None
+        
+        semaphore = asyncio.Semaphore(self.speculative_max_concurrency)
+        nomes = ", ".join(self.sub_agents[agent].config.name for agent, _ in candidatos)
+        decision_chain.append(
+            f"⚡ **Execução especulativa**: {len(candidatos)} especialistas em paralelo "
+            f"(até {self.speculative_max_concurrency} simultâneos): {nomes}"
+        )
+        
+        tasks = [
+            asyncio.create_task(self._run_candidate_async(agent, query, user_profile, semaphore))
+            for agent, _ in candidatos
+        ]
+        concluidos: List[Dict] = []
+        vencedor: Optional[Dict] = None
+        cancelados = 0
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    outcome = await next_done
+                except Exception as e:
+                    logger.error(f"Erro em candidato especulativo: {e}")
+                    continue
+                concluidos.append(outcome)
+                if outcome["is_valid"]:
+                    vencedor = outcome
+                    break
+        finally:
+            pendentes = [task for task in tasks if not task.done()]
+            cancelados = len(pendentes)
+            for task in pendentes:
+                task.cancel()
+            if pendentes:
+                await asyncio.gather(*pendentes, return_exceptions=True)
+        
+        for outcome in concluidos:
+            nome = self.sub_agents[outcome["agent"]].config.name
+            if outcome["is_error"]:
+                decision_chain.append(f"⚠️ **{nome}**: problema técnico")
+            else:
+                status = "aprovada" if outcome["is_valid"] else "reprovada"
+                decision_chain.append(f"📊 **{nome}**: resposta {status} (score: {outcome['score']:.2f})")
+        if cancelados:
+            decision_chain.append(f"🛑 **Cancelados**: {cancelados} especialista(s) ainda em execução")
+        
+        criterio = "primeira resposta aprovada"
+        if vencedor is None:
+            validos = [o for o in concluidos if not o["is_error"]]
+            if validos:
+                vencedor = max(validos, key=lambda o: o["score"])
+                criterio = "maior score (nenhuma resposta aprovada)"
+            elif concluidos:
+                vencedor = concluidos[0]
+                criterio = "mensagem informativa (problema técnico)"
+            else:
+                return None
+        
+        sub_agent = self.sub_agents[vencedor["agent"]]
+        self._publish_stream(vencedor["contexto"])
+        decision_chain.append(f"✅ **Vencedor**: {sub_agent.config.name} ({criterio})")
+        if vencedor["scores"]:
+            detailed_scores = vencedor["scores"]
+            decision_chain.append(f"📈 **Detalhamento**: Especificidade {detailed_scores['specificity']:.2f}, Relevância {detailed_scores['relevance']:.2f}, Citações {detailed_scores['citations']:.2f}, Completude {detailed_scores['completeness']:.2f}")
+        
+        self._record_delegation(f"{query[:50]}... -> {vencedor['agent']} (especulativo: {criterio})")
+        
+        return vencedor["result"] + self._build_transparency_section(decision_chain, [
+            f"📋 **Resposta final fornecida por**: {sub_agent.config.name} ({sub_agent.config.specialty})",
+            f"⚡ **Modo**: Execução especulativa ({len(candidatos)} candidatos)",
+            "🎯 **Coordenado por**: Sistema TI Hierárquico"
+        ])
+    
+    async def process_with_hierarchy_async(self, query: str, user_profile: Dict) -> str:
+        """
+        Processa pergunta usando hierarquia de sub-especialistas com fallback chain.
+        
+        Os sub-agentes são chamados pelo caminho assíncrono nativo no event loop
+        atual (ver call_agent_async); process_with_hierarchy é o wrapper síncrono.
+        """
         
         # Inicializar cadeia de decisão para transparência
         decision_chain = []
         decision_chain.append(f"🔍 **Análise inicial**: TI Hierarchy analisando pergunta sobre '{query[:50]}...'")
         
-        # 1. Obter top 3 candidatos para fallback chain
-        candidates = self.find_top_candidates(query, top_k=3)
+        # 1. Roteamento vetorial: top 3 candidatos + margem de confiança
+        decision = await self.route_async(query, top_k=3)
+        candidates = decision.candidates
         
         if candidates:
             candidate_info = [(agent, f'{score:.3f}') for agent, score in candidates]
             decision_chain.append(f"🎯 **Candidatos identificados**: {candidate_info}")
-            decision_chain.append("📊 **Critério de seleção**: Relevância por palavras-chave e especialidade")
+            if decision.method == "embeddings":
+                decision_chain.append(
+                    f"📊 **Critério de seleção**: Similaridade semântica com cada especialidade "
+                    f"(margem {decision.margin:.3f}, {'alta' if decision.confident else 'baixa'})"
+                )
+            else:
+                decision_chain.append("📊 **Critério de seleção**: Relevância por palavras-chave e especialidade")
+            
+            # 2a. Execução em paralelo: sempre no modo especulativo (opt-in) ou,
+            #     com margem baixa, entre os candidatos empatados com o primeiro
+            fan_out = candidates if self.speculative_enabled else decision.ambiguous
+            if len(fan_out) > 1:
+                resposta = await self._process_speculative_async(query, user_profile, fan_out, decision_chain)
+                if resposta is not None:
+                    return resposta
+                # Os candidatos do fan-out já foram tentados; seguir com os demais
+                tentados = {agent for agent, _ in fan_out[:self.speculative_top_n]}
+                candidates = [(agent, score) for agent, score in candidates if agent not in tentados]
             
             # 2. Tentar cada candidato em ordem de score
             for i, (candidate_agent, score) in enumerate(candidates):
@@ -590,24 +1058,17 @@ class TIHierarchicalAgent(HierarchicalAgent):
                 try:
                     # Processa com o sub-agente especializado
                     print(f"🤖 Chamando {sub_agent.config.name} (tabela: {sub_agent.config.table_name})")
-                    result = sub_agent.processar_pergunta(query, user_profile)
+                    result, contexto = await self.call_agent_with_context_async(sub_agent, query, user_profile)
                     
                     print(f"📝 {sub_agent.config.name} retornou {len(result)} caracteres")
                     print(f"🔍 Primeiros 100 chars: '{result[:100]}...'")
                     
                     # VALIDAÇÃO ROBUSTA DE QUALIDADE (4 critérios)
-                    # Tentar obter documentos do contexto (se o sub-agente expôs isso)
-                    context_docs = None
-                    if hasattr(sub_agent, '_last_context_docs'):
-                        context_docs = sub_agent._last_context_docs
+                    # Documentos do contexto desta chamada (se o sub-agente expôs isso)
+                    context_docs = contexto.get("context_docs")
                     
                     # Se a resposta é uma mensagem de erro informativa, aceitar sem validar
-                    is_error_message = (
-                        result.startswith("⚠️") or 
-                        result.startswith("Desculpe") or
-                        "Problema de Conectividade" in result or
-                        "Timeout" in result
-                    )
+                    is_error_message = self._is_error_message(result)
                     
                     if is_error_message:
                         # Aceitar mensagem de erro informativa
@@ -633,7 +1094,8 @@ class TIHierarchicalAgent(HierarchicalAgent):
                     is_valid, quality_score, detailed_scores = self._validate_response_quality(
                         query=query,
                         response=result,
-                        context_docs=context_docs
+                        context_docs=context_docs,
+                        query_embedding=contexto.get("query_embedding")
                     )
                     
                     # Log dos resultados da validação
@@ -645,6 +1107,8 @@ class TIHierarchicalAgent(HierarchicalAgent):
                         
                         if i < len(candidates) - 1:
                             decision_chain.append("⚡ **Ação**: Tentando próximo especialista na hierarquia...")
+                        # Em streaming, o cliente descarta os tokens já transmitidos deste candidato
+                        reset_stream_answer(f"Resposta de {sub_agent.config.name} reprovada na validação")
                         continue
                     
                     # Sucesso! Adiciona cadeia de decisão transparente
@@ -666,13 +1130,14 @@ class TIHierarchicalAgent(HierarchicalAgent):
                     transparency_section += "\n🎯 **Coordenado por**: Sistema TI Hierárquico"
                     transparency_section += "\n" + "="*60
                     
-                    self.delegation_history.append(f"{query[:50]}... -> {candidate_agent}")
+                    self._record_delegation(f"{query[:50]}... -> {candidate_agent}")
                     
                     return result + transparency_section
                     
                 except Exception as e:
                     logger.error(f"Erro no sub-agente {candidate_agent}: {e}")
                     print(f"❌ Erro em {sub_agent.config.name}, tentando próximo...")
+                    reset_stream_answer(f"Erro em {sub_agent.config.name}")
                     continue
         else:
             decision_chain.append("❓ **Resultado da análise**: Nenhum especialista específico identificado")
@@ -684,7 +1149,7 @@ class TIHierarchicalAgent(HierarchicalAgent):
         if self.base_agent:
             decision_chain.append("🔄 **Fallback final**: Redirecionando para agente TI geral")
             logger.info("🤖 TI processando com conhecimento geral")
-            result = self.base_agent.processar_pergunta(query, user_profile)
+            result = await self.call_agent_async(self.base_agent, query, user_profile)
             
             # Montar transparência para fallback final
             transparency_section = "\n\n" + "="*60 + "\n"
@@ -735,5 +1200,7 @@ class TIHierarchicalAgent(HierarchicalAgent):
             "sub_agents": list(self.sub_agents.keys()),
             "rules_count": len(self.subspecialty_rules),
             "delegations_history": len(self.delegation_history),
-            "recent_delegations": self.delegation_history[-5:] if self.delegation_history else []
+            "speculative_enabled": getattr(self, "speculative_enabled", False),
+            "router": "embeddings" if self.router.ready else "keywords",
+            "recent_delegations": self.delegation_history.values()[-5:]
         }
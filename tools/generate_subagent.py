@@ -117,12 +117,16 @@ CREATE TABLE IF NOT EXISTS $table_name (
     responsavel TEXT,
     aprovador TEXT,
     data_ingestao TIMESTAMPTZ DEFAULT NOW(),
-    vetor VECTOR(1536) NOT NULL
+    vetor VECTOR(1536) NOT NULL,
+    documento_id TEXT,
+    documento_versao INTEGER,
+    hash_conteudo TEXT
 );
 
 CREATE INDEX IF NOT EXISTS idx_${identifier}_tenant_id ON $table_name (tenant_id);
 CREATE INDEX IF NOT EXISTS idx_${identifier}_fonte_documento ON $table_name (fonte_documento);
 CREATE INDEX IF NOT EXISTS idx_${identifier}_data_validade ON $table_name (data_validade);
+CREATE INDEX IF NOT EXISTS idx_${identifier}_documento ON $table_name (documento_id, hash_conteudo);
 
 CREATE INDEX IF NOT EXISTS idx_${identifier}_vetor_hnsw
     ON $table_name USING hnsw (vetor vector_cosine_ops);
@@ -1,6 +1,7 @@
 """Model Context Protocol (MCP) implementation for Neoson subagents."""
 
 from .base import MCPTool, MCPClient, MCPToolResult
+from .async_client import AsyncMCPClient
 from .registry import ToolRegistry
 
-__all__ = ["MCPTool", "MCPClient", "MCPToolResult", "ToolRegistry"]
\ No newline at end of file
+__all__ = ["MCPTool", "MCPClient", "AsyncMCPClient", "MCPToolResult", "ToolRegistry"]
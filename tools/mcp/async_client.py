@@ -0,0 +1,220 @@
+"""Cliente MCP assíncrono: timeouts por tool, retry com jitter e fan-out concorrente."""
+
+import asyncio
+import logging
+import random
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from .base import BaseMCPClient, MCPTool, MCPToolResult, MCPToolStatus
+
+
+logger = logging.getLogger(__name__)
+
+# Status HTTP considerados transitórios (elegíveis a retry em tools idempotentes)
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+class AsyncMCPClient(BaseMCPClient):
+    """Cliente assíncrono para execução de tools MCP (httpx.AsyncClient).
+
+    - Conexões keep-alive reutilizadas, com limites de pool
+    - Timeout individual por tool (`MCPTool.timeout_seconds`)
+    - Retry com backoff exponencial e jitter apenas para tools idempotentes
+    - `call_tools` executa chamadas independentes em paralelo
+
+    Um `httpx.AsyncClient` é mantido por event loop, pois conexões não podem
+    ser compartilhadas entre loops (ex.: wrappers síncronos com asyncio.run).
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        max_concurrency: int = 5,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """Inicializa o cliente MCP assíncrono.
+
+        Args:
+            base_url: URL base para tools que usam endpoints relativos
+            max_connections: Máximo de conexões simultâneas no pool
+            max_keepalive_connections: Máximo de conexões ociosas mantidas abertas
+            keepalive_expiry: Tempo (s) que uma conexão ociosa é mantida
+            max_concurrency: Máximo de tools executando ao mesmo tempo em `call_tools`
+            backoff_base: Base (s) do backoff exponencial entre tentativas
+            backoff_max: Teto (s) do backoff
+            transport: Transporte httpx customizado (ex.: servidor stub em testes)
+        """
+        super().__init__(base_url)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.max_concurrency = max_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.transport = transport
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+        self.stats = {
+            "calls": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "errors": 0
+        }
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Retorna o AsyncClient do event loop atual, criando-o se necessário."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=self.limits, transport=self.transport)
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self) -> None:
+        """Fecha o AsyncClient do event loop atual (conexões keep-alive)."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    async def __aenter__(self) -> "AsyncMCPClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+    async def call_tool(self, tool_name: str, parameters: Dict[str, Any]) -> MCPToolResult:
+        """Executa uma tool MCP.
+
+        Args:
+            tool_name: Nome da tool a executar
+            parameters: Parâmetros para a tool
+
+        Returns:
+            Resultado da execução (erros viram MCPToolResult, nunca exceções)
+        """
+        start_time = time.perf_counter()
+        self.stats["calls"] += 1
+
+        tool, precheck_error = self._precheck(tool_name, parameters)
+        if precheck_error:
+            return precheck_error
+
+        try:
+            result = await self._execute_with_retry(tool, parameters)
+        except Exception as e:
+            logger.error(f"Erro inesperado ao executar tool {tool_name}: {e}")
+            result = MCPToolResult(
+                status=MCPToolStatus.ERROR,
+                message=f"Erro interno: {str(e)}"
+            )
+
+        result.execution_time_ms = int((time.perf_counter() - start_time) * 1000)
+        result.tool_name = tool_name
+        if result.is_success:
+            logger.info(f"Tool {tool_name} executada com sucesso em {result.execution_time_ms}ms")
+        else:
+            self.stats["errors"] += 1
+            logger.warning(f"Tool {tool_name} falhou ({result.status.value}): {result.message}")
+        return result
+
+    async def call_tools(
+        self,
+        calls: Sequence[Tuple[str, Dict[str, Any]]]
+    ) -> List[MCPToolResult]:
+        """Executa várias tools independentes em paralelo.
+
+        Args:
+            calls: Sequência de (nome da tool, parâmetros)
+
+        Returns:
+            Resultados na mesma ordem de `calls`
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _limited(tool_name: str, parameters: Dict[str, Any]) -> MCPToolResult:
+            async with semaphore:
+                return await self.call_tool(tool_name, parameters)
+
+        return list(await asyncio.gather(*(_limited(name, params) for name, params in calls)))
+
+    async def _execute_with_retry(self, tool: MCPTool, parameters: Dict[str, Any]) -> MCPToolResult:
+        """Executa a tool, repetindo falhas transitórias se ela for idempotente."""
+        if not tool.endpoint:
+            return self._execute_local_tool(tool, parameters)
+
+        attempts = 1 + (max(tool.max_retries, 0) if tool.idempotent else 0)
+        result: Optional[MCPToolResult] = None
+
+        for attempt in range(attempts):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff_delay(attempt))
+                logger.info(f"🔁 Tentativa {attempt + 1}/{attempts} da tool {tool.name}")
+
+            result, retryable = await self._execute_once(tool, parameters)
+            if not retryable:
+                return result
+
+        return result
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Backoff exponencial com full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _execute_once(
+        self, tool: MCPTool, parameters: Dict[str, Any]
+    ) -> Tuple[MCPToolResult, bool]:
+        """Executa uma tentativa. Retorna (resultado, se a falha é transitória)."""
+        client = self._get_http_client()
+        url = self._build_url(tool)
+        headers = self._build_headers(tool)
+        method = tool.method.upper()
+
+        try:
+            if method == "GET":
+                response = await client.get(
+                    url,
+                    params=parameters,
+                    headers=headers,
+                    timeout=tool.timeout_seconds
+                )
+            else:
+                response = await client.request(
+                    method,
+                    url,
+                    json=parameters,
+                    headers=headers,
+                    timeout=tool.timeout_seconds
+                )
+        except httpx.TimeoutException:
+            self.stats["timeouts"] += 1
+            return MCPToolResult(
+                status=MCPToolStatus.TIMEOUT,
+                message=f"Timeout após {tool.timeout_seconds} segundos"
+            ), True
+        except httpx.TransportError as e:
+            return MCPToolResult(
+                status=MCPToolStatus.ERROR,
+                message=f"Erro de conexão: {str(e)}"
+            ), True
+
+        result = self._result_from_response(response.status_code, response.text)
+        return result, response.status_code in RETRYABLE_STATUS
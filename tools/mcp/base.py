@@ -6,13 +6,15 @@ import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import requests
 from requests.exceptions import RequestException
 
 
 logger = logging.getLogger(__name__)
 
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
 
 class MCPToolStatus(Enum):
     """Status de execução de uma tool MCP."""
@@ -60,6 +62,8 @@ class MCPTool:
     requires_auth: bool = False
     auth_header: Optional[str] = None
     category: Optional[str] = None
+    idempotent: Optional[bool] = None  # None = inferido pelo método HTTP
+    max_retries: int = 2  # Só aplicado a tools idempotentes
     
     def __post_init__(self):
         """Validações após inicialização."""
@@ -76,10 +80,14 @@ class MCPTool:
         # Validação de parâmetros
         if not isinstance(self.parameters, dict):
             raise ValueError("Parameters must be a dictionary")
+        
+        # Métodos HTTP idempotentes podem ser repetidos com segurança
+        if self.idempotent is None:
+            self.idempotent = self.method.upper() in IDEMPOTENT_METHODS
 
 
-class MCPClient:
-    """Cliente para execução de tools MCP."""
+class BaseMCPClient:
+    """Registro de tools e validações comuns aos clientes MCP (síncrono e assíncrono)."""
     
     def __init__(self, base_url: Optional[str] = None):
         """Inicializa o cliente MCP.
@@ -89,7 +97,6 @@ class MCPClient:
         """
         self.base_url = base_url
         self.tools: Dict[str, MCPTool] = {}
-        self.session = requests.Session()
         
     def register_tool(self, tool: MCPTool) -> None:
         """Registra uma tool no cliente.
@@ -134,60 +141,31 @@ class MCPClient:
         """
         return self.tools.get(tool_name)
     
-    def call_tool(self, tool_name: str, parameters: Dict[str, Any]) -> MCPToolResult:
-        """Executa uma tool MCP.
+    def _precheck(
+        self, tool_name: str, parameters: Dict[str, Any]
+    ) -> Tuple[Optional[MCPTool], Optional[MCPToolResult]]:
+        """Verifica se a tool existe e se os parâmetros são válidos.
         
-        Args:
-            tool_name: Nome da tool a executar
-            parameters: Parâmetros para a tool
-            
         Returns:
-            Resultado da execução
+            (tool, None) se pode executar, ou (tool|None, resultado de erro)
         """
-        start_time = datetime.now()
-        
-        # Verifica se tool existe
         tool = self.tools.get(tool_name)
         if not tool:
-            return MCPToolResult(
+            return None, MCPToolResult(
                 status=MCPToolStatus.NOT_FOUND,
                 message=f"Tool '{tool_name}' não encontrada",
                 tool_name=tool_name
             )
         
-        # Valida parâmetros
         validation_error = self._validate_parameters(tool, parameters)
         if validation_error:
-            return MCPToolResult(
+            return tool, MCPToolResult(
                 status=MCPToolStatus.ERROR,
                 message=validation_error,
                 tool_name=tool_name
             )
         
-        # Executa a tool
-        try:
-            result = self._execute_tool(tool, parameters)
-            execution_time = int((datetime.now() - start_time).total_seconds() * 1000)
-            result.execution_time_ms = execution_time
-            result.tool_name = tool_name
-            
-            logger.info(f"Tool {tool_name} executada com sucesso em {execution_time}ms")
-            return result
-            
-        except RequestException as e:
-            logger.error(f"Erro de rede ao executar tool {tool_name}: {e}")
-            return MCPToolResult(
-                status=MCPToolStatus.ERROR,
-                message=f"Erro de conexão: {str(e)}",
-                tool_name=tool_name
-            )
-        except Exception as e:
-            logger.error(f"Erro inesperado ao executar tool {tool_name}: {e}")
-            return MCPToolResult(
-                status=MCPToolStatus.ERROR,
-                message=f"Erro interno: {str(e)}",
-                tool_name=tool_name
-            )
+        return tool, None
     
     def _validate_parameters(self, tool: MCPTool, parameters: Dict[str, Any]) -> Optional[str]:
         """Valida os parâmetros de uma tool.
@@ -214,6 +192,128 @@ class MCPClient:
         
         return None
     
+    def _build_url(self, tool: MCPTool) -> str:
+        """Constrói a URL completa da tool (endpoints relativos usam base_url)."""
+        url = tool.endpoint
+        if self.base_url and not tool.endpoint.startswith(('http://', 'https://')):
+            url = f"{self.base_url.rstrip('/')}/{tool.endpoint.lstrip('/')}"
+        return url
+    
+    def _build_headers(self, tool: MCPTool) -> Dict[str, str]:
+        """Prepara os headers da requisição (inclui autenticação se exigida)."""
+        headers = dict(tool.headers)
+        if tool.requires_auth and tool.auth_header:
+            headers["Authorization"] = tool.auth_header
+        return headers
+    
+    def _result_from_response(self, status_code: int, text: str) -> MCPToolResult:
+        """Converte a resposta HTTP de uma tool em MCPToolResult."""
+        if status_code == 401:
+            return MCPToolResult(
+                status=MCPToolStatus.UNAUTHORIZED,
+                message="Não autorizado para executar esta tool"
+            )
+        
+        if status_code == 404:
+            return MCPToolResult(
+                status=MCPToolStatus.NOT_FOUND,
+                message="Endpoint da tool não encontrado"
+            )
+        
+        if not (200 <= status_code < 300):
+            return MCPToolResult(
+                status=MCPToolStatus.ERROR,
+                message=f"HTTP {status_code}: {text[:200]}"
+            )
+        
+        # Parse da resposta
+        try:
+            data = json.loads(text) if text else {}
+        except json.JSONDecodeError:
+            data = {"raw_response": text}
+        
+        return MCPToolResult(
+            status=MCPToolStatus.SUCCESS,
+            data=data,
+            message="Executado com sucesso"
+        )
+    
+    def _execute_local_tool(self, tool: MCPTool, parameters: Dict[str, Any]) -> MCPToolResult:
+        """Executa uma tool local (mock/simulada).
+        
+        Args:
+            tool: Tool a executar
+            parameters: Parâmetros
+            
+        Returns:
+            Resultado simulado
+        """
+        # Por enquanto, retorna um resultado mock
+        return MCPToolResult(
+            status=MCPToolStatus.SUCCESS,
+            data={
+                "message": f"Tool local '{tool.name}' executada com sucesso",
+                "parameters_received": parameters,
+                "mock": True
+            },
+            message="Executado localmente (modo simulação)"
+        )
+
+
+class MCPClient(BaseMCPClient):
+    """Cliente síncrono para execução de tools MCP (requests.Session)."""
+    
+    def __init__(self, base_url: Optional[str] = None):
+        """Inicializa o cliente MCP.
+        
+        Args:
+            base_url: URL base para tools que usam endpoints relativos
+        """
+        super().__init__(base_url)
+        self.session = requests.Session()
+    
+    def call_tool(self, tool_name: str, parameters: Dict[str, Any]) -> MCPToolResult:
+        """Executa uma tool MCP.
+        
+        Args:
+            tool_name: Nome da tool a executar
+            parameters: Parâmetros para a tool
+            
+        Returns:
+            Resultado da execução
+        """
+        start_time = datetime.now()
+        
+        # Verifica se tool existe e valida parâmetros
+        tool, precheck_error = self._precheck(tool_name, parameters)
+        if precheck_error:
+            return precheck_error
+        
+        # Executa a tool
+        try:
+            result = self._execute_tool(tool, parameters)
+            execution_time = int((datetime.now() - start_time).total_seconds() * 1000)
+            result.execution_time_ms = execution_time
+            result.tool_name = tool_name
+            
+            logger.info(f"Tool {tool_name} executada com sucesso em {execution_time}ms")
+            return result
+            
+        except RequestException as e:
+            logger.error(f"Erro de rede ao executar tool {tool_name}: {e}")
+            return MCPToolResult(
+                status=MCPToolStatus.ERROR,
+                message=f"Erro de conexão: {str(e)}",
+                tool_name=tool_name
+            )
+        except Exception as e:
+            logger.error(f"Erro inesperado ao executar tool {tool_name}: {e}")
+            return MCPToolResult(
+                status=MCPToolStatus.ERROR,
+                message=f"Erro interno: {str(e)}",
+                tool_name=tool_name
+            )
+    
     def _execute_tool(self, tool: MCPTool, parameters: Dict[str, Any]) -> MCPToolResult:
         """Executa uma tool específica.
         
@@ -228,15 +328,9 @@ class MCPClient:
         if not tool.endpoint:
             return self._execute_local_tool(tool, parameters)
         
-        # Constrói URL completa
-        url = tool.endpoint
-        if self.base_url and not tool.endpoint.startswith(('http://', 'https://')):
-            url = f"{self.base_url.rstrip('/')}/{tool.endpoint.lstrip('/')}"
-        
-        # Prepara headers
-        headers = dict(tool.headers)
-        if tool.requires_auth and tool.auth_header:
-            headers["Authorization"] = tool.auth_header
+        # Constrói URL completa e headers
+        url = self._build_url(tool)
+        headers = self._build_headers(tool)
         
         # Executa requisição
         try:
@@ -256,36 +350,7 @@ class MCPClient:
                     timeout=tool.timeout_seconds
                 )
             
-            # Verifica status code
-            if response.status_code == 401:
-                return MCPToolResult(
-                    status=MCPToolStatus.UNAUTHORIZED,
-                    message="Não autorizado para executar esta tool"
-                )
-            
-            if response.status_code == 404:
-                return MCPToolResult(
-                    status=MCPToolStatus.NOT_FOUND,
-                    message="Endpoint da tool não encontrado"
-                )
-            
-            if not (200 <= response.status_code < 300):
-                return MCPToolResult(
-                    status=MCPToolStatus.ERROR,
-                    message=f"HTTP {response.status_code}: {response.text[:200]}"
-                )
-            
-            # Parse da resposta
-            try:
-                data = response.json() if response.content else {}
-            except json.JSONDecodeError:
-                data = {"raw_response": response.text}
-            
-            return MCPToolResult(
-                status=MCPToolStatus.SUCCESS,
-                data=data,
-                message="Executado com sucesso"
-            )
+            return self._result_from_response(response.status_code, response.text)
             
         except requests.Timeout:
             return MCPToolResult(
@@ -293,23 +358,3 @@ class MCPClient:
                 message=f"Timeout após {tool.timeout_seconds} segundos"
             )
     
-    def _execute_local_tool(self, tool: MCPTool, parameters: Dict[str, Any]) -> MCPToolResult:
-        """Executa uma tool local (mock/simulada).
-        
-        Args:
-            tool: Tool a executar
-            parameters: Parâmetros
-            
-        Returns:
-            Resultado simulado
-        """
-        # Por enquanto, retorna um resultado mock
-        return MCPToolResult(
-            status=MCPToolStatus.SUCCESS,
-            data={
-                "message": f"Tool local '{tool.name}' executada com sucesso",
-                "parameters_received": parameters,
-                "mock": True
-            },
-            message="Executado localmente (modo simulação)"
-        )
\ No newline at end of file
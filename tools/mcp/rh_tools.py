@@ -21,6 +21,7 @@ rh_tools = [
             }
         },
         category="rh",
+        idempotent=True,
         # endpoint=None significa que é uma tool local/simulada por enquanto
     ),
 
@@ -40,6 +41,7 @@ rh_tools = [
             }
         },
         category="rh",
+        idempotent=True,
     ),
     
     MCPTool(
@@ -88,6 +90,7 @@ rh_tools = [
             }
         },
         category="rh",
+        idempotent=True,
     ),
     
     MCPTool(
@@ -52,6 +52,7 @@ ti_tools = [
             }
         },
         category="ti",
+        idempotent=True,
     ),
     
     MCPTool(
@@ -112,6 +113,7 @@ ti_tools = [
             }
         },
         category="ti",
+        idempotent=True,
     ),
     
     MCPTool(
@@ -154,6 +156,7 @@ ti_tools = [
             }
         },
         category="ti",
+        idempotent=True,
     )
 ]
 